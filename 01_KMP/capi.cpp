@@ -0,0 +1,52 @@
+#include <cstdint>
+#include <vector>
+#include "kmp.h"
+
+// 动态库的 C 接口，供 Python（ctypes）等直接在进程内调用
+// 约定：所有长度、偏移、计数与位置均为 int64_t；批量输入把多个字符串首尾相接放在一块连续内存中，
+// offsets 有 count + 1 项，第 i 个字符串为 buf[offsets[i], offsets[i + 1])
+#if defined(_WIN32)
+#define KMP_API extern "C" __declspec(dllexport)
+#else
+#define KMP_API extern "C" __attribute__((visibility("default")))
+#endif
+
+// 接口版本，调用方据此检查动态库是否匹配
+KMP_API int kmp_abi_version() {
+    return 1;
+}
+
+// 单次匹配：返回匹配次数，positions 非空时最多写入 capacity 个起始位置
+KMP_API int64_t kmp_search(const char* text, int64_t n, const char* pattern, int64_t m,
+                           int64_t* positions, int64_t capacity) {
+    if (n < 0 || m < 0) return -1;
+    std::vector<size_t> pi = kmp::prefix_function(pattern, (size_t)m);
+    int64_t written = 0;
+    return (int64_t)kmp::search(text, (size_t)n, pattern, (size_t)m, pi, [&](size_t pos) {
+        if (positions && written < capacity) positions[written++] = (int64_t)pos;
+    });
+}
+
+// 批量匹配：pattern_count 为 1 时所有文本共用一个模式串（前缀函数只计算一次），否则须等于 text_count。
+// counts 写入每个文本的匹配次数；positions 非空时按文本顺序依次写入匹配位置，最多 capacity 个。
+// 返回匹配总数（可能大于 capacity，调用方据此扩容重试），参数错误返回 -1
+KMP_API int64_t kmp_search_batch(const char* texts, const int64_t* text_offsets, int64_t text_count,
+                                 const char* patterns, const int64_t* pattern_offsets, int64_t pattern_count,
+                                 int64_t* counts, int64_t* positions, int64_t capacity) {
+    if (text_count < 0 || (pattern_count != 1 && pattern_count != text_count)) return -1;
+    std::vector<size_t> pi;
+    int64_t total = 0;
+    for (int64_t i = 0; i < text_count; ++i) {
+        int64_t j = pattern_count == 1 ? 0 : i;
+        const char* p = patterns + pattern_offsets[j];
+        size_t m = (size_t)(pattern_offsets[j + 1] - pattern_offsets[j]);
+        if (i == 0 || pattern_count != 1) pi = kmp::prefix_function(p, m);
+        size_t n = (size_t)(text_offsets[i + 1] - text_offsets[i]);
+        int64_t c = (int64_t)kmp::search(texts + text_offsets[i], n, p, m, pi, [&](size_t pos) {
+            if (positions && total < capacity) positions[total] = (int64_t)pos;
+            ++total;
+        });
+        if (counts) counts[i] = c;
+    }
+    return total;
+}
@@ -0,0 +1,47 @@
+#pragma once
+#include <cstddef>
+#include <string>
+#include <vector>
+
+// KMP 算法核心，命令行程序（main.cpp）与动态库 C 接口（capi.cpp）共用
+namespace kmp {
+
+// 前缀函数：pi[i] 为 p[0..i] 最长的相等真前缀与真后缀长度
+inline std::vector<size_t> prefix_function(const char* p, size_t m) {
+    std::vector<size_t> pi(m, 0);
+    for (size_t i = 1; i < m; ++i) {
+        size_t k = pi[i - 1];
+        while (k > 0 && p[i] != p[k]) k = pi[k - 1];
+        if (p[i] == p[k]) ++k;
+        pi[i] = k;
+    }
+    return pi;
+}
+
+// KMP 匹配：对每个匹配的起始位置（从 0 开始）调用 on_match，返回匹配次数，复杂度 O(n + m)
+// pi 为模式串的前缀函数，批量匹配同一模式串时只需计算一次
+template <class OnMatch>
+size_t search(const char* text, size_t n, const char* p, size_t m, const std::vector<size_t>& pi, OnMatch on_match) {
+    if (m == 0) return 0;
+    size_t k = 0, count = 0;
+    for (size_t i = 0; i < n; ++i) {
+        while (k > 0 && text[i] != p[k]) k = pi[k - 1];
+        if (text[i] == p[k]) ++k;
+        if (k == m) {
+            on_match(i + 1 - k);
+            ++count;
+            k = pi[k - 1];
+        }
+    }
+    return count;
+}
+
+// 返回模式串在文本中所有出现的起始位置
+inline std::vector<size_t> search(const std::string& text, const std::string& pattern) {
+    std::vector<size_t> result;
+    std::vector<size_t> pi = prefix_function(pattern.data(), pattern.size());
+    search(text.data(), text.size(), pattern.data(), pattern.size(), pi, [&](size_t pos) { result.push_back(pos); });
+    return result;
+}
+
+}  // namespace kmp
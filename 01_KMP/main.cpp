@@ -1,18 +1,53 @@
 #include <iostream>
+#include <string>
+#include <vector>
+#include <cstdio>
+#include "kmp.h"
 #ifdef _WIN32
 #include <windows.h>
+#include <io.h>
+#define IS_TTY(f) _isatty(_fileno(f))
+#else
+#include <unistd.h>
+#define IS_TTY(f) isatty(fileno(f))
 #endif
 
 // KMP 算法示例主函数
+// 输入：第一行文本，第二行模式串；输出：第一行匹配次数，第二行所有匹配位置
 int main() {
     #ifdef _WIN32
         // 设置控制台为 UTF-8 编码
         SetConsoleOutputCP(CP_UTF8);
         SetConsoleCP(CP_UTF8);
     #endif
-    std::cout << u8"KMP 算法示例" << std::endl;
-    //  运行暂停
-    std::cout << "按回车键继续..." << std::endl;
-    std::cin.get();
+    std::ios::sync_with_stdio(false);
+    // 从终端运行时给出提示并在结束前暂停；从文件或管道读入时直接输出结果
+    const bool interactive = IS_TTY(stdin);
+    if (interactive) {
+        std::cout << u8"KMP 算法示例" << std::endl;
+        std::cout << u8"请输入文本：" << std::endl;
+    }
+    std::string text, pattern;
+    std::getline(std::cin, text);
+    if (interactive) std::cout << u8"请输入模式串：" << std::endl;
+    std::getline(std::cin, pattern);
+    // 兼容 Windows 换行
+    if (!text.empty() && text.back() == '\r') text.pop_back();
+    if (!pattern.empty() && pattern.back() == '\r') pattern.pop_back();
+
+    std::vector<size_t> matches = kmp::search(text, pattern);
+    std::string out = std::to_string(matches.size()) + "\n";
+    for (size_t i = 0; i < matches.size(); ++i) {
+        if (i) out += ' ';
+        out += std::to_string(matches[i]);
+    }
+    out += '\n';
+    std::cout << out;
+    std::cout.flush();
+    if (interactive) {
+        //  运行暂停
+        std::cout << u8"按回车键继续..." << std::endl;
+        std::cin.get();
+    }
     return 0;
-} 
\ No newline at end of file
+}
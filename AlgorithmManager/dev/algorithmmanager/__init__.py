@@ -0,0 +1 @@
+# 算法管理程序的核心逻辑（不依赖 Qt，可供 GUI 与命令行共用）
@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from .paths import cache_dir, file_lock
+from .toolchain import get_registry
+
+# 默认缓存容量上限（MB）
+DEFAULT_MAX_MB = 512
+
+# 参与内容哈希的源文件扩展名
+SOURCE_EXTS = (".cpp", ".cc", ".cxx", ".c", ".h", ".hpp", ".hh", ".hxx", ".inl", ".ipp", ".cmake")
+# 不属于编译输入的目录
+SKIP_DIRS = ("tests", "bench")
+
+
+def _skip_dir(name):
+    return name.startswith(".") or name.startswith("build") or name in SKIP_DIRS
+
+
+def source_files(alg_dir):
+    # 返回参与编译的源文件相对路径（排序后，保证哈希稳定）
+    files = []
+    for dirpath, dirnames, filenames in os.walk(alg_dir):
+        dirnames[:] = [d for d in dirnames if not _skip_dir(d)]
+        for name in filenames:
+            if name == "CMakeLists.txt" or name.endswith(SOURCE_EXTS):
+                rel = os.path.relpath(os.path.join(dirpath, name), alg_dir)
+                files.append(rel.replace("\\", "/"))
+    return sorted(files)
+
+
+def compiler_identity(compiler, env, generator):
+    # 编译器身份：路径、版本以及可执行文件本身的大小与修改时间
+    ident = {"compiler": compiler, "env": env, "generator": generator}
+    if compiler and os.path.exists(compiler):
+        st = os.stat(compiler)
+        ident["size"] = st.st_size
+        ident["mtime"] = st.st_mtime
+    registry = get_registry()
+    for name in ("gcc", "clang", "cl"):
+        entry = registry.lookup(name)
+        if entry and compiler and entry["path"] == compiler:
+            ident["banner"] = entry["banner"]
+    if env == "MSVC":
+        msvc = registry.lookup("msvc")
+        ident["msvc"] = msvc["version"] if msvc else ""
+    return ident
+
+
+def artifact_key(alg_dir, compiler_ident, flags):
+    h = hashlib.sha256()
+    for rel in source_files(alg_dir):
+        h.update(rel.encode("utf-8") + b"\0")
+        with open(os.path.join(alg_dir, rel), "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    h.update(json.dumps(compiler_ident, sort_keys=True, default=str).encode("utf-8"))
+    h.update(json.dumps(flags, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+# 按内容寻址的构建产物缓存：命中时直接取出可执行文件，跳过配置与构建；
+# 超过容量上限时按最近最少使用淘汰
+class ArtifactCache:
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or cache_dir("artifacts")
+        self.objects = os.path.join(self.root, "objects")
+        self.index_path = os.path.join(self.root, "index.json")
+        self.max_bytes = max_bytes if max_bytes is not None else DEFAULT_MAX_MB * 1024 * 1024
+        self.lock = threading.Lock()
+        os.makedirs(self.objects, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        # 缓存目录由图形界面、命令行与守护进程共用，读写索引与产物时同时持有进程内锁和文件锁
+        with self.lock, file_lock(self.index_path + ".lock"):
+            yield
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault("entries", {})
+        index.setdefault("stats", {"hits": 0, "misses": 0, "stores": 0, "evictions": 0})
+        return index
+
+    def _save(self, index):
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.index_path)
+
+    def restore(self, key, dest_dir):
+        # 命中时把产物复制到 dest_dir 下的原相对路径，返回文件列表；未命中返回 None
+        with self._locked():
+            index = self._load()
+            entry = index["entries"].get(key)
+            obj_dir = os.path.join(self.objects, key)
+            if entry and all(os.path.exists(os.path.join(obj_dir, rel)) for rel in entry["files"]):
+                restored = []
+                for rel in entry["files"]:
+                    dst = os.path.join(dest_dir, rel)
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    shutil.copy2(os.path.join(obj_dir, rel), dst)
+                    # 让取出的文件比目标文件旧，之后真正构建时构建系统一定会重新链接
+                    os.utime(dst, (1, 1))
+                    restored.append(dst)
+                entry["last_access"] = time.time()
+                index["stats"]["hits"] += 1
+                self._save(index)
+                return restored
+            if entry:
+                index["entries"].pop(key, None)
+            index["stats"]["misses"] += 1
+            self._save(index)
+            return None
+
+    def store(self, key, base_dir, paths, meta=None):
+        # 保存构建产物，paths 为 base_dir 下的文件
+        with self._locked():
+            index = self._load()
+            obj_dir = os.path.join(self.objects, key)
+            tmp_dir = f"{obj_dir}.{os.getpid()}.tmp"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            files, size = [], 0
+            for path in paths:
+                rel = os.path.relpath(path, base_dir).replace("\\", "/")
+                dst = os.path.join(tmp_dir, rel)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                shutil.copy2(path, dst)
+                files.append(rel)
+                size += os.path.getsize(dst)
+            shutil.rmtree(obj_dir, ignore_errors=True)
+            os.replace(tmp_dir, obj_dir)
+            now = time.time()
+            index["entries"][key] = dict(meta or {}, files=files, size=size, created=now, last_access=now)
+            index["stats"]["stores"] += 1
+            self._evict(index)
+            self._save(index)
+
+    def _evict(self, index):
+        entries = index["entries"]
+        total = sum(e["size"] for e in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= entries[key]["size"]
+            entries.pop(key)
+            shutil.rmtree(os.path.join(self.objects, key), ignore_errors=True)
+            index["stats"]["evictions"] += 1
+
+    def stats(self):
+        with self._locked():
+            index = self._load()
+        stats = dict(index["stats"])
+        stats["entries"] = len(index["entries"])
+        stats["size"] = sum(e["size"] for e in index["entries"].values())
+        stats["max_size"] = self.max_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._locked():
+            shutil.rmtree(self.objects, ignore_errors=True)
+            os.makedirs(self.objects, exist_ok=True)
+            self._save({})
+
+
+def format_stats(stats):
+    return (f"产物缓存：{stats['entries']} 项，{stats['size'] / 1048576:.1f}/{stats['max_size'] / 1048576:.0f} MB，"
+            f"命中 {stats['hits']} 次，未命中 {stats['misses']} 次，命中率 {stats['hit_rate'] * 100:.1f}%，"
+            f"淘汰 {stats['evictions']} 项")
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        max_mb = os.environ.get("ALGORITHMMANAGER_CACHE_MB")
+        _cache = ArtifactCache(max_bytes=int(max_mb) * 1024 * 1024 if max_mb else None)
+    return _cache
@@ -0,0 +1,234 @@
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import platform
+import tempfile
+import statistics
+
+from .procstats import run_measured, format_rss
+from .paths import cache_dir
+
+# 统计的指标：墙钟时间、CPU 时间（秒）与峰值内存（字节）
+METRICS = ("wall", "cpu", "peak_rss")
+
+
+# ---------- 输入生成器 ----------
+# 生成器签名：gen(size, case, rng) -> 写入程序 stdin 的字节串
+
+def gen_kmp(size, case, rng):
+    # 第一行文本，第二行模式串；模式串长度随文本长度增长
+    m = max(2, size // 100)
+    if case == "adversarial":
+        # aaaa…a 中查找 aaa…ab：朴素匹配退化为 O(nm)
+        text = "a" * size
+        pattern = "a" * (m - 1) + "b"
+    elif case == "periodic":
+        unit = "ab" * 3 + "c"
+        text = (unit * (size // len(unit) + 1))[:size]
+        pattern = (unit * (m // len(unit) + 1))[:m]
+    else:
+        text = "".join(rng.choices("abcd", k=size))
+        start = rng.randrange(0, max(1, size - m))
+        pattern = text[start:start + m]
+    return f"{text}\n{pattern}\n".encode("ascii")
+
+
+def gen_lines(size, case, rng):
+    # 默认生成器：size 个随机整数，每行一个
+    return "".join(f"{rng.randrange(1 << 30)}\n" for _ in range(size)).encode("ascii")
+
+
+GENERATORS = {
+    "kmp": (gen_kmp, ("random", "adversarial", "periodic")),
+    "default": (gen_lines, ("random",)),
+}
+
+
+def generator_for(alg):
+    # 按算法名（去掉序号前缀）选择输入生成器
+    name = alg.split("_", 1)[1] if "_" in alg else alg
+    return GENERATORS.get(name.lower(), GENERATORS["default"])
+
+
+# ---------- 统计 ----------
+
+def percentile(values, q):
+    # 线性插值的分位数，q 取 0~100
+    data = sorted(values)
+    if not data:
+        return float("nan")
+    pos = (len(data) - 1) * q / 100.0
+    lo = int(math.floor(pos))
+    hi = min(lo + 1, len(data) - 1)
+    return data[lo] + (data[hi] - data[lo]) * (pos - lo)
+
+
+def bootstrap_ci(values, level=0.95, rounds=2000, seed=12345):
+    # 中位数的自助法置信区间
+    if len(values) < 2:
+        return values[0], values[0]
+    rng = random.Random(seed)
+    medians = sorted(statistics.median(rng.choices(values, k=len(values))) for _ in range(rounds))
+    alpha = (1 - level) / 2 * 100
+    return percentile(medians, alpha), percentile(medians, 100 - alpha)
+
+
+def summarize(values):
+    lo, hi = bootstrap_ci(values)
+    return {
+        "n": len(values),
+        "median": statistics.median(values),
+        "mean": statistics.fmean(values),
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "min": min(values),
+        "max": max(values),
+        "p90": percentile(values, 90),
+        "p95": percentile(values, 95),
+        "ci_low": lo,
+        "ci_high": hi,
+    }
+
+
+def scaling_exponent(sizes, times):
+    # 对 log(时间) 与 log(规模) 做最小二乘拟合，斜率约等于复杂度的指数
+    points = [(math.log(n), math.log(t)) for n, t in zip(sizes, times) if n > 0 and t > 0]
+    if len(points) < 2:
+        return None
+    mx = statistics.fmean(p[0] for p in points)
+    my = statistics.fmean(p[1] for p in points)
+    var = sum((x - mx) ** 2 for x, _ in points)
+    if var == 0:
+        return None
+    return sum((x - mx) * (y - my) for x, y in points) / var
+
+
+# ---------- 运行 ----------
+
+def run_benchmark(exe, alg, sizes, case=None, repeat=10, warmup=2, timeout=None, seed=0, log=print):
+    gen, cases = generator_for(alg)
+    case = case or cases[0]
+    rng = random.Random(seed)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="am-bench-") as tmp:
+        for size in sizes:
+            # 输入提前写入文件，生成时间不计入测量
+            input_path = os.path.join(tmp, f"{size}.in")
+            with open(input_path, "wb") as f:
+                f.write(gen(size, case, rng))
+            samples = {m: [] for m in METRICS}
+            failures = 0
+            for i in range(warmup + repeat):
+                with open(input_path, "rb") as stdin:
+                    r = run_measured([exe], stdin=stdin, cwd=os.path.dirname(exe), timeout=timeout)
+                if r["exit_code"] != 0 or r["timed_out"]:
+                    failures += 1
+                    continue
+                if i >= warmup:
+                    # 峰值内存未知（采样可能漏掉峰值）时只缺这一项
+                    for m in METRICS:
+                        if r[m] is not None:
+                            samples[m].append(r[m])
+            entry = {"size": size, "case": case, "failures": failures, "samples": samples,
+                     "stats": {m: summarize(v) for m, v in samples.items() if v}}
+            results.append(entry)
+            if "wall" in entry["stats"]:
+                s, rss = entry["stats"]["wall"], entry["stats"].get("peak_rss")
+                log(f"n={size:<10} 中位数={s['median'] * 1000:.3f}ms  p95={s['p95'] * 1000:.3f}ms  "
+                    f"95%CI=[{s['ci_low'] * 1000:.3f}, {s['ci_high'] * 1000:.3f}]ms  "
+                    f"峰值内存={format_rss(rss['median'] if rss else None)}")
+            else:
+                log(f"n={size:<10} 全部 {failures} 次运行失败")
+    ok = [r for r in results if "wall" in r["stats"]]
+    exponent = scaling_exponent([r["size"] for r in ok], [r["stats"]["wall"]["median"] for r in ok])
+    if exponent is not None:
+        log(f"墙钟时间随规模增长的拟合指数：{exponent:.2f}")
+    return {
+        "alg": alg,
+        "exe": exe,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": {"platform": platform.platform(), "machine": platform.machine(),
+                 "python": sys.version.split()[0], "cpus": os.cpu_count()},
+        "config": {"case": case, "sizes": list(sizes), "repeat": repeat, "warmup": warmup, "seed": seed},
+        "results": results,
+        "scaling": {"wall_exponent": exponent},
+    }
+
+
+def summary_text(result):
+    # 最大规模下的墙钟时间中位数，用于项目索引中的简要记录
+    ok = [r for r in result["results"] if "wall" in r["stats"]]
+    if not ok:
+        return "全部运行失败"
+    r = max(ok, key=lambda r: r["size"])
+    return f"{r['case']} n={r['size']} 中位数 {r['stats']['wall']['median'] * 1000:.3f}ms"
+
+
+def default_result_path(alg):
+    # 随机后缀：同一秒内的两次运行不会互相覆盖结果
+    return os.path.join(cache_dir("bench", alg), time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6] + ".json")
+
+
+def save_result(result, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+def load_result(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ---------- 回归比较 ----------
+
+# 两份结果中没有对应项时的结论
+UNMATCHED = ("无基线", "未测量")
+
+
+def compare(baseline, current, threshold=0.05, metric="wall"):
+    # 中位数变慢超过阈值且置信区间不重叠时判定为回归；
+    # 只在一侧出现（规模或用例不同、全部运行失败）的项也列出，结论为“无基线”或“未测量”
+    base = {(r["size"], r["case"]): r["stats"].get(metric) for r in baseline["results"]}
+    rows, seen = [], set()
+    for r in current["results"]:
+        key = (r["size"], r["case"])
+        seen.add(key)
+        b, c = base.get(key), r["stats"].get(metric)
+        if not b or not c:
+            rows.append({"size": key[0], "case": key[1], "baseline": b and b["median"], "current": c and c["median"],
+                         "ratio": None, "verdict": "无基线" if not b else "未测量"})
+            continue
+        ratio = c["median"] / b["median"] if b["median"] else float("inf")
+        if ratio > 1 + threshold and c["ci_low"] > b["ci_high"]:
+            verdict = "回归"
+        elif ratio < 1 - threshold and c["ci_high"] < b["ci_low"]:
+            verdict = "提升"
+        else:
+            verdict = "持平"
+        rows.append({"size": key[0], "case": key[1], "baseline": b["median"], "current": c["median"],
+                     "ratio": ratio, "verdict": verdict})
+    for key, b in base.items():
+        if key not in seen:
+            rows.append({"size": key[0], "case": key[1], "baseline": b and b["median"], "current": None,
+                         "ratio": None, "verdict": "未测量"})
+    return rows
+
+
+def matched_rows(rows):
+    return [r for r in rows if r["verdict"] not in UNMATCHED]
+
+
+def format_comparison(rows, metric="wall"):
+    lines = [f"{'规模':>10}  {'用例':<12} {'基线':>12}  {'当前':>12}  {'比值':>7}  结论"]
+    for r in rows:
+        if metric == "peak_rss":
+            b, c = (format_rss(v) if v is not None else "-" for v in (r["baseline"], r["current"]))
+        else:
+            b, c = (f"{v * 1000:.3f}ms" if v is not None else "-" for v in (r["baseline"], r["current"]))
+        ratio = f"{r['ratio']:>7.3f}" if r["ratio"] is not None else f"{'-':>7}"
+        lines.append(f"{r['size']:>10}  {r['case']:<12} {b:>12}  {c:>12}  {ratio}  {r['verdict']}")
+    return "\n".join(lines)
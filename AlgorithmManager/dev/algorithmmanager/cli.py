@@ -0,0 +1,570 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+from . import engine, bench
+from .toolchain import get_registry, locate, TOOLS
+from .artifacts import get_cache, format_stats
+from . import timeline, testrunner
+# fuzz（经 refsearch 导入 numpy）、native、variants、watch 与 daemon 只在用到的命令中导入，
+# 其他命令（list、build 等）不必承担这部分启动时间
+from .projectindex import get_index, format_entry
+from .runcapture import load_history, find_run, format_record, OutputPager, STREAMS, MAX_OUTPUT_BYTES
+
+
+def _add_build_options(parser):
+    parser.add_argument("--env", choices=["MSVC", "GCC"], help="编译环境")
+    parser.add_argument("--arch", choices=["x86", "x64"], help="目标架构")
+    parser.add_argument("--type", dest="build_type", help="构建类型，如 Release、Debug")
+    parser.add_argument("--generator", choices=engine.GENERATOR_CHOICES[1:], help="CMake 生成器，默认自动选择（优先 Ninja）")
+    parser.add_argument("--compiler", help="C++ 编译器路径")
+    parser.add_argument("--cmake", help="CMake 可执行文件路径")
+    parser.add_argument("--clean", action="store_true", help="删除 build 目录后完整重建")
+    parser.add_argument("--no-cache", action="store_true", help="不使用构建产物缓存")
+    parser.add_argument("--shared", action="store_true", help="同时构建导出 C 接口的动态库（ctypes 调用）")
+    parser.add_argument("--tu-profile", action="store_true", help="逐编译单元计时（clang -ftime-trace / MSVC /Bt+）")
+
+
+def _overrides_from_args(args):
+    # 只包含命令行上给出的选项，未给出的沿用子项目保存的参数
+    overrides = {}
+    for key, value in (("env", args.env), ("arch", args.arch), ("build_type", args.build_type),
+                       ("generator", args.generator), ("compiler_path", args.compiler), ("cmake_path", args.cmake)):
+        if value:
+            overrides[key] = value
+    if args.no_cache:
+        overrides["artifact_cache"] = False
+    if args.tu_profile:
+        overrides["tu_profile"] = True
+    if args.shared:
+        overrides["shared_lib"] = True
+    return overrides
+
+
+def _params_from_args(args):
+    return engine.algorithm_params(args.root, args.alg, _overrides_from_args(args))
+
+
+def _check_alg(root, alg):
+    if alg not in engine.list_algorithms(root):
+        print(f"未找到算法目录：{alg}", file=sys.stderr)
+        return False
+    return True
+
+
+def cmd_list(args):
+    index = get_index(args.root)
+    for name in engine.list_algorithms(args.root):
+        print(format_entry(name, index.entry(name)) if args.details else name)
+    return 0
+
+
+def cmd_toolchains(args):
+    registry = get_registry()
+    if args.refresh:
+        registry.refresh()
+    for name in TOOLS:
+        entry = registry.get(name, probe=args.refresh)
+        if entry:
+            print(f"{name:<6} {entry['version'] or '-':<12} {entry['path']}")
+        else:
+            print(f"{name:<6} {'未探测' if locate(name) else '未找到'}")
+    return 0
+
+
+def _submit(args, after, options=None, jobs=None):
+    # 交给构建守护进程执行（未运行时先启动），日志流式输出；Ctrl+C 断开连接即取消任务
+    from . import daemon
+    params = _params_from_args(args)
+    client = None
+    try:
+        client = daemon.DaemonClient(daemon.start_daemon())
+        result = client.request("build", root=os.path.abspath(args.root), alg=args.alg, params=params,
+                                clean=args.clean, jobs=jobs, after=after, options=options or {})
+    except KeyboardInterrupt:
+        if client is not None:
+            client.cancel()
+        print("已取消")
+        return 1
+    except (OSError, RuntimeError) as e:
+        print(f"守护进程请求失败：{e}", file=sys.stderr)
+        return 1
+    return result["code"] if result else 1
+
+
+def cmd_build(args):
+    if not _check_alg(args.root, args.alg):
+        return 2
+    if args.daemon:
+        return _submit(args, "run" if args.run else "none", jobs=args.jobs)
+    params = _params_from_args(args)
+    job = engine.BuildJob(args.root, args.alg, params, clean=args.clean, jobs=args.jobs)
+    print(f"使用 {job.env} 编译环境，编译器：{job.compiler}")
+    status = engine.run_build(job, print, finish=False)
+    code = 0 if status in engine.SUCCESS_STATUSES else 1
+    if code == 0 and args.run:
+        # 与 --daemon 相同：受管运行（输入为空），输出与统计写入运行记录
+        code = engine.run_executable(job, print)
+        code = 1 if code is None else code
+    if status != "缺少CMakeLists":
+        print(job.finish_timeline(status))
+        if args.trace:
+            timeline.export_chrome_trace([job.timeline.to_record()], args.trace)
+            print(f"Chrome trace 已导出：{args.trace}")
+    return code
+
+
+def cmd_build_all(args):
+    algs = args.algs or engine.list_algorithms(args.root)
+    for alg in algs:
+        if not _check_alg(args.root, alg):
+            return 2
+    print(f"开始批量编译 {len(algs)} 个子项目，并发数={args.concurrency}")
+    results = engine.run_batch(args.root, algs, _overrides_from_args(args), args.concurrency, clean=args.clean, log=print)
+    print(engine.format_summary(results))
+    print(format_stats(get_cache().stats()))
+    return 0 if all(r["status"] in engine.SUCCESS_STATUSES for r in results) else 1
+
+
+def cmd_test(args):
+    if not _check_alg(args.root, args.alg):
+        return 2
+    if args.daemon:
+        return _submit(args, "test", {"time_limit": args.time_limit, "memory_limit": args.memory_limit, "jobs": args.jobs,
+                                      "filter": args.filter, "fail_fast": args.fail_fast})
+    params = _params_from_args(args)
+    job = engine.BuildJob(args.root, args.alg, params, clean=args.clean)
+    if args.build and engine.run_build(job, print) not in engine.SUCCESS_STATUSES:
+        return 1
+    exe_path = job.find_executable()
+    if not exe_path:
+        print("未找到可执行文件，请先构建（或加 --build）。", file=sys.stderr)
+        return 1
+    cases = testrunner.discover_cases(job.alg_dir, args.filter)
+    if not cases:
+        print(f"{args.alg}/{testrunner.TESTS_DIR} 下没有测试用例（需要成对的 .in 与 .out 文件）")
+        return 0
+    memory_limit = args.memory_limit * 1024 * 1024 if args.memory_limit else None
+    print(f"运行 {len(cases)} 个用例：{exe_path}，并发数={args.jobs or os.cpu_count()}")
+    results = testrunner.run_tests(exe_path, cases, jobs=args.jobs, time_limit=args.time_limit,
+                                   memory_limit=memory_limit, fail_fast=args.fail_fast)
+    print(testrunner.format_report(results, len(cases)))
+    return 0 if testrunner.all_passed(results, len(cases)) else 1
+
+
+def cmd_fuzz(args):
+    if not _check_alg(args.root, args.alg):
+        return 2
+    if "kmp" not in args.alg.lower():
+        print("差分模糊测试目前只支持 KMP 子项目", file=sys.stderr)
+        return 2
+    from . import fuzz, native
+    kinds = [k for k in args.kinds.split(",") if k] if args.kinds else list(fuzz.KINDS)
+    unknown = [k for k in kinds if k not in fuzz.KINDS]
+    if unknown:
+        print(f"未知的用例类型：{', '.join(unknown)}（可选：{', '.join(fuzz.KINDS)}）", file=sys.stderr)
+        return 2
+    params = _params_from_args(args)
+    params["shared_lib"] = params.get("shared_lib") or args.lib
+    job = engine.BuildJob(args.root, args.alg, params, clean=args.clean)
+    if args.build and engine.run_build(job, print) not in engine.SUCCESS_STATUSES:
+        return 1
+    if args.lib:
+        try:
+            lib = native.load(args.alg, args.root, job.build_type, job.find_library())
+        except (KeyError, FileNotFoundError, OSError, RuntimeError) as e:
+            print(e, file=sys.stderr)
+            return 1
+        run, target = fuzz.library_runner(lib), lib.path
+    else:
+        exe_path = job.find_executable()
+        if not exe_path:
+            print("未找到可执行文件，请先构建（或加 --build）。", file=sys.stderr)
+            return 1
+        run, target = fuzz.exe_runner(exe_path, args.timeout), exe_path
+    out_dir = os.path.join(job.alg_dir, testrunner.TESTS_DIR) if args.save_tests else (args.out or fuzz.default_failure_dir(args.alg))
+    print(f"差分模糊测试：{target}，{args.iterations} 个用例，最大文本长度 {args.max_size}，种子 {args.seed}")
+    result = fuzz.run_fuzz(run, args.iterations, args.max_size, args.seed, kinds, jobs=args.jobs,
+                           out_dir=out_dir, fail_fast=args.fail_fast)
+    print(fuzz.format_report(result))
+    if result["failures"]:
+        print(f"失败用例已保存到：{out_dir}")
+        return 1
+    return 0
+
+
+def cmd_watch(args):
+    if not _check_alg(args.root, args.alg):
+        return 2
+    from . import watch
+    memory_limit = args.memory_limit * 1024 * 1024 if args.memory_limit else None
+    session = watch.WatchSession(args.root, args.alg, _params_from_args(args), "test" if args.test else "run",
+                                 input_path=args.input, time_limit=args.time_limit, memory_limit=memory_limit)
+    try:
+        session.watch(watch.POLL_INTERVAL if args.interval is None else args.interval,
+                      watch.DEBOUNCE if args.debounce is None else args.debounce)
+    except KeyboardInterrupt:
+        print("已停止监视")
+    return 0
+
+
+def cmd_run(args):
+    if not _check_alg(args.root, args.alg):
+        return 2
+    stdin = args.input
+    if args.gen is not None:
+        gen, cases = bench.generator_for(args.alg)
+        if args.case and args.case not in cases:
+            print(f"用例 {args.case} 不可用，可选：{', '.join(cases)}", file=sys.stderr)
+            return 2
+        stdin = iter([gen(args.gen, args.case or cases[0], random.Random(args.seed))])
+    params = _params_from_args(args)
+    job = engine.BuildJob(args.root, args.alg, params, clean=args.clean)
+    if args.build and engine.run_build(job, print, finish=False) not in engine.SUCCESS_STATUSES:
+        return 1
+    try:
+        code = engine.run_executable(job, print, stdin, args.timeout, args.max_output * 1024 * 1024)
+    except KeyboardInterrupt:
+        job.cancel()
+        print("已取消")
+        return 1
+    if code is None:
+        print("未找到可执行文件，请先构建（或加 --build）。", file=sys.stderr)
+        return 1
+    return code
+
+
+def cmd_runs(args):
+    records = load_history(args.alg, args.last)
+    if not records:
+        print(f"{args.alg} 没有运行记录")
+        return 0
+    for r in records:
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r["started"]))
+        print(f"{r['id']}  {when}  {format_record(r)}")
+    return 0
+
+
+def cmd_show(args):
+    record = find_run(args.alg, args.run_id)
+    if record is None:
+        print(f"未找到运行记录：{args.run_id or args.alg}", file=sys.stderr)
+        return 1
+    pager = OutputPager(record["outputs"][args.stream]["path"])
+    if not os.path.exists(pager.path):
+        print("输出文件已被清理（只保留最近的运行）", file=sys.stderr)
+        return 1
+    page = min(max(args.page, 1), pager.page_count())
+    sys.stdout.write(pager.read_page(page - 1))
+    sys.stdout.flush()
+    print(f"\n-- {record['id']} {args.stream} 第 {page}/{pager.page_count()} 页 --", file=sys.stderr)
+    return 0
+
+
+def _sizes(text):
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def cmd_bench(args):
+    if not _check_alg(args.root, args.alg):
+        return 2
+    _, cases = bench.generator_for(args.alg)
+    if args.case and args.case not in cases:
+        print(f"用例 {args.case} 不可用，可选：{', '.join(cases)}", file=sys.stderr)
+        return 2
+    out = os.path.abspath(args.out) if args.out else bench.default_result_path(args.alg)
+    if args.daemon:
+        code = _submit(args, "bench", {"sizes": args.sizes, "case": args.case, "repeat": args.repeat, "warmup": args.warmup,
+                                       "timeout": args.timeout, "seed": args.seed, "out": out})
+        if code != 0 or not args.baseline:
+            return code
+        result = bench.load_result(out)
+    else:
+        params = _params_from_args(args)
+        job = engine.BuildJob(args.root, args.alg, params, clean=args.clean)
+        if args.build and engine.run_build(job, print) not in engine.SUCCESS_STATUSES:
+            return 1
+        exe_path = job.find_executable()
+        if not exe_path:
+            print("未找到可执行文件，请先构建（或加 --build）。", file=sys.stderr)
+            return 1
+        print(f"性能测试：{exe_path}")
+        result = bench.run_benchmark(exe_path, args.alg, args.sizes, case=args.case, repeat=args.repeat,
+                                     warmup=args.warmup, timeout=args.timeout, seed=args.seed)
+        bench.save_result(result, out)
+        print(f"结果已保存：{out}")
+        get_index(args.root).record_bench(args.alg, "bench", out, bench.summary_text(result))
+    if args.baseline:
+        rows = bench.compare(bench.load_result(args.baseline), result, args.threshold)
+        print(bench.format_comparison(rows))
+        if not bench.matched_rows(rows):
+            print("基线与本次结果没有相同的规模与用例，无法比较", file=sys.stderr)
+            return 1
+        if any(r["verdict"] == "回归" for r in rows):
+            return 1
+    return 0
+
+
+def cmd_compare(args):
+    rows = bench.compare(bench.load_result(args.baseline), bench.load_result(args.current), args.threshold, args.metric)
+    print(bench.format_comparison(rows, args.metric))
+    if not bench.matched_rows(rows):
+        print("两份结果没有相同的规模与用例，无法比较", file=sys.stderr)
+        return 1
+    regressions = [r for r in rows if r["verdict"] == "回归"]
+    if regressions:
+        print(f"发现 {len(regressions)} 项性能回归")
+        return 1
+    return 0
+
+
+def cmd_variants(args):
+    if not _check_alg(args.root, args.alg):
+        return 2
+    from . import variants
+    names = args.variants or list(variants.DEFAULT_VARIANTS)
+    try:
+        for name in names:
+            variants.parse_variant(name)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    params = _params_from_args(args)
+    print(f"并发构建 {len(names)} 个变体：{', '.join(names)}")
+    builds = variants.run_variants(args.root, args.alg, names, params, args.concurrency, clean=args.clean,
+                                   case=args.case, train_size=args.train_size or variants.TRAIN_SIZE, seed=args.seed,
+                                   log=print)
+    print(engine.format_summary([dict(b, alg=b["variant"]) for b in builds], "变体"))
+    if args.no_bench:
+        return 0 if all(b["exe"] for b in builds) else 1
+    results = variants.bench_variants(builds, args.alg, args.sizes, case=args.case, repeat=args.repeat,
+                                      warmup=args.warmup, timeout=args.timeout, seed=args.seed, log=print)
+    if not results:
+        print("没有可测试的变体", file=sys.stderr)
+        return 1
+    table = variants.speedup_table(results, args.baseline or variants.DEFAULT_BASELINE)
+    print(variants.format_speedups(table, args.sizes))
+    out = args.out or variants.default_result_path(args.alg)
+    variants.save_result(builds, results, table, out)
+    print(f"结果已保存：{out}")
+    get_index(args.root).record_bench(args.alg, "variants", out, variants.summary_text(table))
+    return 0
+
+
+def cmd_timeline(args):
+    records = timeline.load_records(args.alg, args.config)[-args.last:]
+    if not records:
+        print(f"{args.alg} 没有耗时记录")
+        return 0
+    names = list(timeline.PHASE_LABELS)
+    print(f"{'时间':<19}  {'配置':<32}  {'状态':<8}  " + "  ".join(f"{timeline.PHASE_LABELS[n]:>8}" for n in names) + "  总计")
+    for r in records:
+        dur = {}
+        for p in r["phases"]:
+            dur[p["name"]] = dur.get(p["name"], 0.0) + p["end"] - p["start"]
+        total = max((p["end"] for p in r["phases"]), default=0.0)
+        cells = "  ".join(f"{dur[n]:>8.2f}" if n in dur else f"{'-':>8}" for n in names)
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r["started"]))
+        print(f"{when}  {r['config']:<32}  {r['status']:<8}  {cells}  {total:.2f}")
+        for u in sorted(r.get("units", []), key=lambda u: -u["dur"])[:args.units]:
+            print(f"    {u['dur']:>8.3f}s  {u['name']}")
+    if args.export:
+        timeline.export_chrome_trace(records, args.export)
+        print(f"Chrome trace 已导出：{args.export}")
+    return 0
+
+
+def cmd_daemon(args):
+    from . import daemon
+    max_jobs = args.max_jobs or daemon.DEFAULT_MAX_JOBS
+    if args.action == "serve":
+        try:
+            daemon.serve(max_jobs)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.action == "start":
+        try:
+            state = daemon.start_daemon(max_jobs)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"守护进程运行中：127.0.0.1:{state['port']}，进程号 {state['pid']}")
+        return 0
+    if args.action == "stop":
+        print("守护进程已停止" if daemon.stop_daemon() else "守护进程未运行")
+        return 0
+    state = daemon.is_running()
+    if state is None:
+        print("守护进程未运行")
+        return 1
+    print(daemon.format_status(daemon.DaemonClient(state).request("status")))
+    return 0
+
+
+def cmd_cache(args):
+    cache = get_cache()
+    if args.action == "clear":
+        cache.clear()
+        print("产物缓存已清空")
+    else:
+        print(format_stats(cache.stats()))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="algorithmmanager", description="算法子项目的命令行构建工具")
+    parser.add_argument("--root", default=engine.project_root(), help="项目根目录")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("list", help="列出算法子项目")
+    p.add_argument("--details", action="store_true", help="同时显示源文件数、上次构建与性能测试结果")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("toolchains", help="查看工具链缓存")
+    p.add_argument("--refresh", action="store_true", help="重新探测失效的工具")
+    p.set_defaults(func=cmd_toolchains)
+
+    p = sub.add_parser("build", help="构建单个算法子项目")
+    p.add_argument("alg", help="算法目录名，如 01_KMP")
+    _add_build_options(p)
+    p.add_argument("--jobs", type=int, help="cmake --build 的并行编译数")
+    p.add_argument("--run", action="store_true", help="构建成功后运行可执行文件（输入为空，输出写入运行记录，可用 runs/show 查看）")
+    p.add_argument("--daemon", action="store_true", help="交给构建守护进程执行（未运行时自动启动）；程序的 stdin 为空")
+    p.add_argument("--trace", help="把本次各阶段耗时导出为 Chrome trace JSON")
+    p.set_defaults(func=cmd_build)
+
+    p = sub.add_parser("build-all", help="并发构建多个算法子项目")
+    p.add_argument("algs", nargs="*", help="算法目录名，默认全部")
+    _add_build_options(p)
+    p.add_argument("-j", "--concurrency", type=int, default=os.cpu_count() or 1, help="同时运行的构建任务数")
+    p.set_defaults(func=cmd_build_all)
+
+    p = sub.add_parser("daemon", help="管理后台构建守护进程（保留已捕获的编译环境，多个前端共用任务队列）")
+    p.add_argument("action", choices=["start", "stop", "status", "serve"], nargs="?", default="status",
+                   help="serve 在前台运行，供调试")
+    p.add_argument("--max-jobs", type=int, help="同时执行的任务数，默认 2")
+    p.set_defaults(func=cmd_daemon)
+
+    p = sub.add_parser("cache", help="查看或清空构建产物缓存")
+    p.add_argument("action", choices=["stats", "clear"], nargs="?", default="stats")
+    p.set_defaults(func=cmd_cache)
+
+    p = sub.add_parser("timeline", help="查看构建各阶段耗时记录")
+    p.add_argument("alg", help="算法目录名，如 01_KMP")
+    p.add_argument("--config", help="只显示指定配置，如 Release-x64-Ninja-GCC")
+    p.add_argument("--last", type=int, default=10, help="显示最近几条记录")
+    p.add_argument("--units", type=int, default=5, help="每条记录显示最慢的几个编译单元")
+    p.add_argument("--export", help="导出为 Chrome trace JSON（chrome://tracing、Perfetto 可打开）")
+    p.set_defaults(func=cmd_timeline)
+
+    p = sub.add_parser("test", help="用 tests/ 下的输入与答案检查程序输出")
+    p.add_argument("alg", help="算法目录名，如 01_KMP")
+    _add_build_options(p)
+    p.add_argument("--build", action="store_true", help="测试前先（增量）构建")
+    p.add_argument("-j", "--jobs", type=int, help="同时运行的用例数，默认为 CPU 核心数")
+    p.add_argument("--time-limit", type=float, default=testrunner.DEFAULT_TIME_LIMIT, help="单个用例的时间上限（秒）")
+    p.add_argument("--memory-limit", type=int, default=testrunner.DEFAULT_MEMORY_LIMIT_MB, help="单个用例的内存上限（MB），0 表示不限制")
+    p.add_argument("--fail-fast", action="store_true", help="出现第一个失败用例后停止")
+    p.add_argument("--filter", help="只运行名称匹配的用例，如 '0*'")
+    p.add_argument("--daemon", action="store_true", help="交给构建守护进程（增量）构建并测试")
+    p.set_defaults(func=cmd_test)
+
+    p = sub.add_parser("fuzz", help="与 Python 参考实现做差分模糊测试（KMP）")
+    p.add_argument("alg", help="算法目录名，如 01_KMP")
+    _add_build_options(p)
+    p.add_argument("--build", action="store_true", help="测试前先（增量）构建")
+    p.add_argument("--lib", action="store_true", help="通过 ctypes 调用动态库，而不是逐个启动可执行文件")
+    p.add_argument("-n", "--iterations", type=int, default=1000, help="用例数")
+    p.add_argument("--max-size", type=int, default=1000, help="文本的最大长度")
+    p.add_argument("--seed", type=int, default=0, help="随机种子；第 i 个用例的种子为 <seed>-<i>")
+    p.add_argument("--kinds", help="用例类型，逗号分隔，默认全部：random,adversarial,periodic,thue_morse,fibonacci,edge")
+    p.add_argument("-j", "--jobs", type=int, help="同时运行的用例数，默认为 CPU 核心数")
+    p.add_argument("--timeout", type=float, default=10.0, help="单次运行超时（秒）")
+    p.add_argument("--fail-fast", action="store_true", help="出现第一个失败用例后停止")
+    p.add_argument("--out", help="失败用例的保存目录，默认在用户缓存目录下")
+    p.add_argument("--save-tests", action="store_true", help="把失败用例直接保存到算法的 tests/ 目录")
+    p.set_defaults(func=cmd_fuzz)
+
+    p = sub.add_parser("watch", help="监视源文件，改动后自动增量构建并运行或测试")
+    p.add_argument("alg", help="算法目录名，如 01_KMP")
+    _add_build_options(p)
+    p.add_argument("--test", action="store_true", help="构建后运行 tests/ 下的用例，而不是运行程序")
+    p.add_argument("--input", help="运行程序时作为 stdin 的文件")
+    p.add_argument("--interval", type=float, help="轮询间隔（秒），默认 0.5")
+    p.add_argument("--debounce", type=float, help="改动平息多久后开始构建（秒），默认 0.3")
+    p.add_argument("--time-limit", type=float, default=testrunner.DEFAULT_TIME_LIMIT, help="单个用例的时间上限（秒）")
+    p.add_argument("--memory-limit", type=int, default=testrunner.DEFAULT_MEMORY_LIMIT_MB, help="单个用例的内存上限（MB），0 表示不限制")
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser("run", help="受管运行程序：输出写入文件，记录耗时、内存与返回码")
+    p.add_argument("alg", help="算法目录名，如 01_KMP")
+    _add_build_options(p)
+    p.add_argument("--build", action="store_true", help="运行前先（增量）构建")
+    p.add_argument("--input", help="作为 stdin 的文件，默认输入为空")
+    p.add_argument("--gen", type=int, metavar="N", help="用性能测试的输入生成器生成规模为 N 的输入")
+    p.add_argument("--case", help="--gen 的输入用例类型，如 random、adversarial")
+    p.add_argument("--seed", type=int, default=0, help="--gen 的随机种子")
+    p.add_argument("--timeout", type=float, help="运行超时（秒）")
+    p.add_argument("--max-output", type=int, default=MAX_OUTPUT_BYTES // 1048576, help="每个输出流保存的最大 MB 数，超出部分丢弃")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("runs", help="查看运行记录")
+    p.add_argument("alg", help="算法目录名，如 01_KMP")
+    p.add_argument("--last", type=int, default=20, help="显示最近几条记录")
+    p.set_defaults(func=cmd_runs)
+
+    p = sub.add_parser("show", help="分页查看某次运行的输出")
+    p.add_argument("alg", help="算法目录名，如 01_KMP")
+    p.add_argument("run_id", nargs="?", help="运行记录编号（可用前缀），默认最近一次")
+    p.add_argument("--stream", choices=STREAMS, default="stdout", help="查看的输出流")
+    p.add_argument("--page", type=int, default=1, help="页码，从 1 开始")
+    p.set_defaults(func=cmd_show)
+
+    p = sub.add_parser("bench", help="对已构建的可执行文件做性能测试")
+    p.add_argument("alg", help="算法目录名，如 01_KMP")
+    _add_build_options(p)
+    p.add_argument("--build", action="store_true", help="测试前先（增量）构建")
+    p.add_argument("--sizes", type=_sizes, default=[1000, 10000, 100000, 1000000], help="输入规模，逗号分隔")
+    p.add_argument("--case", help="输入用例类型，如 random、adversarial")
+    p.add_argument("--repeat", type=int, default=10, help="每个规模的测量次数")
+    p.add_argument("--warmup", type=int, default=2, help="预热次数（不计入统计）")
+    p.add_argument("--timeout", type=float, help="单次运行超时（秒）")
+    p.add_argument("--seed", type=int, default=0, help="输入生成的随机种子")
+    p.add_argument("--out", help="结果 JSON 文件路径")
+    p.add_argument("--baseline", help="与指定的基线结果比较")
+    p.add_argument("--threshold", type=float, default=0.05, help="判定回归的相对阈值")
+    p.add_argument("--daemon", action="store_true", help="交给构建守护进程（增量）构建并做性能测试")
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("variants", help="并发构建多个优化变体并比较性能")
+    p.add_argument("alg", help="算法目录名，如 01_KMP")
+    p.add_argument("variants", nargs="*", help="变体名，如 O3-lto-native，默认 O2 O3 O3-lto O3-native O3-pgo")
+    _add_build_options(p)
+    p.add_argument("-j", "--concurrency", type=int, help="同时构建的变体数，默认全部")
+    p.add_argument("--baseline", help="计算加速比的基线变体，默认 O2")
+    p.add_argument("--no-bench", action="store_true", help="只构建，不做性能测试")
+    p.add_argument("--train-size", type=int, help="PGO 训练输入的规模，默认 100000")
+    p.add_argument("--sizes", type=_sizes, default=[10000, 100000, 1000000], help="输入规模，逗号分隔")
+    p.add_argument("--case", help="输入用例类型（同时用于 PGO 训练）")
+    p.add_argument("--repeat", type=int, default=10, help="每个规模的测量次数")
+    p.add_argument("--warmup", type=int, default=2, help="预热次数（不计入统计）")
+    p.add_argument("--timeout", type=float, help="单次运行超时（秒）")
+    p.add_argument("--seed", type=int, default=0, help="输入生成的随机种子")
+    p.add_argument("--out", help="结果 JSON 文件路径")
+    p.set_defaults(func=cmd_variants)
+
+    p = sub.add_parser("compare", help="比较两份性能测试结果")
+    p.add_argument("baseline", help="基线结果 JSON")
+    p.add_argument("current", help="当前结果 JSON")
+    p.add_argument("--threshold", type=float, default=0.05, help="判定回归的相对阈值")
+    p.add_argument("--metric", choices=bench.METRICS, default="wall", help="比较的指标")
+    p.set_defaults(func=cmd_compare)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,436 @@
+import os
+import sys
+import json
+import hmac
+import time
+import socket
+import secrets
+import threading
+import traceback
+import subprocess
+import socketserver
+
+from . import engine, bench, testrunner
+from .paths import cache_dir
+from .toolchain import capture_env, vcvars_path, which_in, get_registry
+from .projectindex import get_index
+
+# 后台构建守护进程：常驻进程保存捕获好的编译环境（vcvarsall 执行后的环境变量快照）与工具链探测结果，
+# 图形界面和命令行通过本机 TCP 连接提交构建/运行/测试/性能测试任务，日志逐行流式返回。
+# 同一个 build 目录的任务排队依次执行，多个前端不再同时改写同一个 build 目录。
+#
+# 协议：客户端发送一行 JSON 请求（含状态文件中的令牌），守护进程逐行返回 JSON 事件：
+#   {"event": "log", "line": ...}     任务日志
+#   {"event": "done", ...}            任务结束，附带状态与返回码
+#   {"event": "status", ...}          查询结果
+#   {"event": "error", "message": ...}
+# 客户端在任务结束前断开连接即取消该任务
+
+PROTOCOL_VERSION = 1
+DEFAULT_MAX_JOBS = 2
+# 构建成功后的动作
+AFTER_ACTIONS = ("none", "run", "test", "bench")
+# 请求行的最大长度（字节）
+MAX_REQUEST = 1 << 20
+# 启动守护进程后等待其就绪的时间（秒）
+START_TIMEOUT = 10.0
+
+
+def state_path():
+    # 端口、令牌与进程号；文件只有当前用户可读，令牌用于拒绝其他用户的连接
+    return os.path.join(cache_dir("daemon"), "daemon.json")
+
+
+def log_path():
+    return os.path.join(cache_dir("daemon"), "daemon.log")
+
+
+def read_state():
+    try:
+        with open(state_path(), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") == PROTOCOL_VERSION:
+            return state
+    except (OSError, ValueError, AttributeError):
+        pass
+    return None
+
+
+def _write_state(state):
+    path = state_path()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _remove_state(pid):
+    # 只删除属于该进程的状态文件，它可能已被新启动的守护进程覆盖
+    state = read_state()
+    if state and state.get("pid") == pid:
+        try:
+            os.remove(state_path())
+        except OSError:
+            pass
+
+
+class BuildDaemon:
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS):
+        self.max_jobs = max(1, max_jobs)
+        self.slots = threading.Semaphore(self.max_jobs)
+        self.token = secrets.token_hex(16)
+        self.started = time.time()
+        self.lock = threading.Lock()
+        # build 目录 -> 锁：同一目录的任务依次执行
+        self.dir_locks = {}
+        # (编译环境, 架构, vcvarsall.bat) -> (环境变量快照, 说明)；捕获较慢，串行进行，同一环境只捕获一次
+        self.envs = {}
+        self.env_lock = threading.Lock()
+        # 任务编号 -> (任务信息, BuildJob)
+        self.jobs = {}
+        self.next_id = 1
+        self.server = None
+
+    def environment(self, params):
+        env, arch = params.get("env"), params.get("arch", "x64")
+        key = (env, arch, vcvars_path(params) if env == "MSVC" else None)
+        with self.env_lock:
+            if key not in self.envs:
+                snapshot, desc = capture_env(env, arch, params)
+                if snapshot is None:
+                    return snapshot, desc
+                self.envs[key] = (snapshot, desc)
+            return self.envs[key]
+
+    def make_job(self, request, log):
+        params = dict(engine.default_params(), **(request.get("params") or {}))
+        snapshot, desc = self.environment(params)
+        generator = None
+        if snapshot is None:
+            log(f"未能捕获编译环境（{desc}），使用守护进程自身的环境")
+        else:
+            log(f"使用已捕获的编译环境：{desc}")
+            cl = which_in(snapshot, "cl") if params.get("env") == "MSVC" else None
+            if cl:
+                params["compiler_path"] = cl
+                # 快照中 cl 可用，“自动”时可以配合 Ninja，省去 Visual Studio 生成器的 MSBuild 开销
+                if params.get("generator", "自动") == "自动" and get_registry().path_of("ninja"):
+                    generator = "Ninja"
+        job = engine.BuildJob(request["root"], request["alg"], params, clean=request.get("clean", False),
+                              jobs=request.get("jobs"), generator=generator)
+        job.env_vars = snapshot
+        return job
+
+    def submit(self, request, log, on_job=None):
+        # 执行一个构建请求，返回 done 事件的内容；on_job 在任务创建后调用（用于监听客户端断开）
+        root, alg = os.path.abspath(request["root"]), request["alg"]
+        after = request.get("after", "none")
+        if after not in AFTER_ACTIONS:
+            raise ValueError(f"未知的动作：{after}（可选：{'、'.join(AFTER_ACTIONS)}）")
+        index = get_index(root)
+        # 其他前端可能改过索引（如参数），以磁盘上的内容为准
+        index.reload()
+        if alg not in index.algorithms():
+            raise ValueError(f"未找到算法目录：{alg}")
+        job = self.make_job(dict(request, root=root), log)
+        if on_job:
+            on_job(job)
+        with self.lock:
+            job_id = self.next_id
+            self.next_id += 1
+            info = {"id": job_id, "root": root, "alg": alg, "after": after, "state": "排队", "submitted": time.time()}
+            self.jobs[job_id] = (info, job)
+            dir_lock = self.dir_locks.setdefault(os.path.normcase(job.build_dir), threading.Lock())
+        acquired = []
+        try:
+            for lock, reason in ((dir_lock, f"{alg} 的 build 目录正被其他任务使用，排队等待..."),
+                                 (self.slots, f"已有 {self.max_jobs} 个任务在执行，排队等待...")):
+                if not self._acquire(lock, job, log, reason):
+                    log("任务已取消")
+                    return {"status": "已取消", "code": 1}
+                acquired.append(lock)
+            info["state"] = "执行"
+            return self._execute(job, after, request.get("options") or {}, log)
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+            with self.lock:
+                self.jobs.pop(job_id, None)
+
+    def _acquire(self, lock, job, log, reason):
+        if lock.acquire(blocking=False):
+            return True
+        log(reason)
+        while not job.cancelled:
+            if lock.acquire(timeout=0.2):
+                return True
+        return False
+
+    def _execute(self, job, after, options, log):
+        log(f"使用 {job.env} 编译环境，编译器：{job.compiler}")
+        status = engine.run_build(job, log, finish=False)
+        result = {"status": status, "code": 0 if status in engine.SUCCESS_STATUSES else 1, "exe": None}
+        if result["code"] == 0 and not job.cancelled:
+            result["exe"] = job.find_executable()
+            if after == "run":
+                code = engine.run_executable(job, log, options.get("input"))
+                result["code"] = 1 if code is None else code
+            elif after == "test":
+                memory_limit = options.get("memory_limit")
+                passed = testrunner.test_job(job, log, options.get("time_limit", testrunner.DEFAULT_TIME_LIMIT),
+                                             memory_limit * 1024 * 1024 if memory_limit else None,
+                                             options.get("jobs"), options.get("filter"), options.get("fail_fast", False))
+                result["code"] = 0 if passed else 1
+            elif after == "bench":
+                result.update(self._bench(job, options, log))
+        if job.cancelled:
+            result.update(status="已取消", code=1)
+        elif status != "缺少CMakeLists":
+            log(job.finish_timeline(status))
+        return result
+
+    def _bench(self, job, options, log):
+        exe_path = job.find_executable()
+        if not exe_path:
+            log("未找到可执行文件")
+            return {"code": 1}
+        log(f"性能测试：{exe_path}")
+        with job.timeline.phase("run"):
+            result = bench.run_benchmark(exe_path, job.alg, options.get("sizes") or [1000, 10000, 100000, 1000000],
+                                         case=options.get("case"), repeat=options.get("repeat", 10),
+                                         warmup=options.get("warmup", 2), timeout=options.get("timeout"),
+                                         seed=options.get("seed", 0), log=log)
+        out = options.get("out") or bench.default_result_path(job.alg)
+        bench.save_result(result, out)
+        log(f"结果已保存：{out}")
+        get_index(job.root).record_bench(job.alg, "bench", out, bench.summary_text(result))
+        return {"code": 0, "result_path": out}
+
+    def cancel(self, root=None, alg=None):
+        # 取消匹配的任务（排队中或执行中），返回取消的个数
+        with self.lock:
+            matched = [job for info, job in self.jobs.values()
+                       if (root is None or info["root"] == os.path.abspath(root)) and (alg is None or info["alg"] == alg)]
+        for job in matched:
+            job.cancel()
+        return len(matched)
+
+    def status(self):
+        with self.lock:
+            jobs = [dict(info) for info, _ in self.jobs.values()]
+        with self.env_lock:
+            envs = [desc for _, desc in self.envs.values()]
+        return {"pid": os.getpid(), "started": self.started, "max_jobs": self.max_jobs, "envs": envs,
+                "jobs": sorted(jobs, key=lambda info: info["id"])}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.write_lock = threading.Lock()
+        self.closed = False
+        self.finished = False
+
+    def send(self, event):
+        # 任务日志可能来自多个线程（如并发运行的测试用例），逐行加锁写入；客户端已断开时丢弃
+        data = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+        with self.write_lock:
+            if self.closed:
+                return
+            try:
+                self.wfile.write(data)
+            except OSError:
+                self.closed = True
+
+    def log(self, line):
+        self.send({"event": "log", "line": line})
+
+    def watch_disconnect(self, job):
+        # 客户端发送完请求后不再发送数据，读到 EOF 说明客户端已断开（界面上取消、Ctrl+C），取消其任务
+        def wait():
+            try:
+                data = self.connection.recv(1)
+            except OSError:
+                data = b""
+            if not data and not self.finished:
+                job.cancel()
+        threading.Thread(target=wait, name="daemon-client", daemon=True).start()
+
+    def handle(self):
+        daemon = self.server.build_daemon
+        line = self.rfile.readline(MAX_REQUEST)
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            op = request.get("op")
+        except (ValueError, AttributeError):
+            self.send({"event": "error", "message": "无法解析请求"})
+            return
+        if not hmac.compare_digest(str(request.get("token", "")), daemon.token):
+            self.send({"event": "error", "message": "令牌无效"})
+            return
+        try:
+            if op == "build":
+                result = daemon.submit(request, self.log, self.watch_disconnect)
+                self.send(dict(result, event="done"))
+            elif op == "status":
+                self.send(dict(daemon.status(), event="status"))
+            elif op == "cancel":
+                count = daemon.cancel(request.get("root"), request.get("alg"))
+                self.send({"event": "done", "status": f"已取消 {count} 个任务", "code": 0})
+            elif op == "stop":
+                daemon.cancel()
+                self.send({"event": "done", "status": "守护进程已停止", "code": 0})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                self.send({"event": "error", "message": f"未知的请求：{op}"})
+        except (KeyError, ValueError) as e:
+            self.send({"event": "error", "message": str(e)})
+        except Exception as e:
+            traceback.print_exc()
+            self.send({"event": "error", "message": f"{type(e).__name__}: {e}"})
+        finally:
+            self.finished = True
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    # Windows 上 SO_REUSEADDR 允许其他进程抢占同一端口，不开启
+    allow_reuse_address = False
+
+
+def serve(max_jobs=DEFAULT_MAX_JOBS, log=print):
+    # 只监听本机回环地址；端口由系统分配，连同令牌写入状态文件
+    daemon = BuildDaemon(max_jobs)
+    server = _Server(("127.0.0.1", 0), _Handler)
+    server.build_daemon = daemon
+    daemon.server = server
+    port = server.server_address[1]
+    _write_state({"version": PROTOCOL_VERSION, "port": port, "token": daemon.token, "pid": os.getpid(),
+                  "started": daemon.started})
+    log(f"守护进程已启动：127.0.0.1:{port}，进程号 {os.getpid()}，并发任务数 {daemon.max_jobs}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        _remove_state(os.getpid())
+        log("守护进程已退出")
+
+
+# ---------- 客户端 ----------
+
+class DaemonClient:
+    def __init__(self, state=None, timeout=5.0):
+        self.state = state or read_state()
+        self.timeout = timeout
+        self.sock = None
+        self.cancelled = False
+
+    def request(self, op, log=print, **fields):
+        # 发送请求，日志事件交给 log，返回最后的 done/status 事件；被 cancel() 中断时返回 None
+        if self.state is None:
+            raise RuntimeError("守护进程未运行")
+        sock = socket.create_connection(("127.0.0.1", self.state["port"]), self.timeout)
+        sock.settimeout(None)
+        self.sock = sock
+        try:
+            if self.cancelled:
+                return None
+            # 请求使用 ASCII 转义，字符串中的任意字符都能原样传输
+            sock.sendall((json.dumps(dict(fields, op=op, token=self.state["token"])) + "\n").encode("utf-8"))
+            result = None
+            with sock.makefile("rb") as stream:
+                for line in stream:
+                    event = json.loads(line)
+                    kind = event.pop("event", None)
+                    if kind == "log":
+                        log(event["line"])
+                    elif kind == "error":
+                        raise RuntimeError(event["message"])
+                    else:
+                        result = event
+            return result
+        except OSError:
+            if self.cancelled:
+                return None
+            raise
+        finally:
+            self.sock = None
+            sock.close()
+
+    def cancel(self):
+        # 断开连接，守护进程随即取消该请求的任务
+        self.cancelled = True
+        sock = self.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def is_running():
+    # 返回运行中的守护进程的状态；进程已退出而状态文件残留时删除该文件
+    state = read_state()
+    if state is None:
+        return None
+    try:
+        socket.create_connection(("127.0.0.1", state["port"]), 1.0).close()
+    except OSError:
+        _remove_state(state.get("pid"))
+        return None
+    return state
+
+
+def start_daemon(max_jobs=DEFAULT_MAX_JOBS):
+    # 已在运行时直接返回其状态，否则在后台启动并等待就绪
+    state = is_running()
+    if state:
+        return state
+    if getattr(sys, "frozen", False):
+        # 打包后的程序不能用 -m 启动模块，改为在本进程的后台线程中运行
+        threading.Thread(target=serve, args=(max_jobs, lambda line: None), name="build-daemon", daemon=True).start()
+    else:
+        dev_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        if engine.WINDOWS:
+            flags = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.CREATE_NO_WINDOW
+            detach = {"creationflags": flags}
+        else:
+            # 新会话：关闭启动它的终端或界面后继续运行
+            detach = {"start_new_session": True}
+        with open(log_path(), "ab") as out:
+            subprocess.Popen([sys.executable, "-m", "algorithmmanager", "daemon", "serve", "--max-jobs", str(max_jobs)],
+                             cwd=dev_dir, stdin=subprocess.DEVNULL, stdout=out, stderr=subprocess.STDOUT, **detach)
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        state = is_running()
+        if state:
+            return state
+        time.sleep(0.05)
+    raise RuntimeError(f"守护进程启动超时，详见 {log_path()}")
+
+
+def stop_daemon(timeout=START_TIMEOUT):
+    # 返回是否有守护进程被停止
+    state = is_running()
+    if state is None:
+        return False
+    DaemonClient(state).request("stop", log=lambda line: None)
+    deadline = time.monotonic() + timeout
+    while read_state() is not None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return True
+
+
+def format_status(status):
+    started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(status["started"]))
+    lines = [f"守护进程 {status['pid']}，启动于 {started}，并发任务数 {status['max_jobs']}"]
+    for desc in status["envs"]:
+        lines.append(f"  已捕获环境：{desc}")
+    for info in status["jobs"]:
+        lines.append(f"  #{info['id']} {info['alg']:<16} {info['state']}（构建后：{info['after']}）")
+    if not status["jobs"]:
+        lines.append("  没有进行中的任务")
+    return "\n".join(lines)
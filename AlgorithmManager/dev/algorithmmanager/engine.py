@@ -0,0 +1,438 @@
+import os
+import sys
+import time
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from .incremental import compute_fingerprint, prepare_build_dir, save_fingerprint, CONFIG_PARAM_KEYS
+from .toolchain import get_registry
+from .artifacts import get_cache, artifact_key, compiler_identity
+from .logpipe import StreamDecoder
+from .timeline import Timeline, config_key, tu_profile_flags
+from .procstats import kill_tree
+from .projectindex import get_index, scan_algorithms
+from .runcapture import RunCapture, format_record, MAX_OUTPUT_BYTES
+
+
+# 视为构建成功的状态
+SUCCESS_STATUSES = ("成功", "命中缓存")
+
+# 可选的生成器；“自动”时优先使用 Ninja
+GENERATOR_CHOICES = ("自动", "Ninja", "Unix Makefiles", "MinGW Makefiles", "Visual Studio")
+
+WINDOWS = sys.platform.startswith("win")
+
+
+def project_root():
+    # 项目根目录：打包后可执行文件所在目录即项目根目录，否则使用相对路径
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+
+def list_algorithms(root, use_index=True):
+    # 目录名以序号_算法名格式；默认读取项目索引，根目录未增删子目录时不扫描
+    return get_index(root).algorithms() if use_index else scan_algorithms(root)
+
+
+def default_params():
+    # 默认参数
+    return {
+        "env": "MSVC" if WINDOWS else "GCC",
+        "compiler_path": r"",
+        "cmake_path": get_registry().path_of("cmake") or "cmake",
+        "build_type": "Release",
+        "vsvars_path": r"",
+        "arch": "x64",
+        "generator": "自动",
+        # 并行编译数，0 表示使用全部核心
+        "jobs": 0
+    }
+
+
+def algorithm_params(root, alg, overrides=None):
+    # 子项目的构建参数：默认值 < 索引中保存的该子项目参数（图形界面设置） < overrides（如命令行选项）。
+    # 参数参与增量指纹，各入口使用同一份参数才不会互相覆盖指纹、导致重新配置
+    params = default_params()
+    params.update(get_index(root).params(alg) or {})
+    params.update(overrides or {})
+    return params
+
+
+def resolve_compiler(params):
+    # 根据环境选择编译器路径
+    env = params.get("env")
+    compiler = params.get("compiler_path", "")
+    if env == "MSVC":
+        compiler = get_registry().path_of("cl") or compiler
+    elif env == "GCC":
+        compiler = compiler or get_registry().path_of("gcc")
+    return compiler
+
+
+def detect_generator(env, preferred=None):
+    # 选择生成器：指定了具体生成器时直接使用，否则优先 Ninja，再按平台与编译环境选择
+    if preferred and preferred not in ("自动", "Visual Studio"):
+        return preferred
+    if preferred != "Visual Studio":
+        registry = get_registry()
+        # MSVC 只有在已初始化 vcvars 的环境中（cl 在 PATH 上）才能配合 Ninja 使用
+        if registry.path_of("ninja") and (env != "MSVC" or registry.path_of("cl")):
+            return "Ninja"
+        if env != "MSVC":
+            return "MinGW Makefiles" if WINDOWS else "Unix Makefiles"
+    return visual_studio_generator()
+
+
+def visual_studio_generator():
+    # 从工具链缓存读取安装的 Visual Studio 版本（缓存失效时才调用 vswhere）
+    year_map = {17: "2022", 16: "2019", 15: "2017", 14: "2015", 12: "2013", 9: "2008"}
+    generator = "Visual Studio 16 2019"
+    msvc = get_registry().get("msvc")
+    try:
+        major = int(msvc["version"].split(".")[0])
+        year = year_map.get(major, str(2000 + major))
+        generator = f"Visual Studio {major} {year}"
+    except (TypeError, KeyError, ValueError):
+        pass
+    return generator
+
+
+def is_multi_config(generator):
+    # 多配置生成器在构建时用 --config 选择构建类型，产物位于 <build>/<类型>/ 下
+    return generator.startswith("Visual Studio") or generator in ("Xcode", "Ninja Multi-Config")
+
+
+# CMake 为 MSVC 设置的 CMAKE_CXX_FLAGS 默认值
+MSVC_DEFAULT_CXX_FLAGS = ["/DWIN32", "/D_WINDOWS", "/GR", "/EHsc"]
+
+
+def make_config_args(cmake_exec, generator, alg_dir, build_dir, build_type, env, arch, compiler, extra_flags=None):
+    # 组装 config 参数列表
+    cfg_args = [cmake_exec, "-G", generator, "-S", alg_dir, "-B", build_dir, f"-DCMAKE_BUILD_TYPE={build_type}"]
+    if not is_multi_config(generator):
+        # 子项目的 CMakeLists.txt 用 BUILD_MODE 覆盖 CMAKE_BUILD_TYPE，单配置生成器需要一并传入
+        cfg_args.append(f"-DBUILD_MODE={build_type}")
+    flags = list(extra_flags or [])
+    if generator.startswith("Visual Studio"): cfg_args += ["-A", arch]
+    if env == "MSVC":
+        # 每次都传入完整的 CMAKE_CXX_FLAGS（含 CMake 为 MSVC 设置的默认选项）：
+        # _INIT 只在新缓存中生效，在已有 build 目录里开关 /Bt+ 不会生效
+        flags[:0] = MSVC_DEFAULT_CXX_FLAGS
+    else:
+        flags.insert(0, "-m32" if arch=="x86" else "-m64")
+    cfg_args.append(f"-DCMAKE_CXX_FLAGS={' '.join(flags)}")
+    if compiler:
+        comp_path = compiler.replace('\\','/')
+        cfg_args.append(f"-DCMAKE_CXX_COMPILER={comp_path}")
+    return cfg_args
+
+
+def make_build_args(cmake_exec, build_dir, build_type, generator, jobs=None):
+    build_args = [cmake_exec, "--build", build_dir]
+    if is_multi_config(generator): build_args += ["--config", build_type]
+    if jobs: build_args += ["--parallel", str(jobs)]
+    return build_args
+
+
+def library_file_name(alg):
+    # 动态库命名约定：算法名小写，如 01_KMP -> libkmp.so / kmp.dll
+    base = (alg.split("_", 1)[1] if "_" in alg else alg).lower()
+    if WINDOWS:
+        return base + ".dll"
+    return f"lib{base}.dylib" if sys.platform == "darwin" else f"lib{base}.so"
+
+
+def format_summary(results, label="算法"):
+    # 批量构建结束后的汇总表
+    width = max([len(label)] + [len(r["alg"]) for r in results])
+    lines = [f"{label.ljust(width)}  {'状态':<8}  耗时(秒)"]
+    for r in results:
+        lines.append(f"{r['alg'].ljust(width)}  {r['status']:<8}  {r['elapsed']:.2f}")
+    ok = sum(1 for r in results if r["status"] in SUCCESS_STATUSES)
+    lines.append(f"共 {len(results)} 个，成功 {ok} 个，失败 {len(results) - ok} 个")
+    return "\n".join(lines)
+
+
+# 单个算法子项目的一次构建：负责准备目录、生成命令行和查找产物，
+# 命令本身由前端执行（GUI 使用 QProcess，命令行使用 subprocess）
+class BuildJob:
+    # 构建结果是否作为该算法的“上次构建”写入项目索引
+    record_in_index = True
+
+    def __init__(self, root, alg, params, clean=False, jobs=None, generator=None):
+        self.root = root
+        self.alg = alg
+        self.timeline = Timeline(alg)
+        self.timeline.begin("toolchain")
+        self.params = params
+        self.clean = clean
+        self.jobs = jobs or params.get("jobs") or os.cpu_count()
+        self.alg_dir = os.path.join(root, alg)
+        self.build_dir = os.path.join(self.alg_dir, "build")
+        self.cmake_exec = params.get("cmake_path", "cmake")
+        self.build_type = params.get("build_type", "Release")
+        self.env = params.get("env")
+        self.arch = params.get("arch", "x64")
+        self.compiler = resolve_compiler(params)
+        self.generator = generator or detect_generator(self.env, params.get("generator"))
+        self.timeline.end("toolchain")
+        self.timeline.config = config_key(self.build_type, self.arch, self.generator, self.env)
+        # 逐编译单元计时（clang -ftime-trace / MSVC /Bt+），Ninja 日志总是会读取
+        self.tu_profile = params.get("tu_profile", False)
+        # 同时构建导出 C 接口的动态库（子项目 CMakeLists.txt 需提供 BUILD_SHARED_API 选项）
+        self.shared_lib = params.get("shared_lib", False)
+        self.fingerprint = None
+        # 清理重建时不使用产物缓存（构建结束后仍会写入）
+        self.use_cache = params.get("artifact_cache", True)
+        self._artifact_key = None
+        # 取消后当前子进程被结束，后续阶段不再启动
+        self.cancelled = False
+        self._proc = None
+        # 执行命令时使用的环境变量（如守护进程缓存的 vcvars 环境），None 表示继承当前进程
+        self.env_vars = None
+
+    def cancel(self):
+        self.cancelled = True
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            kill_tree(proc.pid)
+
+    def has_cmakelists(self):
+        return os.path.exists(os.path.join(self.alg_dir, "CMakeLists.txt"))
+
+    def ensure_cmakelists(self):
+        # 未检测到 CMakeLists.txt 时创建空文件，返回是否新建
+        if self.has_cmakelists():
+            return False
+        with open(os.path.join(self.alg_dir, "CMakeLists.txt"), "w", encoding="utf-8"):
+            pass
+        return True
+
+    def prepare(self):
+        # 增量构建：返回需要配置的原因，None 表示配置输入未变化
+        self.fingerprint = compute_fingerprint(self.alg_dir, self.generator, self.arch, self.compiler, self.build_type, self.params)
+        return prepare_build_dir(self.build_dir, self.fingerprint, clean=self.clean)
+
+    def extra_flags(self):
+        # 追加到 CMAKE_CXX_FLAGS 的编译选项
+        return tu_profile_flags(self.env, self.compiler) if self.tu_profile else []
+
+    def supports_shared_api(self):
+        try:
+            with open(os.path.join(self.alg_dir, "CMakeLists.txt"), "r", encoding="utf-8", errors="replace") as f:
+                return "BUILD_SHARED_API" in f.read()
+        except OSError:
+            return False
+
+    def config_args(self):
+        args = make_config_args(self.cmake_exec, self.generator, self.alg_dir, self.build_dir, self.build_type, self.env, self.arch, self.compiler, self.extra_flags())
+        if self.supports_shared_api():
+            args.append(f"-DBUILD_SHARED_API={'ON' if self.shared_lib else 'OFF'}")
+        return args
+
+    def configured(self):
+        # 配置成功后记录指纹，下次输入不变时可跳过配置
+        save_fingerprint(self.build_dir, self.fingerprint)
+
+    def build_args(self):
+        return make_build_args(self.cmake_exec, self.build_dir, self.build_type, self.generator, self.jobs)
+
+    def begin_build(self):
+        self.timeline.begin("build")
+        self.timeline.mark_build_start(self.build_dir)
+
+    def end_build(self):
+        self.timeline.end("build")
+        self.timeline.collect_units(self.build_dir)
+
+    def finish_timeline(self, status):
+        # 记录本次构建各阶段耗时，返回摘要文字
+        self.timeline.status = status
+        self.timeline.save()
+        if self.record_in_index:
+            get_index(self.root).record_build(self.alg, status, self.timeline.total(), self.timeline.config, self.fingerprint)
+        return self.timeline.summary()
+
+    def artifact_key(self):
+        # 源文件、CMakeLists.txt、编译器身份与编译选项共同决定的内容哈希
+        if self._artifact_key is None:
+            flags = {
+                "arch": self.arch,
+                "build_type": self.build_type,
+                "cxx_standard": self.params.get("cxx_standard"),
+                "params": {k: self.params.get(k) for k in CONFIG_PARAM_KEYS},
+            }
+            ident = compiler_identity(self.compiler, self.env, self.generator)
+            self._artifact_key = artifact_key(self.alg_dir, ident, flags)
+        return self._artifact_key
+
+    def restore_artifacts(self, log=None):
+        # 命中产物缓存时取出可执行文件，返回是否命中；缓存读写失败按未命中处理，不影响构建
+        if self.clean or not self.use_cache:
+            return False
+        try:
+            return get_cache().restore(self.artifact_key(), self.build_dir) is not None
+        except OSError as e:
+            if log:
+                log(f"读取产物缓存失败：{e}")
+            return False
+
+    def store_artifacts(self, log=None):
+        if not self.use_cache:
+            return
+        exe_path = self.find_executable()
+        if exe_path:
+            paths = [exe_path]
+            lib_path = self.find_library() if self.shared_lib else None
+            if lib_path:
+                paths.append(lib_path)
+            meta = {"alg": self.alg, "build_type": self.build_type, "arch": self.arch, "env": self.env}
+            try:
+                get_cache().store(self.artifact_key(), self.build_dir, paths, meta)
+            except OSError as e:
+                if log:
+                    log(f"写入产物缓存失败：{e}")
+
+    def find_executable(self):
+        exe_base = self.alg.split("_", 1)[1] if "_" in self.alg else self.alg
+        return self._find_output(exe_base + (".exe" if WINDOWS else ""))
+
+    def find_library(self):
+        return self._find_output(library_file_name(self.alg))
+
+    def _find_output(self, file_name):
+        # 查找路径：多配置生成器放在 <build>/<类型>/ 下，单配置生成器通常直接放在 <build>/ 下
+        flat = os.path.join(self.build_dir, file_name)
+        per_config = os.path.join(self.build_dir, self.build_type, file_name)
+        candidate = [per_config, flat] if is_multi_config(self.generator) else [flat, per_config]
+        found = next((p for p in candidate if os.path.isfile(p)), None)
+        if found:
+            return found
+        # 兜底：在 build 目录中搜索同名文件（跳过 CMake 内部目录）
+        for dirpath, dirnames, filenames in os.walk(self.build_dir):
+            dirnames[:] = [d for d in dirnames if d != "CMakeFiles"]
+            if file_name in filenames:
+                return os.path.join(dirpath, file_name)
+        return None
+
+
+def run_command(args, cwd, log, observe=None, job=None, stdin=None):
+    # 同步执行命令，逐行输出合并后的 stdout/stderr，返回退出码；传入 job 时可由 job.cancel() 结束
+    env = job.env_vars if job is not None else None
+    try:
+        proc = subprocess.Popen(args, cwd=cwd, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env)
+    except OSError as e:
+        # 程序不存在或没有执行权限（如 --cmake 路径错误），按失败处理，由调用方报告配置/构建失败
+        log(f"无法启动 {args[0]}：{e}")
+        return -1
+    if job is not None:
+        job._proc = proc
+        if job.cancelled:
+            kill_tree(proc.pid)
+    decoder = StreamDecoder()
+
+    def emit(lines):
+        if observe:
+            observe(lines)
+        for line in lines:
+            log(line)
+    try:
+        for chunk in iter(lambda: proc.stdout.read1(65536), b""):
+            emit(decoder.feed(chunk))
+        emit(decoder.finish())
+        return proc.wait()
+    finally:
+        proc.stdout.close()
+        if job is not None:
+            job._proc = None
+
+
+def run_build(job, log, finish=True):
+    # 执行配置（必要时）与构建，返回状态文字；各阶段耗时记录到 job.timeline，
+    # finish=False 时由调用方在后续阶段（如运行）结束后调用 job.finish_timeline
+    status = _run_build(job, log)
+    if finish and status != "缺少CMakeLists":
+        log(job.finish_timeline(status))
+    return status
+
+
+def _run_build(job, log):
+    if job.cancelled:
+        return "已取消"
+    if not job.has_cmakelists():
+        log("未检测到 CMakeLists.txt")
+        return "缺少CMakeLists"
+    with job.timeline.phase("cache"):
+        hit = job.restore_artifacts(log)
+    if hit:
+        log("命中构建产物缓存，跳过配置与构建")
+        return "命中缓存"
+    reason = job.prepare()
+    if reason is None:
+        log("配置输入未变化，跳过配置，直接构建...")
+    else:
+        log(f"开始配置（{reason}）：生成器={job.generator}, 构建类型={job.build_type}, 架构={job.arch} ...")
+        with job.timeline.phase("configure"):
+            code = run_command(job.config_args(), job.root, log, job=job)
+        if job.cancelled:
+            log("配置已取消")
+            return "已取消"
+        if code != 0:
+            log(f"配置失败，返回码：{code}")
+            return "配置失败"
+        job.configured()
+        log("配置完成，开始构建...")
+    job.begin_build()
+    code = run_command(job.build_args(), job.root, log, observe=job.timeline.observe_lines, job=job)
+    job.end_build()
+    if job.cancelled:
+        log("构建已取消")
+        return "已取消"
+    if code != 0:
+        log(f"构建失败，返回码：{code}")
+        return "构建失败"
+    job.store_artifacts(log)
+    log("构建完成")
+    return "成功"
+
+
+def run_executable(job, log, stdin=None, timeout=None, max_output=MAX_OUTPUT_BYTES):
+    # 受管运行构建出的程序并记录 run 阶段，返回退出码；未找到可执行文件时返回 None。
+    # stdin 为 None 时输入为空，避免程序等待终端输入；输出写入运行记录目录，前若干行同时写入日志
+    exe_path = job.find_executable()
+    if not exe_path:
+        log("未找到可执行文件")
+        return None
+    log(f"运行：{exe_path}" + (f"，输入：{stdin}" if isinstance(stdin, str) else ""))
+    capture = RunCapture(exe_path, job.alg, stdin=stdin, timeout=timeout, max_output=max_output, log=log, job=job)
+    try:
+        with job.timeline.phase("run"):
+            record = capture.run()
+    except OSError as e:
+        # 没有执行权限、格式不对等
+        log(f"无法启动 {exe_path}：{e}")
+        return -1
+    log("运行已取消" if record["cancelled"] else f"进程结束，{format_record(record)}（运行记录 {record['id']}）")
+    return None if record["cancelled"] else record["exit_code"]
+
+
+def run_batch(root, algs, overrides, max_jobs, clean=False, log=print):
+    # 并发构建多个子项目，返回每个子项目的状态与耗时；每个子项目使用自己保存的参数，overrides 覆盖其中的项
+    max_jobs = max(1, max_jobs)
+    build_jobs = max(1, (os.cpu_count() or 1) // max_jobs)
+    lock = threading.Lock()
+
+    def one(alg):
+        start = time.perf_counter()
+
+        def job_log(line):
+            with lock:
+                log(f"[{alg}] {line}")
+        job = BuildJob(root, alg, algorithm_params(root, alg, overrides), clean=clean, jobs=build_jobs)
+        status = run_build(job, job_log)
+        return {"alg": alg, "status": status, "elapsed": time.perf_counter() - start}
+
+    with ThreadPoolExecutor(max_workers=max_jobs) as pool:
+        return list(pool.map(one, algs))
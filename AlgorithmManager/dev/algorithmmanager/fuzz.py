@@ -0,0 +1,230 @@
+import os
+import time
+import random
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .paths import cache_dir
+from .refsearch import KmpAutomaton, AhoCorasick, kmp_search
+
+# KMP 的差分模糊测试：生成随机与构造性的文本/模式串，把 C++ 程序（或动态库）的匹配位置
+# 与 Python 参考实现（refsearch）逐个比较，不一致的用例保存为 .in/.out，可直接放进 tests/ 回归
+
+KINDS = ("random", "adversarial", "periodic", "thue_morse", "fibonacci", "edge")
+
+# 文本不超过该长度时，额外用逐字节 KMP 与 Aho–Corasick 交叉检查参考实现本身
+CROSS_CHECK_SIZE = 20000
+
+# 程序按行读入，生成的文本与模式串不能包含换行符
+_LINE_BREAKS = (10, 13)
+
+
+def _substring(text, rng, max_len=None):
+    if not text:
+        return b""
+    m = rng.randint(1, min(len(text), max_len or len(text)))
+    start = rng.randrange(0, len(text) - m + 1)
+    return text[start:start + m]
+
+
+def _pattern_for(text, alphabet, rng):
+    # 大多取文本的子串（保证有匹配），少数随机生成（多半没有匹配）
+    if text and rng.random() < 0.8:
+        return _substring(text, rng, rng.choice((4, 16, 64, len(text))))
+    return bytes(rng.choices(alphabet, k=rng.randint(1, 16)))
+
+
+def thue_morse(n):
+    # t[i] 为 i 的二进制中 1 的个数的奇偶性，没有长度大于 2 的重复块，边界函数变化剧烈
+    return bytes(b"ab"[bin(i).count("1") & 1] for i in range(n))
+
+
+def fibonacci_word(n):
+    a, b = b"a", b"ab"
+    while len(b) < n:
+        a, b = b, b + a
+    return b[:n]
+
+
+def gen_case(kind, max_size, rng):
+    # 返回 (文本, 模式串)
+    n = rng.randint(0, max_size)
+    if kind == "random":
+        alphabet = b"abcd"[:rng.randint(1, 4)]
+        text = bytes(rng.choices(alphabet, k=n))
+        return text, _pattern_for(text, alphabet, rng)
+    if kind == "adversarial":
+        # aaaa…a 与 aa…ab：失配时沿边界链回退的次数最多
+        k = rng.randint(1, max(1, min(n, 1000)))
+        text = b"a" * n + (b"b" if rng.random() < 0.5 else b"")
+        pattern = b"a" * k + rng.choice((b"b", b"", b"ab"))
+        return text, pattern
+    if kind == "periodic":
+        unit = bytes(rng.choices(b"abc", k=rng.randint(1, 8)))
+        text = bytearray((unit * (n // len(unit) + 1))[:n])
+        if text and rng.random() < 0.5:
+            # 打破一处周期
+            text[rng.randrange(len(text))] = ord("z")
+        text = bytes(text)
+        return text, _pattern_for(text, b"abc", rng)
+    if kind == "thue_morse":
+        text = thue_morse(n)
+        return text, _pattern_for(text, b"ab", rng)
+    if kind == "fibonacci":
+        text = fibonacci_word(n)
+        return text, _pattern_for(text, b"ab", rng)
+    if kind == "edge":
+        # 极短文本、模式串不短于文本、高位字节（UTF-8 多字节字符）
+        pool = [c for c in rng.choice((range(128, 256), range(1, 256))) if c not in _LINE_BREAKS]
+        alphabet = bytes(rng.sample(pool, 3))
+        text = bytes(rng.choices(alphabet[:rng.randint(1, 3)], k=rng.randint(0, 4)))
+        choice = rng.random()
+        if choice < 0.3:
+            return text, text
+        if choice < 0.6:
+            return text, text + bytes(rng.choices(alphabet, k=rng.randint(1, 3)))
+        return text, _pattern_for(text, alphabet, rng)
+    raise ValueError(f"未知的用例类型：{kind}（可选：{'、'.join(KINDS)}）")
+
+
+def case_input(text, pattern):
+    return text + b"\n" + pattern + b"\n"
+
+
+def expected_output(positions):
+    return f"{len(positions)}\n{' '.join(map(str, positions))}\n".encode("ascii")
+
+
+def reference(text, pattern):
+    # 参考答案；小规模时用三种实现互相校验，参考实现本身出错时抛出异常
+    positions = KmpAutomaton(pattern).search(text)
+    if len(text) <= CROSS_CHECK_SIZE:
+        if kmp_search(text, pattern) != positions:
+            raise RuntimeError("参考实现不一致：DFA 与前缀函数的结果不同")
+        if pattern and [s for s, _ in AhoCorasick([pattern]).search(text)] != positions:
+            raise RuntimeError("参考实现不一致：DFA 与 Aho–Corasick 的结果不同")
+    return positions
+
+
+def parse_output(data):
+    # 第一行匹配次数，第二行所有匹配位置
+    tokens = data.split()
+    if not tokens:
+        raise ValueError("没有输出")
+    count = int(tokens[0])
+    positions = [int(t) for t in tokens[1:]]
+    if count != len(positions):
+        raise ValueError(f"输出的匹配次数 {count} 与位置个数 {len(positions)} 不符")
+    return positions
+
+
+def exe_runner(exe, timeout=10.0):
+    # 每个用例启动一次程序，输入走 stdin
+    def run(text, pattern):
+        try:
+            proc = subprocess.run([exe], input=case_input(text, pattern), stdout=subprocess.PIPE,
+                                  stderr=subprocess.PIPE, timeout=timeout, cwd=os.path.dirname(exe))
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"超过 {timeout:g}s 未结束")
+        if proc.returncode != 0:
+            tail = proc.stderr[-200:].decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"返回码 {proc.returncode}" + (f"：{tail}" if tail else ""))
+        try:
+            return parse_output(proc.stdout)
+        except ValueError as e:
+            raise RuntimeError(f"输出格式错误：{e}")
+    return run
+
+
+def library_runner(lib):
+    # 通过 ctypes 在进程内调用动态库，省去进程启动
+    def run(text, pattern):
+        return [int(p) for p in lib.search(text, pattern)]
+    return run
+
+
+def _first_difference(want, got):
+    for i, (w, g) in enumerate(zip(want, got)):
+        if w != g:
+            return f"第 {i + 1} 个匹配位置不同：期望 {w}，实际 {g}"
+    return f"匹配次数不同：期望 {len(want)}，实际 {len(got)}"
+
+
+def check_case(run, text, pattern):
+    # 一致返回 (参考答案, None)，否则返回 (参考答案, 差异说明)
+    want = reference(text, pattern)
+    try:
+        got = run(text, pattern)
+    except RuntimeError as e:
+        return want, str(e)
+    return want, None if got == want else _first_difference(want, got)
+
+
+def default_failure_dir(alg):
+    return cache_dir("fuzz", alg)
+
+
+def save_failure(out_dir, name, text, pattern, expected, detail):
+    # 写成测试运行器可直接使用的 名称.in / 名称.out，差异说明另存为 名称.txt
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, name)
+    with open(base + ".in", "wb") as f:
+        f.write(case_input(text, pattern))
+    with open(base + ".out", "wb") as f:
+        f.write(expected_output(expected))
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write(detail + "\n")
+    return base + ".in"
+
+
+def run_fuzz(run, iterations, max_size=1000, seed=0, kinds=KINDS, jobs=None, out_dir=None, fail_fast=False, log=print):
+    # 第 i 个用例的随机数种子为 "<seed>-<i>"，可单独复现；返回统计与失败用例列表
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    start = time.perf_counter()
+
+    def one(i):
+        # 只有失败的用例保留输入与参考答案，通过的用例返回后即可释放
+        rng = random.Random(f"{seed}-{i}")
+        kind = kinds[i % len(kinds)]
+        text, pattern = gen_case(kind, max_size, rng)
+        want, detail = check_case(run, text, pattern)
+        return i, kind, None if detail is None else (text, pattern, want, detail)
+
+    failures, done = [], 0
+    # 按序号依次提交，同时最多保留 jobs*4 个未取结果的用例，大输入时内存不随用例数增长
+    window, pending, next_i = jobs * 4, deque(), 0
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or next_i < iterations:
+            while next_i < iterations and len(pending) < window:
+                pending.append(pool.submit(one, next_i))
+                next_i += 1
+            i, kind, failed = pending.popleft().result()
+            done += 1
+            if failed is not None:
+                text, pattern, want, detail = failed
+                name = f"fuzz_{kind}_{seed}_{i}"
+                failure = {"name": name, "kind": kind, "index": i, "detail": detail,
+                           "text_len": len(text), "pattern_len": len(pattern)}
+                if out_dir:
+                    failure["path"] = save_failure(out_dir, name, text, pattern, want, detail)
+                failures.append(failure)
+                log(f"失败 {name}（文本 {len(text)} 字节，模式串 {len(pattern)} 字节）：{detail}")
+                del failed, text, pattern, want
+                if fail_fast:
+                    for f in pending:
+                        f.cancel()
+                    break
+            if done % 1000 == 0:
+                log(f"已完成 {done}/{iterations}")
+    return {"iterations": done, "failures": failures, "elapsed": time.perf_counter() - start}
+
+
+def format_report(result):
+    text = f"共 {result['iterations']} 个用例，失败 {len(result['failures'])} 个，用时 {result['elapsed']:.2f}s"
+    by_kind = {}
+    for f in result["failures"]:
+        by_kind[f["kind"]] = by_kind.get(f["kind"], 0) + 1
+    if by_kind:
+        text += "（" + "，".join(f"{k} {n}" for k, n in by_kind.items()) + "）"
+    return text
@@ -0,0 +1,93 @@
+import os
+import json
+import shutil
+import hashlib
+
+# 指纹文件保存在 build 目录中，记录上一次成功配置时的输入
+FINGERPRINT_FILE = ".am_fingerprint.json"
+
+# 参与指纹计算的参数（与 ParamsDialog.get_params 返回的键一致）
+CONFIG_PARAM_KEYS = (
+    "cmake_version_req", "project_name", "cxx_standard", "execs", "env",
+    "compiler_path", "preview_cmakelists", "preview_cmd", "cmake_path", "arch", "tu_profile",
+    "variant", "shared_lib",
+)
+
+
+def _digest(obj):
+    data = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _file_digest(path):
+    if not os.path.exists(path):
+        return ""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def compute_fingerprint(alg_dir, generator, arch, compiler, build_type, params):
+    # 工具链部分：生成器/架构/编译器变化时 CMake 不允许复用旧缓存
+    toolchain = {"generator": generator, "arch": arch, "compiler": compiler}
+    # 其余配置输入：构建类型、CMakeLists.txt 内容以及对话框参数
+    inputs = {
+        "build_type": build_type,
+        "cmakelists": _file_digest(os.path.join(alg_dir, "CMakeLists.txt")),
+        "params": {k: params.get(k) for k in CONFIG_PARAM_KEYS},
+    }
+    return {"toolchain": _digest(toolchain), "inputs": _digest(inputs)}
+
+
+def load_fingerprint(build_dir):
+    path = os.path.join(build_dir, FINGERPRINT_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_fingerprint(build_dir, fingerprint):
+    path = os.path.join(build_dir, FINGERPRINT_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fingerprint, f)
+
+
+def clear_fingerprint(build_dir):
+    path = os.path.join(build_dir, FINGERPRINT_FILE)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _reset_cmake_cache(build_dir):
+    # 只删除 CMake 缓存，保留已编译的目标文件
+    cache = os.path.join(build_dir, "CMakeCache.txt")
+    if os.path.exists(cache):
+        os.remove(cache)
+    files = os.path.join(build_dir, "CMakeFiles")
+    if os.path.isdir(files):
+        shutil.rmtree(files, ignore_errors=True)
+
+
+def prepare_build_dir(build_dir, fingerprint, clean=False):
+    # 准备 build 目录，返回需要重新配置的原因；返回 None 表示可直接构建
+    if clean and os.path.exists(build_dir):
+        shutil.rmtree(build_dir)
+    os.makedirs(build_dir, exist_ok=True)
+    old = load_fingerprint(build_dir)
+    has_cache = os.path.exists(os.path.join(build_dir, "CMakeCache.txt"))
+    if clean:
+        reason = "清理重建"
+    elif old is None or not has_cache:
+        reason = "首次配置"
+    elif old.get("toolchain") != fingerprint["toolchain"]:
+        reason = "工具链变更"
+    elif old.get("inputs") != fingerprint["inputs"]:
+        reason = "配置输入变更"
+    else:
+        return None
+    # 先删除旧指纹，避免配置失败后被误判为最新
+    clear_fingerprint(build_dir)
+    if reason in ("首次配置", "工具链变更"):
+        _reset_cmake_cache(build_dir)
+    return reason
@@ -0,0 +1,116 @@
+import os
+import time
+import codecs
+import threading
+from collections import deque
+
+from .paths import cache_dir
+
+# 保留的历史日志文件个数
+KEEP_LOG_FILES = 20
+
+
+# 单个输出流的按行解码器：完整的行先按 UTF-8 解码，解码失败的行单独按 GBK 解码，
+# 混合输出（如 MSVC 的 GBK 诊断后接 UTF-8 的程序输出）只影响出错的那一行；
+# 未结束的行（可能截断在多字节字符中间）留到下一次。两种编码的多字节字符都不含换行字节，可以先按字节分行
+class StreamDecoder:
+    def __init__(self, encoding="utf-8", fallback="gbk"):
+        self._encoding = encoding
+        self._fallback = fallback or encoding
+        self._partial = b""
+
+    def _decode_line(self, line):
+        try:
+            return line.decode(self._encoding)
+        except UnicodeDecodeError:
+            return line.decode(self._fallback, errors="replace")
+
+    def _decode_lines(self, data):
+        # 整块都是合法 UTF-8 时一次解码，否则逐行解码
+        try:
+            lines = data.decode(self._encoding).split("\n")
+        except UnicodeDecodeError:
+            lines = [self._decode_line(line) for line in data.split(b"\n")]
+        return [line.rstrip("\r") for line in lines]
+
+    def feed(self, data):
+        # 返回已完整的行，未结束的行留到下一次
+        data = self._partial + data
+        end = data.rfind(b"\n")
+        if end < 0:
+            self._partial = data
+            return []
+        self._partial = data[end + 1:]
+        return self._decode_lines(data[:end])
+
+    def take_partial(self, limit):
+        # 未结束的行超过 limit 字节时整体取出并清空，避免没有换行的输出让缓冲无限增长；否则返回 None
+        if len(self._partial) <= limit:
+            return None
+        data, self._partial = self._partial, b""
+        return self._decode_line(data)
+
+    def finish(self):
+        # 流结束时取出剩余内容
+        data, self._partial = self._partial, b""
+        return self._decode_lines(data) if data else []
+
+
+def new_log_path():
+    # 每次会话写入一个新的日志文件，并清理过旧的文件
+    log_dir = cache_dir("logs")
+    names = sorted(n for n in os.listdir(log_dir) if n.endswith(".log"))
+    for name in names[:max(0, len(names) - KEEP_LOG_FILES + 1)]:
+        try:
+            os.remove(os.path.join(log_dir, name))
+        except OSError:
+            pass
+    return os.path.join(log_dir, time.strftime("session-%Y%m%d-%H%M%S.log"))
+
+
+# 有界日志缓冲：待显示的行放在环形队列中，界面来不及显示时丢弃最旧的行；
+# 完整日志同时写入磁盘文件
+class LogBuffer:
+    def __init__(self, max_lines=100000, spill_path=None):
+        self.max_lines = max_lines
+        self.pending = deque(maxlen=max_lines)
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.spill_path = spill_path
+        self.spill = open(spill_path, "a", encoding="utf-8", errors="replace") if spill_path else None
+
+    def append_lines(self, lines):
+        if not lines:
+            return
+        with self.lock:
+            overflow = len(self.pending) + len(lines) - self.max_lines
+            if overflow > 0:
+                self.dropped += overflow
+            self.pending.extend(lines)
+            if self.spill is not None:
+                self.spill.write("\n".join(lines) + "\n")
+
+    def append(self, text):
+        self.append_lines(text.split("\n"))
+
+    def take_pending(self):
+        # 取出待显示的行及丢弃的行数
+        with self.lock:
+            lines = list(self.pending)
+            dropped = self.dropped
+            self.pending.clear()
+            self.dropped = 0
+            if self.spill is not None:
+                self.spill.flush()
+        return lines, dropped
+
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+            self.dropped = 0
+
+    def close(self):
+        with self.lock:
+            if self.spill is not None:
+                self.spill.close()
+                self.spill = None
@@ -0,0 +1,210 @@
+import os
+import ctypes
+import operator
+from array import array
+
+from .engine import project_root, library_file_name
+
+# 通过 ctypes 在进程内调用算法子项目导出的 C 接口（构建时打开 BUILD_SHARED_API），
+# 省去每次启动进程与读写 stdin/stdout 的开销。
+# 输入按连续内存传递，bytes、bytearray、memoryview、array 与 NumPy 数组都直接取地址，不做复制。
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_c_int64_p = ctypes.POINTER(ctypes.c_int64)
+
+
+def byte_buffer(obj):
+    # 返回 (地址, 字节数, 需在调用期间保持存活的对象)
+    if obj is None:
+        return None, 0, None
+    if isinstance(obj, str):
+        # str 必须先编码，这是唯一会复制的输入类型
+        obj = obj.encode("utf-8")
+    if isinstance(obj, bytes):
+        # bytes 不可变，c_char_p 直接指向其内部存储
+        ptr = ctypes.c_char_p(obj)
+        return ctypes.cast(ptr, ctypes.c_void_p).value, len(obj), (obj, ptr)
+    if np is not None and isinstance(obj, np.ndarray):
+        if not obj.flags.c_contiguous:
+            raise ValueError("NumPy 数组必须是 C 连续的")
+        return obj.__array_interface__["data"][0], obj.nbytes, obj
+    view = memoryview(obj)
+    if not view.contiguous:
+        raise ValueError("缓冲区必须是连续内存")
+    if not view.readonly:
+        holder = (ctypes.c_char * view.nbytes).from_buffer(view)
+        return ctypes.addressof(holder), view.nbytes, (view, holder)
+    if np is not None:
+        # 只读缓冲区（如 bytes 的切片视图）借助 NumPy 取地址，同样不复制
+        arr = np.frombuffer(view, dtype=np.uint8)
+        return arr.__array_interface__["data"][0], view.nbytes, (view, arr)
+    data = bytes(view)
+    return byte_buffer(data)
+
+
+def int64_buffer(obj, writable=False):
+    # int64 数组（偏移、计数、位置）：array('q')、NumPy int64 数组或其他 8 字节整数缓冲区；列表会先转换
+    if obj is None:
+        return None, 0, None
+    if isinstance(obj, (list, tuple, range)):
+        obj = array("q", obj)
+    if np is not None and isinstance(obj, np.ndarray):
+        if obj.dtype != np.int64 or not obj.flags.c_contiguous:
+            raise ValueError("需要 C 连续的 int64 NumPy 数组")
+        if writable and not obj.flags.writeable:
+            raise ValueError("输出数组必须可写")
+        return obj.__array_interface__["data"][0], obj.size, obj
+    view = memoryview(obj)
+    if view.itemsize != 8 or view.format not in ("q", "l", "<q", "=q"):
+        raise ValueError(f"需要 int64 缓冲区，实际格式为 {view.format!r}")
+    if writable and view.readonly:
+        raise ValueError("输出缓冲区必须可写")
+    addr, _, keep = byte_buffer(view)
+    return addr, view.nbytes // 8, keep
+
+
+def check_offsets(offsets, size, name):
+    # 偏移数组直接交给 C 使用，越界会导致进程崩溃：必须从 0 开始、单调不减且不超过缓冲区长度
+    if isinstance(offsets, (list, tuple, range)):
+        offsets = array("q", offsets)
+    view = memoryview(offsets).cast("B").cast("q")
+    if len(view) == 0:
+        raise ValueError(f"{name} 至少需要一个元素")
+    if view[0] != 0 or view[-1] > size:
+        raise ValueError(f"{name} 必须从 0 开始且不超过缓冲区长度 {size}")
+    if np is not None:
+        decreasing = bool((np.diff(np.frombuffer(view, dtype=np.int64)) < 0).any())
+    else:
+        decreasing = not all(map(operator.le, view, view[1:]))
+    if decreasing:
+        raise ValueError(f"{name} 必须单调不减")
+
+
+def new_int64_array(n):
+    # 有 NumPy 时返回 NumPy 数组，否则返回 array('q')
+    if np is not None:
+        return np.zeros(n, dtype=np.int64)
+    return array("q", bytes(8 * n))
+
+
+def pack(items):
+    # 把多个字符串首尾相接放进一块连续内存，返回 (缓冲区, 偏移数组)；打包一次后可反复调用批量接口
+    items = [s.encode("utf-8") if isinstance(s, str) else bytes(s) for s in items]
+    offsets = array("q", [0])
+    for s in items:
+        offsets.append(offsets[-1] + len(s))
+    return b"".join(items), offsets
+
+
+def find_library(alg, root=None, build_type="Release", build_dir=None):
+    # 在 build 目录中查找动态库，找不到返回 None
+    build_dir = build_dir or os.path.join(root or project_root(), alg, "build")
+    name = library_file_name(alg)
+    for path in (os.path.join(build_dir, build_type, name), os.path.join(build_dir, name)):
+        if os.path.isfile(path):
+            return path
+    for dirpath, dirnames, filenames in os.walk(build_dir):
+        dirnames[:] = [d for d in dirnames if d != "CMakeFiles"]
+        if name in filenames:
+            return os.path.join(dirpath, name)
+    return None
+
+
+# 01_KMP 的 C 接口（见 01_KMP/capi.cpp）
+class KmpLibrary:
+    ABI_VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.lib = ctypes.CDLL(path)
+        version = self.lib.kmp_abi_version()
+        if version != self.ABI_VERSION:
+            raise RuntimeError(f"{path} 的接口版本为 {version}，需要 {self.ABI_VERSION}，请重新构建")
+        self.lib.kmp_search.restype = ctypes.c_int64
+        self.lib.kmp_search.argtypes = [ctypes.c_void_p, ctypes.c_int64, ctypes.c_void_p, ctypes.c_int64,
+                                        ctypes.c_void_p, ctypes.c_int64]
+        self.lib.kmp_search_batch.restype = ctypes.c_int64
+        self.lib.kmp_search_batch.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int64,
+                                              ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int64,
+                                              ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int64]
+
+    def count(self, text, pattern):
+        t, n, _t = byte_buffer(text)
+        p, m, _p = byte_buffer(pattern)
+        return self.lib.kmp_search(t, n, p, m, None, 0)
+
+    def search(self, text, pattern, capacity=1024):
+        # 返回所有匹配位置；位置数超过 capacity 时按实际数量再调用一次
+        t, n, _t = byte_buffer(text)
+        p, m, _p = byte_buffer(pattern)
+        out = new_int64_array(capacity)
+        o, _, _o = int64_buffer(out, writable=True)
+        total = self.lib.kmp_search(t, n, p, m, o, capacity)
+        if total > capacity:
+            out = new_int64_array(total)
+            o, _, _o = int64_buffer(out, writable=True)
+            self.lib.kmp_search(t, n, p, m, o, total)
+        return out[:total]
+
+    def _batch(self, texts, text_offsets, patterns, pattern_offsets, counts, positions, capacity):
+        t, n, _t = byte_buffer(texts)
+        to, nt, _to = int64_buffer(text_offsets)
+        check_offsets(text_offsets, n, "text_offsets")
+        p, m, _p = byte_buffer(patterns)
+        if pattern_offsets is None:
+            # 只有一个模式串：所有文本共用
+            pattern_offsets = array("q", [0, m])
+        po, npo, _po = int64_buffer(pattern_offsets)
+        check_offsets(pattern_offsets, m, "pattern_offsets")
+        c, nc, _c = int64_buffer(counts, writable=True)
+        if nc < nt - 1:
+            raise ValueError("counts 长度小于文本数")
+        pos, _, _pos = int64_buffer(positions, writable=True)
+        total = self.lib.kmp_search_batch(t, to, nt - 1, p, po, npo - 1, c, pos, capacity)
+        if total < 0:
+            raise ValueError("模式串数量必须为 1 或与文本数相同")
+        return total
+
+    def count_batch(self, texts, text_offsets, patterns, pattern_offsets=None, out=None):
+        # texts/patterns 为首尾相接的连续缓冲区（可用 pack 生成），返回每个文本的匹配次数
+        out = out if out is not None else new_int64_array(max(len(text_offsets) - 1, 0))
+        self._batch(texts, text_offsets, patterns, pattern_offsets, out, None, 0)
+        return out
+
+    def search_batch(self, texts, text_offsets, patterns, pattern_offsets=None, capacity=None):
+        # 返回 (每个文本的匹配次数, 按文本顺序连续存放的匹配位置)
+        counts = new_int64_array(max(len(text_offsets) - 1, 0))
+        capacity = capacity or 4096
+        positions = new_int64_array(capacity)
+        total = self._batch(texts, text_offsets, patterns, pattern_offsets, counts, positions, capacity)
+        if total > capacity:
+            positions = new_int64_array(total)
+            self._batch(texts, text_offsets, patterns, pattern_offsets, counts, positions, total)
+        return counts, positions[:total]
+
+
+# 算法名（去掉序号、小写） -> 接口封装类
+BINDINGS = {
+    "kmp": KmpLibrary,
+}
+
+_loaded = {}
+
+
+def load(alg, root=None, build_type="Release", path=None):
+    # 加载算法的动态库，同一路径只加载一次
+    name = (alg.split("_", 1)[1] if "_" in alg else alg).lower()
+    cls = BINDINGS.get(name)
+    if cls is None:
+        raise KeyError(f"{alg} 没有 C 接口封装")
+    path = path or find_library(alg, root, build_type)
+    if not path:
+        raise FileNotFoundError(f"未找到 {library_file_name(alg)}，请先构建动态库（build {alg} --shared）")
+    path = os.path.abspath(path)
+    if path not in _loaded:
+        _loaded[path] = cls(path)
+    return _loaded[path]
@@ -0,0 +1,45 @@
+import os
+import sys
+from contextlib import contextmanager
+
+if sys.platform.startswith("win"):
+    import msvcrt
+else:
+    import fcntl
+
+
+def cache_dir(*parts):
+    # 用户级缓存目录：Windows 使用 %LOCALAPPDATA%，其他系统使用 XDG 缓存目录
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, "AlgorithmManager", *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@contextmanager
+def file_lock(path):
+    # 进程间互斥：缓存目录中的文件由图形界面、命令行与守护进程共用
+    with open(path, "a+b") as f:
+        if sys.platform.startswith("win"):
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK 最多重试 10 秒，仍未拿到时继续等待
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,269 @@
+import os
+import sys
+import signal
+import time
+import threading
+import subprocess
+from collections import deque
+
+# 运行外部程序并统计墙钟时间、CPU 时间与峰值内存
+
+# 最近这么多次采样的 VmHWM 相同，才认为采样已经覆盖了峰值
+SETTLED_SAMPLES = 3
+
+if sys.platform.startswith("win"):
+    import ctypes
+    from ctypes import wintypes
+
+    class _FILETIME(ctypes.Structure):
+        _fields_ = [("low", wintypes.DWORD), ("high", wintypes.DWORD)]
+
+    class _PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    def _filetime_seconds(ft):
+        return ((ft.high << 32) | ft.low) / 1e7
+
+    def _windows_usage(handle):
+        creation, exit_, kernel, user = _FILETIME(), _FILETIME(), _FILETIME(), _FILETIME()
+        ctypes.windll.kernel32.GetProcessTimes(int(handle), ctypes.byref(creation), ctypes.byref(exit_),
+                                               ctypes.byref(kernel), ctypes.byref(user))
+        counters = _PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.kernel32.K32GetProcessMemoryInfo(int(handle), ctypes.byref(counters), counters.cb)
+        return _filetime_seconds(user), _filetime_seconds(kernel), counters.PeakWorkingSetSize
+
+
+def _maxrss_bytes(ru_maxrss):
+    # Linux 的 ru_maxrss 单位是 KB，macOS 是字节
+    return ru_maxrss if sys.platform == "darwin" else ru_maxrss * 1024
+
+
+def _linux_hwm(pid):
+    # exec 之后的内存峰值（VmHWM），不包含 fork 出来的 Python 进程占用
+    try:
+        with open(f"/proc/{pid}/status", "rb") as f:
+            for line in f:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _linux_identity(pid):
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return os.readlink(f"/proc/{pid}/exe"), f.read()
+    except OSError:
+        return None
+
+
+class _HwmSampler(threading.Thread):
+    # ru_maxrss 会把 exec 前子进程（即 Python 自身）的内存算进去，Linux 上改为定期采样 VmHWM；
+    # 设置了 limit 时，峰值超过上限立即调用 on_exceed（结束进程）
+    def __init__(self, read, interval=0.005, limit=None, on_exceed=None):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.read = read
+        self.interval = interval
+        self.limit = limit
+        self.on_exceed = on_exceed
+        self.exceeded = False
+        self.peak = None
+        self.recent = deque(maxlen=SETTLED_SAMPLES)
+        self.stopped = threading.Event()
+        self.sample()
+
+    def sample(self):
+        try:
+            value = self.read()
+        except OSError:
+            value = None
+        if value is not None:
+            self.recent.append(value)
+            if self.peak is None or value > self.peak:
+                self.peak = value
+        if self.limit and self.peak and self.peak > self.limit and not self.exceeded:
+            self.exceeded = True
+            if self.on_exceed:
+                self.on_exceed()
+
+    def settled(self):
+        # 最后几次采样的峰值不再增长；仍在增长（如程序还在加载动态库）时之后的峰值可能没采到
+        return len(self.recent) == self.recent.maxlen and len(set(self.recent)) == 1
+
+    def run(self):
+        # 前 20ms 加密采样，尽量覆盖运行时间很短的程序
+        start = time.perf_counter()
+        while not self.stopped.wait(self.interval if time.perf_counter() - start > 0.02 else 0.0005):
+            self.sample()
+
+
+def _rss_reader(proc):
+    # 返回读取子进程当前内存峰值的函数，平台不支持时返回 None
+    if sys.platform.startswith("linux"):
+        parent = _linux_identity("self")
+
+        def read():
+            # Popen 可能在 exec 之前就返回，此时读到的是 fork 出来的 Python 进程，忽略。
+            # 可执行文件与命令行都和本进程相同才算 exec 之前，子进程也是 Python 程序时照常采样
+            identity = _linux_identity(proc.pid)
+            if identity is None or identity == parent:
+                return None
+            return _linux_hwm(proc.pid)
+        return read
+    if sys.platform.startswith("win"):
+        return lambda: _windows_usage(proc._handle)[2]
+    return None
+
+
+def format_rss(rss):
+    return "未知" if rss is None else f"{rss / 1048576:.1f}MB"
+
+
+def kill_process(proc):
+    # POSIX 上不用 Popen.kill：它会先 poll，可能抢在 wait4 之前回收进程，导致拿不到资源统计
+    if sys.platform.startswith("win"):
+        try:
+            proc.kill()
+        except OSError:
+            pass
+    elif proc.returncode is None:
+        try:
+            os.kill(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def _child_pids():
+    # 父进程号 -> 子进程号列表；Linux 读 /proc，其他 POSIX 系统用 ps
+    children = {}
+    if os.path.isdir("/proc/self"):
+        for name in os.listdir("/proc"):
+            if not name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{name}/stat", "rb") as f:
+                    stat = f.read()
+            except OSError:
+                continue
+            # 第 2 个字段（进程名）可能含空格，从最后一个 ) 之后开始解析
+            ppid = int(stat[stat.rfind(b")") + 2:].split()[1])
+            children.setdefault(ppid, []).append(int(name))
+        return children
+    try:
+        out = subprocess.run(["ps", "-A", "-o", "pid=,ppid="], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+    except OSError:
+        return children
+    for line in out.split(b"\n"):
+        fields = line.split()
+        if len(fields) == 2:
+            children.setdefault(int(fields[1]), []).append(int(fields[0]))
+    return children
+
+
+def kill_tree(pid):
+    # 结束进程及其全部子孙进程（如 cmake --build 启动的 ninja 与编译器）
+    if sys.platform.startswith("win"):
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    children = _child_pids()
+    pids, stack = [], [pid]
+    while stack:
+        p = stack.pop()
+        pids.append(p)
+        stack.extend(children.get(p, []))
+    # 先停住整棵树，避免父进程在结束前又启动新的子进程
+    for sig in (signal.SIGSTOP, signal.SIGKILL):
+        for p in pids:
+            try:
+                os.kill(p, sig)
+            except OSError:
+                pass
+
+
+def wait_measured(proc, start, timeout=None, rss_limit=None):
+    # 等待已启动的进程结束并返回统计信息；超时或内存峰值超过 rss_limit（字节）会结束进程
+    timed_out = threading.Event()
+
+    def kill():
+        kill_process(proc)
+
+    def on_timeout():
+        timed_out.set()
+        kill()
+    sampler = None
+    read = _rss_reader(proc)
+    # Linux 总是采样（ru_maxrss 不准）；Windows 只在需要限制内存时采样
+    if read is not None and (rss_limit or sys.platform.startswith("linux")):
+        sampler = _HwmSampler(read, limit=rss_limit, on_exceed=kill)
+        sampler.start()
+    timer = threading.Timer(timeout, on_timeout) if timeout else None
+    if timer is not None:
+        timer.daemon = True
+        timer.start()
+    try:
+        if sys.platform.startswith("win"):
+            proc.wait()
+            wall = time.perf_counter() - start
+            user, system, rss = _windows_usage(proc._handle)
+            code = proc.returncode
+        else:
+            try:
+                _, status, usage = os.wait4(proc.pid, 0)
+            except ChildProcessError:
+                # 已被其他地方（如 Popen.poll）回收，只能拿到返回码
+                proc.wait()
+                wall = time.perf_counter() - start
+                code, user, system, rss = proc.returncode, 0.0, 0.0, 0
+            else:
+                wall = time.perf_counter() - start
+                code = os.waitstatus_to_exitcode(status)
+                # 已由 wait4 回收，告知 Popen 不要再等待
+                proc.returncode = code
+                user, system, rss = usage.ru_utime, usage.ru_stime, _maxrss_bytes(usage.ru_maxrss)
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if sampler is not None:
+            sampler.stopped.set()
+    exact = True
+    if sys.platform.startswith("linux"):
+        # Linux 的 ru_maxrss 含 exec 前（fork 出来的 Python 进程）的内存，这部分不超过本进程的 VmHWM。
+        # ru_maxrss 超过它时就是子进程自身的峰值；否则改用 exec 之后的采样，
+        # 采样可能漏掉峰值（程序结束前峰值仍在增长或没有采到）时峰值未知（None）
+        own = _linux_hwm("self")
+        if not (rss and own is not None and rss > own):
+            exact = False
+            rss = sampler.peak if sampler is not None and sampler.settled() else None
+    # 超限只按子进程自身的内存判定，不会因 Python 父进程的内存误判为 MLE
+    exceeded = bool(rss_limit) and (sampler is not None and sampler.exceeded or
+                                    exact and rss is not None and rss > rss_limit)
+    return {
+        "exit_code": code,
+        "wall": wall,
+        "cpu_user": user,
+        "cpu_sys": system,
+        "cpu": user + system,
+        "peak_rss": rss,
+        "timed_out": timed_out.is_set(),
+        "rss_exceeded": exceeded,
+    }
+
+
+def run_measured(args, stdin=None, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=None, timeout=None, rss_limit=None):
+    # stdin/stdout/stderr 可以是文件对象，数据不经过 Python 内存
+    start = time.perf_counter()
+    proc = subprocess.Popen(args, stdin=stdin, stdout=stdout, stderr=stderr, cwd=cwd)
+    return wait_measured(proc, start, timeout, rss_limit)
@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from .paths import cache_dir, file_lock
+
+# 项目索引：每个 序号_算法名 目录一条记录（源文件列表与哈希、上次使用的参数、上次构建与性能测试结果），
+# 持久化到用户缓存目录。目录与文件的修改时间未变时直接使用记录，启动和打开对话框不再扫描整个项目
+
+INDEX_VERSION = 1
+
+# 算法目录与 src/ 下的源文件、头文件以及 CMakeLists.txt
+SOURCE_SUBDIRS = ("", "src")
+SOURCE_EXTS = (".cpp", ".cc", ".cxx", ".c", ".h", ".hpp")
+
+# 属于动态库（C 接口）的源文件
+CAPI_SOURCES = ("capi.cpp", "src/capi.cpp")
+
+
+def is_algorithm_dir(root, name):
+    # 目录名以序号_算法名格式
+    return name and name[0].isdigit() and "_" in name and os.path.isdir(os.path.join(root, name))
+
+
+def scan_algorithms(root):
+    return sorted(name for name in os.listdir(root) if is_algorithm_dir(root, name))
+
+
+def source_dirs(alg_dir):
+    dirs = (os.path.join(alg_dir, sub) if sub else alg_dir for sub in SOURCE_SUBDIRS)
+    return [d for d in dirs if os.path.isdir(d)]
+
+
+def source_files(alg_dir):
+    files = []
+    for d in source_dirs(alg_dir):
+        for entry in os.scandir(d):
+            if entry.is_file() and (entry.name == "CMakeLists.txt" or entry.name.endswith(SOURCE_EXTS)):
+                files.append(entry.path)
+    return sorted(files)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def exec_candidates(sources):
+    # 可作为可执行程序的源文件：根目录 main.cpp 与 src 目录下的 .cpp（capi.cpp 除外）
+    return [rel for rel in sources
+            if rel == "main.cpp" or (rel.startswith("src/") and rel.endswith(".cpp") and rel not in CAPI_SOURCES)]
+
+
+def capi_sources(sources):
+    return [rel for rel in CAPI_SOURCES if rel in sources]
+
+
+class ProjectIndex:
+    def __init__(self, root, path=None):
+        self.root = os.path.abspath(root)
+        key = hashlib.sha1(os.path.normcase(self.root).encode("utf-8")).hexdigest()[:12]
+        self.path = path or os.path.join(cache_dir("index"), f"{key}.json")
+        self.lock = threading.RLock()
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("root") == self.root:
+                return data
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {"version": INDEX_VERSION, "root": self.root, "root_mtime": None, "algorithms": {}}
+
+    def reload(self):
+        # 常驻进程（构建守护进程）在处理请求前重新读取，使用其他进程写入的参数与记录
+        with self.lock:
+            self.data = self._load()
+
+    def _update(self, change):
+        # 在进程间锁内重新读取磁盘上的索引，只应用本次改动后写回，其他进程写入的参数与记录不会被本进程的旧副本覆盖。
+        # change(data) 不能再调用 _update
+        with self.lock, file_lock(f"{self.path}.lock"):
+            self.data = self._load()
+            result = change(self.data)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            return result
+
+    def _entry_in(self, data, alg):
+        return data["algorithms"].setdefault(alg, self._new_entry())
+
+    def algorithms(self):
+        # 根目录的修改时间只在增删子目录时变化，未变化时直接返回记录的列表
+        with self.lock:
+            mtime = _mtime(self.root)
+            if mtime is not None and mtime == self.data["root_mtime"]:
+                return sorted(self.data["algorithms"])
+
+            def change(data):
+                names = scan_algorithms(self.root)
+                entries = data["algorithms"]
+                for name in set(entries) - set(names):
+                    del entries[name]
+                for name in names:
+                    entries.setdefault(name, self._new_entry())
+                data["root_mtime"] = mtime
+                return names
+            return self._update(change)
+
+    def _new_entry(self):
+        return {"dir_mtimes": {}, "sources": {}, "params": None, "build": None, "bench": None}
+
+    def entry(self, alg, refresh=True):
+        # 返回算法的记录；refresh 时按目录修改时间更新源文件列表，按文件修改时间与大小更新哈希
+        with self.lock:
+            entry = self._entry_in(self.data, alg)
+            if refresh and self._refresh(alg, entry):
+                # 源文件信息来自文件系统，直接写入磁盘上的记录，该记录的其他字段以磁盘上的为准
+                sources = {"dir_mtimes": entry["dir_mtimes"], "sources": entry["sources"]}
+
+                def change(data):
+                    merged = self._entry_in(data, alg)
+                    merged.update(sources)
+                    return merged
+                entry = self._update(change)
+            return entry
+
+    def _refresh(self, alg, entry):
+        alg_dir = os.path.join(self.root, alg)
+        changed = False
+        # 子目录不存在时记为 None，之后新建该目录也能发现
+        dir_mtimes = {sub: _mtime(os.path.join(alg_dir, sub) if sub else alg_dir) for sub in SOURCE_SUBDIRS}
+        if dir_mtimes != entry["dir_mtimes"]:
+            # 增删过文件：重新列出源文件，已有文件的哈希留给下面按修改时间判断
+            listed = [os.path.relpath(p, alg_dir).replace("\\", "/") for p in source_files(alg_dir)]
+            entry["sources"] = {rel: entry["sources"].get(rel) for rel in listed}
+            entry["dir_mtimes"] = dir_mtimes
+            changed = True
+        for rel, info in list(entry["sources"].items()):
+            path = os.path.join(alg_dir, rel)
+            try:
+                st = os.stat(path)
+            except OSError:
+                del entry["sources"][rel]
+                changed = True
+                continue
+            if info and info["mtime"] == st.st_mtime_ns and info["size"] == st.st_size:
+                continue
+            entry["sources"][rel] = {"mtime": st.st_mtime_ns, "size": st.st_size, "hash": _file_hash(path)}
+            changed = True
+        return changed
+
+    def sources(self, alg):
+        return list(self.entry(alg)["sources"])
+
+    def source_hash(self, alg):
+        # 全部源文件内容的组合哈希，源文件未改动时不变
+        h = hashlib.sha256()
+        for rel, info in sorted(self.entry(alg)["sources"].items()):
+            h.update(f"{rel}\0{info['hash']}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    def params(self, alg):
+        return self.entry(alg, refresh=False)["params"]
+
+    def set_params(self, alg, params):
+        params = dict(params)
+
+        def change(data):
+            self._entry_in(data, alg)["params"] = params
+        self._update(change)
+
+    def record_build(self, alg, status, elapsed, config, fingerprint=None):
+        build = {"status": status, "elapsed": elapsed, "finished": time.time(), "config": config,
+                 "fingerprint": fingerprint, "source_hash": self.source_hash(alg)}
+
+        def change(data):
+            self._entry_in(data, alg)["build"] = build
+        self._update(change)
+
+    def record_bench(self, alg, kind, path, summary):
+        # summary：各规模的墙钟时间中位数或各变体的加速比，完整结果在 path 指向的文件中
+        bench = {"kind": kind, "path": path, "finished": time.time(), "summary": summary}
+
+        def change(data):
+            self._entry_in(data, alg)["bench"] = bench
+        self._update(change)
+
+    def is_stale(self, alg):
+        # 源文件在上次构建后是否改动过
+        build = self.entry(alg, refresh=False)["build"]
+        return build is None or build.get("source_hash") != self.source_hash(alg)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(root):
+    # 每个项目根目录一个索引实例
+    root = os.path.abspath(root)
+    with _indexes_lock:
+        if root not in _indexes:
+            _indexes[root] = ProjectIndex(root)
+        return _indexes[root]
+
+
+def format_entry(alg, entry):
+    build, bench = entry.get("build"), entry.get("bench")
+    text = f"{alg:<24} {len(entry['sources']):>3} 个源文件"
+    if build:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(build["finished"]))
+        text += f"  上次构建：{build['status']} {build['elapsed']:.2f}s（{when}，{build['config']}）"
+    else:
+        text += "  未构建"
+    if bench:
+        text += f"  上次性能测试：{bench['kind']} {bench['summary']}"
+    return text
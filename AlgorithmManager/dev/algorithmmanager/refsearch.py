@@ -0,0 +1,282 @@
+import os
+import mmap
+from collections import deque
+
+# 字符串匹配的 Python 参考实现，用于与 C++ 版本做差分测试。
+# KMP 与 Aho–Corasick 都先展开成按字节跳转的 DFA：有 NumPy 时把文本切成互相重叠的若干段，
+# 各段的状态放在一个向量里同步推进（每步一次查表），没有 NumPy 时逐字节查表。
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 同时推进的段数上下限
+MAX_ROWS = 4096
+MIN_ROWS = 32
+# 文件搜索每次映射处理的字节数
+FILE_BLOCK = 16 * 1024 * 1024
+
+
+def _as_bytes(data):
+    return data.encode("utf-8") if isinstance(data, str) else data
+
+
+def prefix_function(pattern):
+    # pi[i] 为 pattern[0..i] 最长的相等真前缀与真后缀长度
+    pattern = _as_bytes(pattern)
+    pi = [0] * len(pattern)
+    k = 0
+    for i in range(1, len(pattern)):
+        while k > 0 and pattern[i] != pattern[k]:
+            k = pi[k - 1]
+        if pattern[i] == pattern[k]:
+            k += 1
+        pi[i] = k
+    return pi
+
+
+def kmp_search(text, pattern):
+    # 逐字节的 KMP，返回所有匹配的起始位置（可重叠）
+    text, pattern = _as_bytes(text), _as_bytes(pattern)
+    m = len(pattern)
+    if m == 0:
+        return []
+    pi = prefix_function(pattern)
+    result, k = [], 0
+    for i, c in enumerate(text):
+        while k > 0 and c != pattern[k]:
+            k = pi[k - 1]
+        if c == pattern[k]:
+            k += 1
+        if k == m:
+            result.append(i - m + 1)
+            k = pi[k - 1]
+    return result
+
+
+def _new_table(states):
+    if np is not None:
+        return np.zeros((states, 256), dtype=np.int32)
+    return [[0] * 256 for _ in range(states)]
+
+
+def _copy_row(table, dst, src):
+    # NumPy 的整行赋值本身就是复制
+    table[dst] = table[src] if np is not None else list(table[src])
+
+
+# 按字节跳转的自动机：table[状态][字节] -> 下一状态，accept[状态] 表示到达该状态时有匹配结束
+class _Automaton:
+    def __init__(self, table, accept, overlap):
+        self.states = len(table)
+        self.accept = accept
+        # 匹配跨越分段边界时需要的重叠字节数（最长模式串长度 - 1）
+        self.overlap = overlap
+        self._rows = None
+        if np is not None:
+            self.table = table.reshape(-1)
+            self.accept_mask = np.array(accept, dtype=bool)
+        else:
+            self._rows = table
+
+    def rows(self):
+        # 逐字节扫描用的嵌套列表（NumPy 标量查表很慢），按需生成
+        if self._rows is None:
+            self._rows = self.table.reshape(-1, 256).tolist()
+        return self._rows
+
+    def _scan_python(self, data, skip=0):
+        # 返回 [(结束位置, 状态)]，只保留结束位置 >= skip 的匹配
+        rows, accept = self.rows(), self.accept
+        state, hits = 0, []
+        for i, c in enumerate(data):
+            state = rows[state][c]
+            if accept[state] and i >= skip:
+                hits.append((i, state))
+        return hits
+
+    def _scan_numpy(self, buf, skip=0):
+        # buf 为一维 uint8 数组；切成 rows 段，每段向前多取 overlap 字节，各段从状态 0 开始同步推进。
+        # 只统计结束位置落在本段自身范围内的匹配，因此每个匹配恰好被统计一次
+        n, ov = len(buf), self.overlap
+        # 段数越多 Python 循环越少，但重叠部分的重复计算越多，这里让重复计算不超过文本长度
+        rows = min(MAX_ROWS, n // max(ov, 64))
+        if rows < MIN_ROWS:
+            # 段数太少时每步的数组运算开销大于收益，直接逐字节扫描
+            hits = self._scan_python(buf.tobytes(), skip)
+            return (np.array([e for e, _ in hits], dtype=np.int64),
+                    np.array([s for _, s in hits], dtype=np.int32))
+        seg = -(-n // rows)
+        starts = np.arange(rows, dtype=np.int64) * seg - ov
+        state = np.zeros(rows, dtype=np.int32)
+        table, accept = self.table, self.accept_mask
+        ends, found = [], []
+        for i in range(seg + ov):
+            idx = starts + i
+            valid = (idx >= 0) & (idx < n)
+            col = buf[np.clip(idx, 0, n - 1)]
+            state = np.where(valid, table[state * 256 + col], 0)
+            if i < ov:
+                continue
+            hit = np.flatnonzero(accept[state] & valid)
+            if hit.size:
+                ends.append(idx[hit])
+                found.append(state[hit])
+        if not ends:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+        ends, found = np.concatenate(ends), np.concatenate(found)
+        order = np.argsort(ends, kind="stable")
+        ends, found = ends[order], found[order]
+        keep = ends >= skip
+        return ends[keep], found[keep]
+
+    def scan(self, data, skip=0):
+        # 返回 (结束位置数组, 状态数组)；没有 NumPy 时返回列表
+        if np is not None:
+            buf = data if isinstance(data, np.ndarray) else np.frombuffer(_as_bytes(data), dtype=np.uint8)
+            return self._scan_numpy(buf, skip)
+        hits = self._scan_python(memoryview(_as_bytes(data)).cast("B"), skip)
+        return [e for e, _ in hits], [s for _, s in hits]
+
+    def scan_batch(self, texts):
+        # 批量输入：二维 uint8 数组（每行一个等长文本）或字节串列表（补齐后按行处理）。
+        # 每行一个状态，整批同步推进，返回每行的 (结束位置数组, 状态数组)
+        if np is None:
+            return [self.scan(t) for t in texts]
+        if isinstance(texts, np.ndarray):
+            batch, lengths = texts, np.full(len(texts), texts.shape[1] if texts.ndim == 2 else 0)
+        else:
+            texts = [_as_bytes(t) for t in texts]
+            lengths = np.array([len(t) for t in texts], dtype=np.int64)
+            batch = np.zeros((len(texts), int(lengths.max(initial=0))), dtype=np.uint8)
+            for r, t in enumerate(texts):
+                batch[r, :len(t)] = np.frombuffer(t, dtype=np.uint8)
+        state = np.zeros(len(batch), dtype=np.int32)
+        hit_rows, hit_ends, hit_states = [], [], []
+        for i in range(batch.shape[1] if batch.ndim == 2 else 0):
+            state = self.table[state * 256 + batch[:, i]]
+            hit = np.flatnonzero(self.accept_mask[state] & (lengths > i))
+            if hit.size:
+                hit_rows.append(hit)
+                hit_ends.append(np.full(hit.size, i, dtype=np.int64))
+                hit_states.append(state[hit])
+        if not hit_rows:
+            return [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)) for _ in range(len(batch))]
+        rows, ends, states = np.concatenate(hit_rows), np.concatenate(hit_ends), np.concatenate(hit_states)
+        return [(ends[rows == r], states[rows == r]) for r in range(len(batch))]
+
+
+class KmpAutomaton(_Automaton):
+    def __init__(self, pattern):
+        pattern = _as_bytes(pattern)
+        self.pattern = pattern
+        m = len(pattern)
+        table = _new_table(m + 1)
+        if m:
+            # 经典的 KMP DFA 构造：x 为读入 pattern[1..j-1] 后的状态（即最长真边界）
+            table[0][pattern[0]] = 1
+            x = 0
+            for j in range(1, m + 1):
+                _copy_row(table, j, x)
+                if j < m:
+                    table[j][pattern[j]] = j + 1
+                    x = int(table[x][pattern[j]])
+        accept = [False] * (m + 1)
+        if m:
+            accept[m] = True
+        super().__init__(table, accept, max(0, m - 1))
+
+    def search(self, text):
+        # 返回所有匹配的起始位置
+        if not self.pattern:
+            return []
+        return self.matches(*self.scan(text))
+
+    def search_batch(self, texts):
+        m = len(self.pattern)
+        if not m:
+            return [[] for _ in texts]
+        return [self.matches(e, s) for e, s in self.scan_batch(texts)]
+
+    def matches(self, ends, states):
+        # 结束位置 -> 起始位置
+        return [e - len(self.pattern) + 1 for e in (ends.tolist() if np is not None else ends)]
+
+
+class AhoCorasick(_Automaton):
+    def __init__(self, patterns):
+        self.patterns = [_as_bytes(p) for p in patterns]
+        goto = [{}]
+        out = [[]]
+        for index, p in enumerate(self.patterns):
+            if not p:
+                continue
+            s = 0
+            for c in p:
+                if c not in goto[s]:
+                    goto.append({})
+                    out.append([])
+                    goto[s][c] = len(goto) - 1
+                s = goto[s][c]
+            out[s].append(index)
+        # 按层次遍历展开成完整的 DFA：先复制失败状态的整行，再填入自己的转移；输出沿失败链合并
+        table = _new_table(len(goto))
+        fail = [0] * len(goto)
+        queue = deque()
+        for c, t in goto[0].items():
+            table[0][c] = t
+            queue.append(t)
+        while queue:
+            s = queue.popleft()
+            out[s] = out[s] + out[fail[s]]
+            _copy_row(table, s, fail[s])
+            for c, t in goto[s].items():
+                fail[t] = int(table[fail[s]][c])
+                table[s][c] = t
+                queue.append(t)
+        self.outputs = out
+        longest = max((len(p) for p in self.patterns), default=0)
+        super().__init__(table, [bool(o) for o in out], max(0, longest - 1))
+
+    def matches(self, ends, states):
+        # 展开为 (起始位置, 模式串序号)，按起始位置排序
+        if np is not None:
+            ends, states = ends.tolist(), states.tolist()
+        result = []
+        for e, s in zip(ends, states):
+            for index in self.outputs[s]:
+                result.append((e - len(self.patterns[index]) + 1, index))
+        result.sort()
+        return result
+
+    def search(self, text):
+        return self.matches(*self.scan(text))
+
+    def search_batch(self, texts):
+        return [self.matches(e, s) for e, s in self.scan_batch(texts)]
+
+
+def search_file(path, automaton, block_size=FILE_BLOCK):
+    # 用 mmap 分块扫描大文件，逐个产出匹配（KMP 为起始位置，Aho–Corasick 为 (起始位置, 序号)）；
+    # 相邻块重叠 overlap 字节，内存占用只与块大小有关
+    size = os.path.getsize(path)
+    if size == 0:
+        return
+    ov = automaton.overlap
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for block_start in range(0, size, block_size):
+            lo = max(0, block_start - ov)
+            hi = min(size, block_start + block_size)
+            if np is not None:
+                view = np.frombuffer(mm, dtype=np.uint8, count=hi - lo, offset=lo)
+                ends, states = automaton.scan(view, skip=block_start - lo)
+                # 释放对 mmap 的引用后再产出结果，否则无法关闭映射
+                del view
+            else:
+                ends, states = automaton.scan(mm[lo:hi], skip=block_start - lo)
+            for match in automaton.matches(ends, states):
+                if isinstance(match, tuple):
+                    yield (match[0] + lo, match[1])
+                else:
+                    yield match + lo
@@ -0,0 +1,270 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+import subprocess
+
+from .paths import cache_dir
+from .logpipe import StreamDecoder
+from .procstats import wait_measured, kill_tree, format_rss
+
+# 受管运行：启动算法程序，stdin 取自文件、字节串或生成器，stdout/stderr 写入磁盘文件（超过上限的部分丢弃），
+# 同时统计墙钟时间、CPU 时间、峰值内存与返回码，每次运行追加到该算法的运行记录
+
+# 每个输出流保存的最大字节数
+MAX_OUTPUT_BYTES = 256 * 1024 * 1024
+# 同时转发到日志的最大行数，其余只写入文件
+ECHO_LINES = 1000
+# 转发到日志的单行最大字符数；没有换行的超长输出按此截断，避免解码缓冲无限增长
+ECHO_LINE_CHARS = 4096
+# 每个算法保留输出文件的运行次数，更早的输出被删除（记录保留）
+KEEP_RUNS = 50
+# 查看输出时每页的字节数（按行对齐）
+PAGE_BYTES = 256 * 1024
+
+STREAMS = ("stdout", "stderr")
+
+_CHUNK = 1 << 16
+_history_lock = threading.Lock()
+
+
+def runs_dir(alg):
+    return cache_dir("runs", alg)
+
+
+def history_path(alg):
+    return os.path.join(runs_dir(alg), "history.jsonl")
+
+
+def _new_run_id():
+    return time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+
+
+def _open_stdin(stdin):
+    # 返回 (传给 Popen 的 stdin, 需要写入的数据块, 说明)；调用方负责关闭打开的文件
+    if stdin is None:
+        return subprocess.DEVNULL, None, "无"
+    if isinstance(stdin, str):
+        return open(stdin, "rb"), None, stdin
+    if isinstance(stdin, (bytes, bytearray)):
+        return subprocess.PIPE, [bytes(stdin)], f"{len(stdin)} 字节"
+    return subprocess.PIPE, stdin, "生成器"
+
+
+class RunCapture:
+    # stdin：None（空输入）、文件路径、bytes，或逐块产出 bytes 的可迭代对象（生成器，数据不必全部放在内存中）。
+    # 传入 job（engine.BuildJob）时可由 job.cancel() 结束进程
+    def __init__(self, exe, alg, args=(), cwd=None, stdin=None, timeout=None, max_output=MAX_OUTPUT_BYTES,
+                 echo_lines=ECHO_LINES, log=None, job=None):
+        self.exe = exe
+        self.alg = alg
+        self.args = list(args)
+        self.cwd = cwd or os.path.dirname(exe)
+        self.stdin = stdin
+        self.timeout = timeout
+        self.max_output = max_output
+        self.echo_lines = echo_lines
+        self.log = log
+        self.job = job
+        self.run_id = _new_run_id()
+        self.run_dir = os.path.join(runs_dir(alg), self.run_id)
+        self.cancelled = False
+        self.proc = None
+        self._echoed = 0
+        self._echo_lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled = True
+        proc = self.proc
+        if proc is not None and proc.poll() is None:
+            kill_tree(proc.pid)
+
+    def _echo(self, lines):
+        if self.log is None or not lines:
+            return
+        with self._echo_lock:
+            room = self.echo_lines - self._echoed
+            if room <= 0:
+                return
+            for line in lines[:room]:
+                self.log(line if len(line) <= ECHO_LINE_CHARS else line[:ECHO_LINE_CHARS] + " ……")
+            self._echoed += min(room, len(lines))
+            if self._echoed >= self.echo_lines:
+                self.log(f"…… 输出超过 {self.echo_lines} 行，其余只写入文件：{self.run_dir}")
+
+    def _drain(self, pipe, path, info):
+        # 读到 EOF 为止；超过上限后继续读取并丢弃，避免子进程因管道写满而阻塞
+        decoder = StreamDecoder()
+        with open(path, "wb") as out:
+            for chunk in iter(lambda: pipe.read1(_CHUNK), b""):
+                room = self.max_output - info["bytes"]
+                if room > 0:
+                    out.write(chunk[:room])
+                    info["bytes"] += min(room, len(chunk))
+                info["truncated"] += max(0, len(chunk) - max(room, 0))
+                if self._echoed < self.echo_lines:
+                    lines = decoder.feed(chunk)
+                    long_line = decoder.take_partial(ECHO_LINE_CHARS)
+                    if long_line is not None:
+                        lines.append(long_line)
+                    self._echo(lines)
+        if self._echoed < self.echo_lines:
+            self._echo(decoder.finish())
+        pipe.close()
+
+    def _feed(self, pipe, chunks):
+        try:
+            for chunk in chunks:
+                pipe.write(chunk)
+        except OSError:
+            # 程序没有读完输入就退出了（BrokenPipeError）
+            pass
+        finally:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def run(self):
+        # 运行到结束，返回写入运行记录的内容
+        os.makedirs(self.run_dir, exist_ok=True)
+        stdin, chunks, stdin_desc = _open_stdin(self.stdin)
+        outputs = {name: {"path": os.path.join(self.run_dir, f"{name}.txt"), "bytes": 0, "truncated": 0}
+                   for name in STREAMS}
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            self.proc = subprocess.Popen([self.exe] + self.args, cwd=self.cwd, stdin=stdin,
+                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        finally:
+            if stdin not in (subprocess.DEVNULL, subprocess.PIPE):
+                stdin.close()
+        if self.job is not None:
+            self.job._proc = self.proc
+        if self.cancelled or (self.job is not None and self.job.cancelled):
+            self.cancel()
+        threads = [threading.Thread(target=self._drain, args=(getattr(self.proc, name), outputs[name]["path"], outputs[name]),
+                                    name=f"run-{name}", daemon=True) for name in STREAMS]
+        if chunks is not None:
+            threads.append(threading.Thread(target=self._feed, args=(self.proc.stdin, chunks), name="run-stdin", daemon=True))
+        for t in threads:
+            t.start()
+        try:
+            stats = wait_measured(self.proc, start, self.timeout)
+        finally:
+            for t in threads:
+                t.join()
+            if self.job is not None:
+                self.job._proc = None
+        record = {
+            "id": self.run_id,
+            "alg": self.alg,
+            "exe": self.exe,
+            "args": self.args,
+            "stdin": stdin_desc,
+            "started": started,
+            "cancelled": self.cancelled or (self.job is not None and self.job.cancelled),
+            "outputs": outputs,
+        }
+        record.update(stats)
+        append_history(self.alg, record)
+        return record
+
+
+def append_history(alg, record):
+    # 运行记录为 JSON Lines，每次运行一行；只保留最近 KEEP_RUNS 次运行的输出文件
+    with _history_lock:
+        with open(history_path(alg), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        base = runs_dir(alg)
+        dirs = sorted(d for d in os.listdir(base) if os.path.isdir(os.path.join(base, d)))
+        for d in dirs[:max(0, len(dirs) - KEEP_RUNS)]:
+            shutil.rmtree(os.path.join(base, d), ignore_errors=True)
+
+
+def load_history(alg, last=None):
+    records = []
+    try:
+        with open(history_path(alg), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return records[-last:] if last else records
+
+
+def find_run(alg, run_id=None):
+    # 按编号（或编号前缀）查找运行记录，未指定时返回最近一次
+    records = load_history(alg)
+    if run_id is None:
+        return records[-1] if records else None
+    return next((r for r in reversed(records) if r["id"].startswith(run_id)), None)
+
+
+def format_size(n):
+    if n < 1024:
+        return f"{n}B"
+    if n < 1048576:
+        return f"{n / 1024:.1f}KB"
+    return f"{n / 1048576:.1f}MB"
+
+
+def status_text(record):
+    if record["cancelled"]:
+        return "已取消"
+    if record["timed_out"]:
+        return "超时"
+    return f"返回码 {record['exit_code']}"
+
+
+def format_record(record):
+    # 一行摘要：结束状态、墙钟/CPU 时间、峰值内存与输出大小
+    out = record["outputs"]
+    text = (f"{status_text(record)}，墙钟 {record['wall']:.3f}s，CPU {record['cpu']:.3f}s，"
+            f"峰值内存 {format_rss(record['peak_rss'])}，stdout {format_size(out['stdout']['bytes'])}，"
+            f"stderr {format_size(out['stderr']['bytes'])}")
+    truncated = sum(out[name]["truncated"] for name in STREAMS)
+    if truncated:
+        text += f"（超过上限未保存 {format_size(truncated)}）"
+    return text
+
+
+# 输出文件分页：按字节数分页并对齐到行首，不必先扫描整个文件，几 GB 的输出也能立即翻到任意一页
+class OutputPager:
+    def __init__(self, path, page_bytes=PAGE_BYTES):
+        self.path = path
+        self.page_bytes = page_bytes
+        self.size = os.path.getsize(path) if os.path.exists(path) else 0
+
+    def page_count(self):
+        return max(1, -(-self.size // self.page_bytes))
+
+    def _aligned(self, f, pos):
+        # pos 之后第一个行首；一页内没有换行时直接从 pos 开始
+        if pos <= 0 or pos >= self.size:
+            return min(max(pos, 0), self.size)
+        f.seek(pos - 1)
+        data = f.read(self.page_bytes + 1)
+        i = data.find(b"\n")
+        return pos + i if i >= 0 else pos
+
+    def read_page(self, index):
+        index = min(max(index, 0), self.page_count() - 1)
+        if self.size == 0:
+            return ""
+        with open(self.path, "rb") as f:
+            start = self._aligned(f, index * self.page_bytes)
+            end = self._aligned(f, (index + 1) * self.page_bytes)
+            f.seek(start)
+            data = f.read(end - start)
+        for encoding in ("utf-8", "gbk"):
+            try:
+                return data.decode(encoding)
+            except UnicodeDecodeError:
+                continue
+        return data.decode("utf-8", errors="replace")
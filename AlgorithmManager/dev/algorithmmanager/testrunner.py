@@ -0,0 +1,187 @@
+import os
+import re
+import time
+import fnmatch
+import tempfile
+import threading
+import subprocess
+from itertools import zip_longest
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .procstats import wait_measured, kill_process, format_rss
+
+# 测试用例目录：<算法目录>/tests/ 下成对的 名称.in 与 名称.out
+TESTS_DIR = "tests"
+
+# 判定结果
+VERDICTS = ("AC", "WA", "TLE", "MLE", "RE")
+VERDICT_LABELS = {
+    "AC": "通过",
+    "WA": "答案错误",
+    "TLE": "超时",
+    "MLE": "超内存",
+    "RE": "运行错误",
+}
+
+DEFAULT_TIME_LIMIT = 2.0
+DEFAULT_MEMORY_LIMIT_MB = 256
+
+# 每次从输出管道或答案文件读取的字节数，内存占用与用例大小无关
+_CHUNK = 1 << 16
+# 错误信息中保留的 stderr 字节数
+_STDERR_TAIL = 400
+
+
+def _natural_key(name):
+    return [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", name)]
+
+
+def discover_cases(alg_dir, pattern=None):
+    # 返回 [(名称, 输入文件, 答案文件)]，按名称自然排序；缺少答案文件的输入会被忽略
+    tests_dir = os.path.join(alg_dir, TESTS_DIR)
+    if not os.path.isdir(tests_dir):
+        return []
+    cases = []
+    for name in os.listdir(tests_dir):
+        if not name.endswith(".in"):
+            continue
+        case = name[:-3]
+        out_path = os.path.join(tests_dir, case + ".out")
+        if os.path.isfile(out_path) and (not pattern or fnmatch.fnmatch(case, pattern)):
+            cases.append((case, os.path.join(tests_dir, name), out_path))
+    return sorted(cases, key=lambda c: _natural_key(c[0]))
+
+
+def tokens(read):
+    # 以空白分隔的词法单元流：按块读取，跨块的单元拼接后再输出
+    pending = b""
+    while True:
+        data = read(_CHUNK)
+        if not data:
+            break
+        buf = pending + data
+        parts = buf.split()
+        pending = parts.pop() if parts and not buf[-1:].isspace() else b""
+        yield from parts
+    if pending:
+        yield pending
+
+
+def _clip(token):
+    if token is None:
+        return "<输出结束>"
+    text = token.decode("utf-8", errors="replace")
+    return text if len(text) <= 40 else text[:40] + "…"
+
+
+def compare_stream(actual_read, expected_path):
+    # 逐个比较词法单元（忽略空白与换行差异），一致返回 None，否则返回 (序号, 期望, 实际)，输出结束时为 None
+    with open(expected_path, "rb") as expected:
+        for index, (want, got) in enumerate(zip_longest(tokens(expected.read), tokens(actual_read)), 1):
+            if want != got:
+                return index, want, got
+    return None
+
+
+def run_case(exe, case, time_limit=DEFAULT_TIME_LIMIT, memory_limit=None):
+    # 运行单个用例：stdin 直接连到输入文件，stdout 边读边与答案比较，内存占用与用例大小无关
+    name, in_path, out_path = case
+    with open(in_path, "rb") as stdin, tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        proc = subprocess.Popen([exe], stdin=stdin, stdout=subprocess.PIPE, stderr=stderr, cwd=os.path.dirname(exe))
+        stats = {}
+        waiter = threading.Thread(target=lambda: stats.update(wait_measured(proc, start, time_limit, memory_limit)),
+                                  name=f"wait-{name}", daemon=True)
+        waiter.start()
+        killed = False
+        try:
+            diff = compare_stream(proc.stdout.read, out_path)
+            if diff is not None and diff[2] is not None:
+                # 程序还在输出时已经确定答案错误，不必等它输出完
+                kill_process(proc)
+                killed = True
+        finally:
+            proc.stdout.close()
+            waiter.join()
+        if stats["timed_out"]:
+            verdict, detail = "TLE", f"超过 {time_limit:g}s"
+        elif stats["rss_exceeded"]:
+            verdict, detail = "MLE", f"超过 {memory_limit / 1048576:.0f}MB"
+        elif stats["exit_code"] != 0 and not killed:
+            stderr.seek(0, os.SEEK_END)
+            stderr.seek(max(0, stderr.tell() - _STDERR_TAIL))
+            tail = stderr.read().decode("utf-8", errors="replace").strip()
+            verdict, detail = "RE", f"返回码 {stats['exit_code']}" + (f"：{tail}" if tail else "")
+        elif diff is not None:
+            index, want, got = diff
+            verdict, detail = "WA", f"第 {index} 个输出项不同：期望 {_clip(want)}，实际 {_clip(got)}"
+        else:
+            verdict, detail = "AC", ""
+    return {"name": name, "verdict": verdict, "detail": detail, "wall": stats["wall"], "cpu": stats["cpu"],
+            "peak_rss": stats["peak_rss"], "exit_code": stats["exit_code"]}
+
+
+def run_tests(exe, cases, jobs=None, time_limit=DEFAULT_TIME_LIMIT, memory_limit=None, fail_fast=False, log=print):
+    # 并发运行全部用例（每个用例一个子进程），fail_fast 时出现第一个失败后不再启动新的用例
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    results = []
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(run_case, exe, case, time_limit, memory_limit) for case in cases]
+        collected = set()
+        for future in as_completed(futures):
+            collected.add(future)
+            r = future.result()
+            results.append(r)
+            log(format_result(r))
+            if fail_fast and r["verdict"] != "AC":
+                for f in futures:
+                    f.cancel()
+                log("出现失败用例，停止运行其余用例")
+                break
+        # 已经开始运行的用例无法取消，等它们结束并计入结果，只有未启动的用例记为未运行
+        for future in futures:
+            if future not in collected and not future.cancelled():
+                r = future.result()
+                results.append(r)
+                log(format_result(r))
+    order = {case[0]: i for i, case in enumerate(cases)}
+    return sorted(results, key=lambda r: order[r["name"]])
+
+
+def test_job(job, log=print, time_limit=DEFAULT_TIME_LIMIT, memory_limit=None, jobs=None, pattern=None, fail_fast=False):
+    # 用 tests/ 下的用例检查构建任务（engine.BuildJob）的可执行文件，输出汇总；返回是否全部通过
+    exe_path = job.find_executable()
+    cases = discover_cases(job.alg_dir, pattern)
+    if not exe_path:
+        log("未找到可执行文件")
+        return False
+    if not cases:
+        log(f"{job.alg}/{TESTS_DIR} 下没有测试用例（需要成对的 .in 与 .out 文件）")
+        return True
+    log(f"运行 {len(cases)} 个用例：{exe_path}")
+    results = run_tests(exe_path, cases, jobs=jobs, time_limit=time_limit, memory_limit=memory_limit,
+                        fail_fast=fail_fast, log=log)
+    log(format_report(results, len(cases)))
+    return all_passed(results, len(cases))
+
+
+def format_result(r):
+    line = f"{r['verdict']:<4} {r['name']:<20} {r['wall'] * 1000:>9.1f}ms {format_rss(r['peak_rss']):>9}"
+    return line + (f"  {r['detail']}" if r["detail"] else "")
+
+
+def format_report(results, total):
+    counts = {v: sum(1 for r in results if r["verdict"] == v) for v in VERDICTS}
+    parts = [f"{VERDICT_LABELS[v]} {counts[v]}" for v in VERDICTS if counts[v]]
+    skipped = total - len(results)
+    if skipped:
+        parts.append(f"未运行 {skipped}")
+    slowest = max(results, key=lambda r: r["wall"], default=None)
+    text = f"共 {total} 个用例：" + "，".join(parts)
+    if slowest:
+        text += f"；最慢 {slowest['name']} {slowest['wall'] * 1000:.1f}ms"
+    return text
+
+
+def all_passed(results, total):
+    return len(results) == total and all(r["verdict"] == "AC" for r in results)
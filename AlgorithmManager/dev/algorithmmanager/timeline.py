@@ -0,0 +1,234 @@
+import os
+import re
+import glob
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+from .paths import cache_dir
+
+# 阶段名称与显示文字
+PHASE_LABELS = {
+    "toolchain": "工具链探测",
+    "cache": "产物缓存",
+    "configure": "配置",
+    "build": "构建",
+    "train": "PGO 训练",
+    "run": "运行",
+}
+
+# 每个算法保留的耗时记录条数
+KEEP_RECORDS = 100
+
+# MSVC /Bt+ 输出：time(…\c1xx.dll)=0.45963s < … > BB [C:\src\main.cpp]
+_MSVC_BT_RE = re.compile(r"time\((?P<tool>[^)]*)\)=(?P<sec>[\d.]+)s.*\[(?P<file>[^\]]+)\]")
+
+_lock = threading.Lock()
+
+
+# 一次构建的时间线：各阶段的起止时间（相对开始时刻，单位秒）以及编译单元耗时
+class Timeline:
+    def __init__(self, alg, config=""):
+        self.alg = alg
+        self.config = config
+        self.started = time.time()
+        self.status = ""
+        self.phases = []
+        self.units = []
+        self._t0 = time.perf_counter()
+        self._open = {}
+        self._msvc = {}
+        self._ninja_seen = set()
+
+    def now(self):
+        return time.perf_counter() - self._t0
+
+    def begin(self, name):
+        self._open[name] = self.now()
+
+    def end(self, name):
+        start = self._open.pop(name, None)
+        if start is not None:
+            self.phases.append({"name": name, "start": start, "end": self.now()})
+
+    @contextmanager
+    def phase(self, name):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def phase_start(self, name):
+        # 同名阶段出现多次时（如 PGO 的两次构建）取最近一次
+        return next((p["start"] for p in reversed(self.phases) if p["name"] == name), self._open.get(name, 0.0))
+
+    def observe_lines(self, lines):
+        # 从构建输出中收集 MSVC /Bt+ 的逐文件耗时
+        for line in lines:
+            m = _MSVC_BT_RE.search(line)
+            if m:
+                name = os.path.basename(m.group("file"))
+                self._msvc[name] = self._msvc.get(name, 0.0) + float(m.group("sec"))
+
+    def mark_build_start(self, build_dir):
+        # 记录 .ninja_log 中已有的条目，构建结束后只取新增的条目。
+        # ninja 重新压缩日志时会改写整个文件（文件可能变短），不能按字节偏移读取；保留下来的条目内容不变
+        self._ninja_seen = set(_ninja_log_lines(build_dir))
+
+    def collect_units(self, build_dir):
+        # 构建结束后汇总编译单元耗时：优先 Ninja 日志，其次 clang -ftime-trace，最后 MSVC /Bt+
+        base = self.phase_start("build")
+        units = read_ninja_log(build_dir, self._ninja_seen)
+        if not units:
+            units = read_clang_traces(build_dir, self.started + base)
+        if not units and self._msvc:
+            offset = 0.0
+            for name, dur in self._msvc.items():
+                units.append({"name": name, "start": offset, "dur": dur})
+                offset += dur
+        self.units = [dict(u, start=base + u["start"]) for u in units]
+
+    def total(self):
+        return max((p["end"] for p in self.phases), default=0.0)
+
+    def summary(self):
+        parts = [f"{PHASE_LABELS.get(p['name'], p['name'])} {p['end'] - p['start']:.2f}s" for p in self.phases]
+        text = "耗时：" + "，".join(parts)
+        if self.units:
+            slowest = max(self.units, key=lambda u: u["dur"])
+            text += f"；{len(self.units)} 个编译单元，最慢 {slowest['name']} {slowest['dur']:.2f}s"
+        return text
+
+    def to_record(self):
+        return {
+            "alg": self.alg,
+            "config": self.config,
+            "started": self.started,
+            "status": self.status,
+            "phases": self.phases,
+            "units": self.units,
+        }
+
+    def save(self):
+        save_record(self.to_record())
+
+
+def config_key(build_type, arch, generator, env):
+    return f"{build_type}-{arch}-{generator}-{env}"
+
+
+def _ninja_log_lines(build_dir):
+    path = os.path.join(build_dir, ".ninja_log")
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return [line.rstrip("\n") for line in f if not line.startswith("#")]
+
+
+def read_ninja_log(build_dir, seen=()):
+    # .ninja_log 每行：开始毫秒 结束毫秒 修改时间 输出文件 哈希（时间相对本次 ninja 启动）；跳过 seen 中已有的条目
+    units = []
+    for line in _ninja_log_lines(build_dir):
+        if line not in seen:
+            fields = line.split("\t")
+            if len(fields) < 4:
+                continue
+            try:
+                start, end = int(fields[0]) / 1000.0, int(fields[1]) / 1000.0
+            except ValueError:
+                continue
+            units.append({"name": fields[3], "start": start, "dur": end - start})
+    return units
+
+
+def read_clang_traces(build_dir, since):
+    # clang -ftime-trace 在目标文件旁生成同名 .json
+    units = []
+    for path in glob.glob(os.path.join(build_dir, "CMakeFiles", "**", "*.json"), recursive=True):
+        if os.path.getmtime(path) < since:
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                events = json.load(f).get("traceEvents", [])
+        except (OSError, ValueError, AttributeError):
+            continue
+        total = next((e.get("dur", 0) for e in events if e.get("name") == "Total ExecuteCompiler"), None)
+        if total is None:
+            total = max((e.get("ts", 0) + e.get("dur", 0) for e in events), default=0)
+        name = os.path.basename(path)[:-len(".json")]
+        units.append({"name": name, "start": 0.0, "dur": total / 1e6})
+    return units
+
+
+def tu_profile_flags(env, compiler):
+    # 逐编译单元计时需要的编译选项
+    if env == "MSVC":
+        return ["/Bt+"]
+    if compiler and "clang" in os.path.basename(compiler).lower():
+        return ["-ftime-trace"]
+    return []
+
+
+def _records_path(alg):
+    return os.path.join(cache_dir("timings"), f"{alg}.json")
+
+
+def load_records(alg, config=None):
+    try:
+        with open(_records_path(alg), "r", encoding="utf-8") as f:
+            records = json.load(f)
+    except (OSError, ValueError):
+        records = []
+    if config:
+        records = [r for r in records if r.get("config") == config]
+    return records
+
+
+def save_record(record):
+    with _lock:
+        records = load_records(record["alg"])
+        records.append(record)
+        path = _records_path(record["alg"])
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(records[-KEEP_RECORDS:], f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+def assign_lanes(units):
+    # 把时间上重叠的编译单元分到不同的行
+    lanes, result = [], []
+    for u in sorted(units, key=lambda u: u["start"]):
+        for i, end in enumerate(lanes):
+            if end <= u["start"]:
+                lanes[i] = u["start"] + u["dur"]
+                result.append((i, u))
+                break
+        else:
+            lanes.append(u["start"] + u["dur"])
+            result.append((len(lanes) - 1, u))
+    return result
+
+
+def to_chrome_trace(records):
+    # 导出为 Chrome trace（chrome://tracing 或 Perfetto 可打开），每条记录一个 pid
+    events = []
+    for pid, r in enumerate(records, 1):
+        base = r["started"] * 1e6
+        events.append({"ph": "M", "name": "process_name", "pid": pid, "tid": 0,
+                       "args": {"name": f"{r['alg']} {r['config']} {r.get('status', '')}"}})
+        events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": 0, "args": {"name": "阶段"}})
+        for p in r["phases"]:
+            events.append({"ph": "X", "cat": "phase", "name": PHASE_LABELS.get(p["name"], p["name"]),
+                           "pid": pid, "tid": 0, "ts": base + p["start"] * 1e6, "dur": (p["end"] - p["start"]) * 1e6})
+        for lane, u in assign_lanes(r.get("units", [])):
+            events.append({"ph": "X", "cat": "tu", "name": u["name"], "pid": pid, "tid": lane + 1,
+                           "ts": base + u["start"] * 1e6, "dur": u["dur"] * 1e6})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(records, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(to_chrome_trace(records), f, ensure_ascii=False)
@@ -0,0 +1,202 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import threading
+import subprocess
+
+from .paths import cache_dir
+
+# 需要探测的工具：名称 -> (可执行文件名, 版本参数)
+TOOLS = {
+    "cmake": ("cmake", ["--version"]),
+    "gcc": ("g++", ["--version"]),
+    "clang": ("clang++", ["--version"]),
+    "cl": ("cl", []),
+    "ninja": ("ninja", ["--version"]),
+    "msvc": ("vswhere", None),
+}
+
+_VERSION_RE = re.compile(r"\d+(?:\.\d+)+")
+
+
+def _find_vswhere():
+    path = shutil.which("vswhere")
+    if path:
+        return path
+    pf86 = os.environ.get("ProgramFiles(x86)") or os.environ.get("ProgramFiles")
+    if pf86:
+        path = os.path.join(pf86, "Microsoft Visual Studio", "Installer", "vswhere.exe")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def locate(name):
+    # 只查找路径，不启动任何子进程
+    exe = TOOLS[name][0]
+    if name == "msvc":
+        return _find_vswhere()
+    return shutil.which(exe)
+
+
+def _run(args):
+    kwargs = {}
+    if sys.platform.startswith("win"):
+        # 避免探测时弹出控制台窗口
+        kwargs["creationflags"] = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    proc = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, errors="replace", timeout=15, **kwargs)
+    return proc.stdout, proc.stderr
+
+
+def _probe(name, path):
+    entry = {"path": path, "mtime": os.path.getmtime(path), "banner": "", "version": "", "probed_at": time.time()}
+    if name == "msvc":
+        # 通过 vswhere 查询最新的 Visual Studio 安装
+        out, _ = _run([path, "-latest", "-products", "*", "-requires", "Microsoft.Component.MSBuild", "-format", "json"])
+        installs = json.loads(out or "[]")
+        if installs:
+            entry["version"] = installs[0].get("installationVersion", "")
+            entry["banner"] = installs[0].get("displayName", "")
+            entry["install_path"] = installs[0].get("installationPath", "")
+        return entry
+    out, err = _run([path] + TOOLS[name][1])
+    # cl 不带参数时把版本信息输出到 stderr
+    text = out if out.strip() else err
+    lines = text.strip().splitlines()
+    entry["banner"] = lines[0] if lines else ""
+    m = _VERSION_RE.search(entry["banner"])
+    entry["version"] = m.group(0) if m else ""
+    return entry
+
+
+def vcvars_path(params=None):
+    # vcvarsall.bat：参数中指定的路径优先，否则由 vswhere 查到的 Visual Studio 安装目录推出
+    path = (params or {}).get("vsvars_path")
+    if path and os.path.isfile(path):
+        return path
+    msvc = get_registry().get("msvc")
+    if msvc and msvc.get("install_path"):
+        path = os.path.join(msvc["install_path"], "VC", "Auxiliary", "Build", "vcvarsall.bat")
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def capture_env(env, arch, params=None):
+    # 捕获编译环境的环境变量快照：MSVC 执行一次 vcvarsall 后读取 set 的输出，其他环境直接使用当前进程的环境。
+    # 返回 (环境变量字典, 说明)，失败时字典为 None
+    if env != "MSVC":
+        return dict(os.environ), f"{env}（守护进程的环境变量）"
+    vcvars = vcvars_path(params)
+    if not vcvars:
+        return None, "未找到 vcvarsall.bat"
+    # cmd /s /c 会去掉最外层引号，路径中含空格时需要再包一层
+    proc = subprocess.run(f'cmd /s /c ""{vcvars}" {arch} >nul 2>&1 && set"', stdout=subprocess.PIPE,
+                          stderr=subprocess.DEVNULL, universal_newlines=True, errors="replace",
+                          creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+    if proc.returncode != 0:
+        return None, f"vcvarsall.bat {arch} 执行失败，返回码：{proc.returncode}"
+    snapshot = {}
+    for line in proc.stdout.splitlines():
+        # cmd 的 set 输出中以 = 开头的是驱动器当前目录等内部变量
+        key, sep, value = line.partition("=")
+        if sep and key:
+            snapshot[key] = value
+    return snapshot, f"{vcvars} {arch}"
+
+
+def which_in(snapshot, exe):
+    # 在环境变量快照的 PATH 中查找可执行文件
+    path = next((v for k, v in (snapshot or {}).items() if k.upper() == "PATH"), None)
+    return shutil.which(exe, path=path) if path else None
+
+
+# 工具链注册表：探测结果持久化到磁盘，可执行文件路径或修改时间变化时失效
+class ToolchainRegistry:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cache_dir(), "toolchains.json")
+        self.lock = threading.Lock()
+        self.entries = self._load()
+        self._thread = None
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    def lookup(self, name):
+        # 返回仍然有效的缓存条目；未探测或已失效时返回 None
+        path = locate(name)
+        if not path:
+            return None
+        with self.lock:
+            entry = self.entries.get(name)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        if entry and entry.get("path") == path and entry.get("mtime") == mtime:
+            return entry
+        return None
+
+    def probe(self, name):
+        path = locate(name)
+        if not path:
+            with self.lock:
+                if self.entries.pop(name, None) is not None:
+                    self._save()
+            return None
+        try:
+            entry = _probe(name, path)
+        except (OSError, ValueError, subprocess.SubprocessError):
+            entry = {"path": path, "mtime": os.path.getmtime(path), "banner": "", "version": "", "probed_at": time.time()}
+        with self.lock:
+            self.entries[name] = entry
+            self._save()
+        return entry
+
+    def get(self, name, probe=True):
+        entry = self.lookup(name)
+        if entry is None and probe:
+            entry = self.probe(name)
+        return entry
+
+    def path_of(self, name):
+        # 优先使用缓存，未探测时退回到 PATH 查找
+        entry = self.lookup(name)
+        return entry["path"] if entry else (locate(name) or "")
+
+    def refresh(self):
+        for name in TOOLS:
+            if self.lookup(name) is None:
+                self.probe(name)
+
+    def refresh_async(self):
+        # 在后台线程中探测，避免阻塞界面
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._thread = threading.Thread(target=self.refresh, name="toolchain-probe", daemon=True)
+        self._thread.start()
+        return self._thread
+
+
+_registry = None
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        _registry = ToolchainRegistry()
+    return _registry
@@ -0,0 +1,271 @@
+import os
+import glob
+import json
+import time
+import uuid
+import shutil
+import random
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from . import bench
+from .paths import cache_dir
+from .engine import BuildJob, run_build, detect_generator, SUCCESS_STATUSES
+
+# 变体构建目录：<算法目录>/build-variants/<变体名>
+VARIANT_DIR = "build-variants"
+
+# 默认对比的变体；变体名由优化级别加可选的 lto / native / pgo 组成，用 - 连接
+DEFAULT_VARIANTS = ("O2", "O3", "O3-lto", "O3-native", "O3-pgo")
+DEFAULT_BASELINE = "O2"
+
+OPT_LEVELS = ("O1", "O2", "O3", "Os")
+FEATURES = ("lto", "native", "pgo")
+
+# 优化级别对应的 CMAKE_CXX_FLAGS_RELEASE；MSVC 没有 O3，用 /Ob3 加强内联代替
+_OPT_FLAGS = {
+    "gnu": {"O1": "-O1", "O2": "-O2", "O3": "-O3", "Os": "-Os"},
+    "msvc": {"O1": "/O1", "O2": "/O2 /Ob2", "O3": "/O2 /Ob3", "Os": "/O1"},
+}
+
+# PGO 训练输入的默认规模与运行次数
+TRAIN_SIZE = 100000
+TRAIN_RUNS = 3
+
+
+def parse_variant(name):
+    # "O3-lto-native" -> {"opt": "O3", "lto": True, "native": True, "pgo": False}
+    tokens = name.split("-")
+    if tokens[0] not in OPT_LEVELS or any(t not in FEATURES for t in tokens[1:]):
+        raise ValueError(f"无法识别的变体：{name}（格式：{'/'.join(OPT_LEVELS)}[-{'][-'.join(FEATURES)}]）")
+    spec = {"opt": tokens[0]}
+    for feature in FEATURES:
+        spec[feature] = feature in tokens[1:]
+    return spec
+
+
+def compiler_family(env, compiler):
+    if env == "MSVC":
+        return "msvc"
+    if compiler and "clang" in os.path.basename(compiler).lower():
+        return "clang"
+    return "gcc"
+
+
+def _profdata_tool(compiler):
+    # clang 的 .profraw 需要 llvm-profdata 合并，优先使用编译器同目录下的版本
+    if compiler:
+        sibling = os.path.join(os.path.dirname(compiler), "llvm-profdata" + (".exe" if compiler.lower().endswith(".exe") else ""))
+        if os.path.isfile(sibling):
+            return sibling
+    return shutil.which("llvm-profdata")
+
+
+# 一个优化变体的构建：独立的构建目录，固定 Release，按变体追加编译选项
+class VariantJob(BuildJob):
+    # 变体构建在独立目录中进行，不覆盖项目索引里的上次构建记录
+    record_in_index = False
+
+    def __init__(self, root, alg, params, variant, clean=False, jobs=None, generator=None):
+        self.spec = parse_variant(variant)
+        params = dict(params, build_type="Release", variant={"name": variant, "pgo_stage": None})
+        super().__init__(root, alg, params, clean=clean, jobs=jobs, generator=generator)
+        self.variant = variant
+        self.build_dir = os.path.join(self.alg_dir, VARIANT_DIR, variant)
+        self.family = compiler_family(self.env, self.compiler)
+        self.profile_dir = os.path.join(self.build_dir, "pgo")
+        self.timeline.config += f"-{variant}"
+        # PGO 的产物取决于训练数据，不进入产物缓存
+        if self.spec["pgo"]:
+            self.use_cache = False
+
+    @property
+    def pgo_stage(self):
+        return self.params["variant"]["pgo_stage"]
+
+    @pgo_stage.setter
+    def pgo_stage(self, stage):
+        # 两次构建的编译选项不同，放进参数里让增量指纹随之变化
+        self.params["variant"] = {"name": self.variant, "pgo_stage": stage}
+        self._artifact_key = None
+
+    def unsupported(self):
+        # 当前编译器不支持的变体返回原因
+        if self.family == "msvc" and self.spec["native"]:
+            return "MSVC 没有 -march=native 的等价选项"
+        if self.family == "msvc" and self.spec["pgo"]:
+            return "暂不支持 MSVC 的 PGO（需要 /LTCG:PGInstrument 与 pgomgr）"
+        if self.family == "clang" and self.spec["pgo"] and not _profdata_tool(self.compiler):
+            return "未找到 llvm-profdata，无法合并 clang 的 PGO 数据"
+        return None
+
+    def extra_flags(self):
+        flags = super().extra_flags()
+        if self.spec["native"]:
+            flags.append("-march=native")
+        profile_dir = self.profile_dir.replace("\\", "/")
+        if self.pgo_stage == "generate":
+            flags.append(f"-fprofile-instr-generate={profile_dir}/%p.profraw" if self.family == "clang"
+                         else f"-fprofile-generate={profile_dir}")
+        elif self.pgo_stage == "use":
+            if self.family == "clang":
+                flags.append(f"-fprofile-instr-use={profile_dir}/merged.profdata")
+            else:
+                # 训练没覆盖到的函数不报警告；多线程计数不一致时自动修正
+                flags += [f"-fprofile-use={profile_dir}", "-fprofile-correction", "-Wno-missing-profile"]
+        return flags
+
+    def config_args(self):
+        family = "msvc" if self.family == "msvc" else "gnu"
+        release = _OPT_FLAGS[family][self.spec["opt"]] + (" /DNDEBUG /MD" if family == "msvc" else " -DNDEBUG")
+        args = super().config_args() + [f"-DCMAKE_CXX_FLAGS_RELEASE={release}"]
+        # 子项目的 cmake_minimum_required 可能低于 3.9，显式启用 CMP0069 才会真正打开 LTO
+        args += ["-DCMAKE_POLICY_DEFAULT_CMP0069=NEW",
+                 f"-DCMAKE_INTERPROCEDURAL_OPTIMIZATION={'ON' if self.spec['lto'] else 'OFF'}"]
+        return args
+
+    def train(self, case=None, size=TRAIN_SIZE, runs=TRAIN_RUNS, seed=0, log=print):
+        # 用性能测试的输入生成器运行插桩后的程序，生成 profile 数据
+        exe_path = self.find_executable()
+        if not exe_path:
+            log("未找到插桩后的可执行文件")
+            return False
+        gen, cases = bench.generator_for(self.alg)
+        data = gen(size, case or cases[0], random.Random(seed))
+        with tempfile.TemporaryFile() as stdin:
+            stdin.write(data)
+            for _ in range(runs):
+                stdin.seek(0)
+                code = subprocess.call([exe_path], stdin=stdin, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL, cwd=os.path.dirname(exe_path))
+                if code != 0:
+                    log(f"训练运行失败，返回码：{code}")
+                    return False
+        if self.family == "clang":
+            raw = glob.glob(os.path.join(self.profile_dir, "*.profraw"))
+            merged = os.path.join(self.profile_dir, "merged.profdata")
+            code = subprocess.call([_profdata_tool(self.compiler), "merge", "-o", merged] + raw)
+            if code != 0 or not raw:
+                log("合并 PGO 数据失败")
+                return False
+        return True
+
+
+def build_variant(job, log, case=None, train_size=TRAIN_SIZE, seed=0):
+    # 构建一个变体，PGO 变体依次执行：插桩构建 -> 训练运行 -> 使用 profile 重新构建
+    reason = job.unsupported()
+    if reason:
+        log(f"跳过：{reason}")
+        return "不支持"
+    if not job.spec["pgo"]:
+        return run_build(job, log)
+    job.pgo_stage = "generate"
+    shutil.rmtree(job.profile_dir, ignore_errors=True)
+    os.makedirs(job.profile_dir, exist_ok=True)
+    log("PGO 第一遍：插桩构建")
+    status = run_build(job, log, finish=False)
+    if status not in SUCCESS_STATUSES:
+        log(job.finish_timeline(status))
+        return status
+    log(f"PGO 训练：规模 {train_size}")
+    with job.timeline.phase("train"):
+        trained = job.train(case, train_size, seed=seed, log=log)
+    if not trained:
+        log(job.finish_timeline("训练失败"))
+        return "训练失败"
+    job.pgo_stage = "use"
+    log("PGO 第二遍：使用 profile 重新构建")
+    return run_build(job, log)
+
+
+def run_variants(root, alg, variants, params, max_jobs=None, clean=False, case=None, train_size=TRAIN_SIZE, seed=0, log=print):
+    # 并发构建多个变体，返回每个变体的状态、耗时与可执行文件路径
+    max_jobs = max(1, min(max_jobs or len(variants), len(variants)))
+    generator = detect_generator(params.get("env"), params.get("generator"))
+    build_jobs = max(1, (os.cpu_count() or 1) // max_jobs)
+    lock = threading.Lock()
+
+    def one(variant):
+        start = time.perf_counter()
+
+        def job_log(line):
+            with lock:
+                log(f"[{variant}] {line}")
+        job = VariantJob(root, alg, params, variant, clean=clean, jobs=build_jobs, generator=generator)
+        status = build_variant(job, job_log, case, train_size, seed)
+        exe = job.find_executable() if status in SUCCESS_STATUSES else None
+        return {"variant": variant, "status": status, "elapsed": time.perf_counter() - start, "exe": exe}
+
+    with ThreadPoolExecutor(max_workers=max_jobs) as pool:
+        return list(pool.map(one, variants))
+
+
+def bench_variants(builds, alg, sizes, case=None, repeat=10, warmup=2, timeout=None, seed=0, log=print):
+    # 依次测试每个变体（不并发，避免互相干扰），所有变体使用相同的输入
+    results = {}
+    for b in builds:
+        if not b["exe"]:
+            continue
+        log(f"性能测试：{b['variant']}")
+        results[b["variant"]] = bench.run_benchmark(b["exe"], alg, sizes, case=case, repeat=repeat, warmup=warmup,
+                                                    timeout=timeout, seed=seed, log=lambda text: log(f"  {text}"))
+    return results
+
+
+def speedup_table(results, baseline=DEFAULT_BASELINE, metric="wall"):
+    # 每个变体在各规模下的中位数与相对基线的加速比（>1 表示比基线快）
+    if baseline not in results:
+        baseline = next(iter(results), None)
+    base = {r["size"]: r["stats"].get(metric) for r in results.get(baseline, {}).get("results", [])}
+    rows = []
+    for variant, result in results.items():
+        cells = {}
+        for r in result["results"]:
+            s, b = r["stats"].get(metric), base.get(r["size"])
+            if s:
+                speedup = b["median"] / s["median"] if b and s["median"] else None
+                cells[r["size"]] = {"median": s["median"], "speedup": speedup}
+        rows.append({"variant": variant, "cells": cells})
+    return {"baseline": baseline, "metric": metric, "rows": rows}
+
+
+def format_speedups(table, sizes):
+    width = max([len("变体")] + [len(r["variant"]) for r in table["rows"]])
+    lines = [f"基线：{table['baseline']}（加速比 >1 表示更快）",
+             f"{'变体'.ljust(width)}  " + "  ".join(f"{'n=' + str(n):>20}" for n in sizes)]
+    for row in table["rows"]:
+        cells = []
+        for n in sizes:
+            c = row["cells"].get(n)
+            if not c:
+                cells.append(f"{'-':>20}")
+            else:
+                speedup = f"x{c['speedup']:.2f}" if c["speedup"] else "-"
+                cells.append(f"{c['median'] * 1000:>11.3f}ms {speedup:>6}")
+        lines.append(f"{row['variant'].ljust(width)}  " + "  ".join(cells))
+    return "\n".join(lines)
+
+
+def summary_text(table):
+    # 各变体在最大规模下的加速比中最高的一个，用于项目索引中的简要记录
+    best = None
+    for row in table["rows"]:
+        if not row["cells"]:
+            continue
+        cell = row["cells"][max(row["cells"])]
+        if cell["speedup"] and (best is None or cell["speedup"] > best[1]):
+            best = (row["variant"], cell["speedup"])
+    return f"最快 {best[0]} x{best[1]:.2f}（基线 {table['baseline']}）" if best else "-"
+
+
+def default_result_path(alg):
+    # 随机后缀：同一秒内的两次运行不会互相覆盖结果
+    return os.path.join(cache_dir("bench", alg), time.strftime("variants-%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6] + ".json")
+
+
+def save_result(builds, results, table, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"builds": builds, "results": results, "speedups": table}, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,119 @@
+import os
+import time
+import threading
+
+from . import testrunner
+from .engine import BuildJob, run_build, run_executable, SUCCESS_STATUSES
+from .projectindex import source_dirs, source_files
+
+# 监视模式：源文件改动后自动增量构建，再运行程序或测试。
+# 图形界面用 QFileSystemWatcher 接收通知，命令行按修改时间轮询，两者共用这里的文件列表与比较逻辑
+
+# 连续保存在该时间内合并为一次构建（秒）
+DEBOUNCE = 0.3
+# 命令行轮询间隔（秒）
+POLL_INTERVAL = 0.5
+
+WATCH_ACTIONS = {"run": "运行", "test": "测试"}
+
+
+# 监视的文件与项目索引记录的源文件相同：算法目录与 src/ 下的源文件、头文件以及 CMakeLists.txt
+watched_dirs = source_dirs
+watched_files = source_files
+
+
+def snapshot(alg_dir):
+    # 路径 -> (修改时间, 大小)
+    result = {}
+    for path in watched_files(alg_dir):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        result[path] = (st.st_mtime_ns, st.st_size)
+    return result
+
+
+def diff(old, new, alg_dir):
+    # 新增、删除或修改过的文件（相对算法目录）
+    return sorted(os.path.relpath(p, alg_dir) for p in set(old) | set(new) if old.get(p) != new.get(p))
+
+
+def poll_changes(alg_dir, interval=POLL_INTERVAL, debounce=DEBOUNCE, stop=None):
+    # 轮询修改时间，每当改动平息 debounce 秒后产出一次累计的改动文件列表
+    stop = stop or threading.Event()
+    last = snapshot(alg_dir)
+    pending, changed_at = set(), 0.0
+    while not stop.is_set():
+        stop.wait(min(interval, debounce) if pending else interval)
+        current = snapshot(alg_dir)
+        changes = diff(last, current, alg_dir)
+        last = current
+        if changes:
+            pending.update(changes)
+            changed_at = time.monotonic()
+        elif pending and time.monotonic() - changed_at >= debounce:
+            yield sorted(pending)
+            pending = set()
+
+
+# 命令行的监视会话：新的改动到来时取消仍在进行的配置/构建，再从头开始一轮
+class WatchSession:
+    def __init__(self, root, alg, params, action="run", input_path=None, time_limit=testrunner.DEFAULT_TIME_LIMIT,
+                 memory_limit=None, log=print):
+        self.root = root
+        self.alg = alg
+        self.params = params
+        self.action = action
+        self.input_path = input_path
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.log = log
+        self.job = None
+        self.thread = None
+
+    def trigger(self, changes=None):
+        if self.busy():
+            self.log("有新的改动，取消当前构建")
+        self.cancel()
+        if changes:
+            self.log(f"检测到改动：{', '.join(changes)}")
+        self.job = BuildJob(self.root, self.alg, self.params)
+        self.thread = threading.Thread(target=self._cycle, args=(self.job,), name=f"watch-{self.alg}", daemon=True)
+        self.thread.start()
+
+    def busy(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+        if self.thread is not None:
+            self.thread.join()
+        self.job = self.thread = None
+
+    def _cycle(self, job):
+        status = run_build(job, self.log, finish=False)
+        if status == "已取消":
+            return
+        if status not in SUCCESS_STATUSES:
+            if status != "缺少CMakeLists":
+                self.log(job.finish_timeline(status))
+            return
+        if self.action == "test":
+            testrunner.test_job(job, self.log, self.time_limit, self.memory_limit)
+        else:
+            run_executable(job, self.log, self.input_path)
+        if not job.cancelled:
+            self.log(job.finish_timeline(status))
+
+    def watch(self, interval=POLL_INTERVAL, debounce=DEBOUNCE, stop=None):
+        # 先构建一次，之后每批改动触发一轮；Ctrl+C 退出
+        alg_dir = os.path.join(self.root, self.alg)
+        self.log(f"监视 {alg_dir}（{len(watched_files(alg_dir))} 个文件），改动后构建并{WATCH_ACTIONS[self.action]}，Ctrl+C 退出")
+        self.trigger()
+        try:
+            for changes in poll_changes(alg_dir, interval, debounce, stop):
+                self.trigger(changes)
+        finally:
+            self.cancel()
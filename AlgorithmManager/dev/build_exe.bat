@@ -1,12 +1,12 @@
 @echo off
-REM 打包算法管理程序为可执行文件
-pyinstaller --onefile --name AlgorithmManager main.py
-
-REM 创建上级 dist 目录（如果不存在）
-if not exist "..\dist" mkdir "..\dist"
-
-REM 复制可执行文件到项目 dist
-copy "dist\AlgorithmManager.exe" "..\dist\AlgorithmManager.exe"
+REM 打包算法管理程序为可执行文件（输入未变化时跳过打包），安装到 AlgorithmManager/dist 目录
+REM 可追加参数，如 --onedir（启动更快）、--force、--clean，详见 python installer.py --help
+python installer.py %*
+if errorlevel 1 (
+    echo 打包失败
+    pause
+    exit /b 1
+)
 
 echo 打包完成，可执行文件位于 AlgorithmManager/dist 目录
-pause 
\ No newline at end of file
+pause
@@ -1,72 +1,234 @@
 import os
 import sys
-import subprocess
+import json
+import time
 import shutil
-from tkinter import Tk, filedialog
+import hashlib
+import argparse
+import subprocess
+from importlib import metadata
+from importlib.util import find_spec
+
+from algorithmmanager.paths import cache_dir
 
-# 隐藏主窗口
-root = Tk()
-root.withdraw()
+# 打包流程：在持久的工作目录中生成 spec 并调用 PyInstaller（保留其分析缓存），
+# 源文件、依赖版本与打包选项的哈希未变化时跳过打包，直接安装上次的产物
 
-# 选择输出安装目录
-install_dir = filedialog.askdirectory(title="选择打包后 .exe 的安装目录")
-if not install_dir:
-    print("未选择安装目录，退出。")
-    sys.exit(1)
+APP_NAME = "AlgorithmManager"
 
-# 计算脚本所在目录（AlgorithmManager/dev）和项目根目录
+# 计算脚本所在目录（AlgorithmManager/dev）
 script_dir = os.path.abspath(os.path.dirname(__file__))
-project_root = os.path.abspath(os.path.join(script_dir, '..', '..'))
-
-# 算法子目录列表（项目根目录下，以数字+下划线开头的文件夹）
-alg_dirs = [d for d in os.listdir(project_root)
-            if os.path.isdir(os.path.join(project_root, d)) and d[0].isdigit() and "_" in d]
-
-# PyInstaller 打包命令参数
-icon_path = os.path.join(script_dir, 'img', 'icon.png')
-main_script = os.path.join(script_dir, 'main.py')
-
-# 构建 --add-data 参数，将算法目录和 icon 包含进 exe
-datas = []
-# 添加 icon
-if os.path.exists(icon_path):
-    datas.append(f"{icon_path};img")
-
-# PyInstaller 基本命令
-cmd = [
-    'pyinstaller',
-    '--onefile',
-    '--windowed',
-    '--name', 'AlgorithmManager',
+
+# 参与哈希的文件：入口脚本、引擎包、图标、依赖列表以及本脚本（决定 spec 内容）
+HASH_SOURCES = ("main.py", "installer.py", "requirements.txt", "algorithmmanager", "img")
+# 打包结果还取决于这些已安装包的版本
+HASH_PACKAGES = ("pyinstaller", "PySide6", "shiboken6", "QDarkStyle", "QtPy")
+
+# 程序只用到 QtCore、QtGui 与 QtWidgets，其余 Qt 模块及其插件、其他 Qt 绑定与不需要的库都不打包
+EXCLUDES = [
+    "PySide6.QtNetwork", "PySide6.QtQml", "PySide6.QtQuick", "PySide6.QtQuickWidgets", "PySide6.QtQuick3D",
+    "PySide6.QtWebEngineCore", "PySide6.QtWebEngineWidgets", "PySide6.QtWebChannel", "PySide6.QtWebSockets",
+    "PySide6.QtMultimedia", "PySide6.QtMultimediaWidgets", "PySide6.QtCharts", "PySide6.QtDataVisualization",
+    "PySide6.QtPdf", "PySide6.QtPdfWidgets", "PySide6.QtSql", "PySide6.QtTest", "PySide6.QtBluetooth",
+    "PySide6.QtPositioning", "PySide6.QtLocation", "PySide6.QtSensors", "PySide6.QtSerialPort",
+    "PySide6.QtOpenGL", "PySide6.QtOpenGLWidgets", "PySide6.QtSvg", "PySide6.QtSvgWidgets", "PySide6.QtXml",
+    "PySide6.Qt3DCore", "PySide6.Qt3DRender", "PySide6.QtDesigner", "PySide6.QtHelp", "PySide6.QtUiTools",
+    "PyQt5", "PyQt6", "PySide2", "tkinter", "numpy",
 ]
-# 添加图标
-if os.path.exists(icon_path):
-    cmd += ['--icon', icon_path]
-# 最后添加入口脚本
-cmd.append(main_script)
-
-print('执行打包命令:', ' '.join(cmd))
-result = subprocess.run(cmd)
-if result.returncode != 0:
-    print('打包失败')
-    sys.exit(1)
-
-# 打包结果在 dist/AlgorithmManager.exe
-dist_dir = os.path.join(script_dir, 'dist')
-src_exe = os.path.join(dist_dir, 'AlgorithmManager.exe')
-if os.path.exists(src_exe):
-    dst_exe = os.path.join(install_dir, 'AlgorithmManager.exe')
-    shutil.copy2(src_exe, dst_exe)
-    print(f'打包完成，安装文件复制到 {dst_exe}')
-else:
-    print('未找到生成的 exe 文件')
-
-# 清理 PyInstaller 生成的临时文件
-for name in ['build', 'dist', '__pycache__', 'AlgorithmManager.spec']:
-    p = os.path.join(script_dir, name)
-    if os.path.isdir(p):
-        shutil.rmtree(p)
-    elif os.path.isfile(p):
-        os.remove(p)
-
-print('打包流程完成。') 
\ No newline at end of file
+# 保留的 Qt 插件目录：平台集成、窗口样式与图片格式
+KEEP_PLUGINS = ("platforms", "styles", "imageformats")
+# 保留的 Qt 翻译（界面为中文）
+KEEP_TRANSLATIONS = ("_zh_CN",)
+# 纯 Widgets 程序不需要的大文件（软件 OpenGL 渲染）
+DROP_FILES = ("opengl32sw.dll",)
+
+SPEC_TEMPLATE = """# 由 installer.py 生成，修改请改 installer.py
+import os
+
+KEEP_PLUGINS = {keep_plugins!r}
+KEEP_TRANSLATIONS = {keep_translations!r}
+DROP_FILES = {drop_files!r}
+
+
+def keep(entry):
+    # 去掉未使用的 Qt 插件、翻译与大文件
+    parts = entry[0].replace(os.sep, "/").split("/")
+    if parts[-1].lower() in DROP_FILES:
+        return False
+    if "plugins" in parts[:-1]:
+        i = parts.index("plugins")
+        return i + 1 < len(parts) - 1 and parts[i + 1] in KEEP_PLUGINS
+    if "translations" in parts[:-1]:
+        return any(t in parts[-1] for t in KEEP_TRANSLATIONS)
+    return True
+
+
+a = Analysis(
+    [{main!r}],
+    pathex=[{script_dir!r}],
+    datas={datas!r},
+    excludes={excludes!r},
+    noarchive=False,
+)
+a.binaries = [e for e in a.binaries if keep(e)]
+a.datas = [e for e in a.datas if keep(e)]
+pyz = PYZ(a.pure)
+"""
+
+SPEC_ONEFILE = """
+exe = EXE(pyz, a.scripts, a.binaries, a.datas, [], name={name!r}, console=False, upx=False, icon={icon!r})
+"""
+
+SPEC_ONEDIR = """
+exe = EXE(pyz, a.scripts, [], exclude_binaries=True, name={name!r}, console=False, upx=False, icon={icon!r})
+coll = COLLECT(exe, a.binaries, a.datas, name={name!r}, upx=False)
+"""
+
+
+def _iter_files(path):
+    if os.path.isfile(path):
+        yield path
+        return
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+        for name in sorted(filenames):
+            if not name.endswith((".pyc", ".pyo")):
+                yield os.path.join(dirpath, name)
+
+
+def _package_version(name):
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def input_hash(mode):
+    # 源文件内容、已安装依赖的版本、Python 版本与打包方式共同决定打包结果
+    h = hashlib.sha256()
+    h.update(f"{mode}\0{sys.version}\0".encode("utf-8"))
+    for name in HASH_PACKAGES:
+        h.update(f"{name}={_package_version(name)}\n".encode("utf-8"))
+    for rel in HASH_SOURCES:
+        for path in _iter_files(os.path.join(script_dir, rel)):
+            h.update(os.path.relpath(path, script_dir).replace("\\", "/").encode("utf-8") + b"\0")
+            with open(path, "rb") as f:
+                h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
+
+
+def write_spec(work_dir, mode):
+    icon_path = os.path.join(script_dir, "img", "icon.png")
+    icon = icon_path if os.path.exists(icon_path) else None
+    # 图标同时作为数据文件打包，窗口图标从 img/ 读取
+    datas = [(icon_path, "img")] if icon else []
+    text = SPEC_TEMPLATE.format(keep_plugins=KEEP_PLUGINS, keep_translations=KEEP_TRANSLATIONS, drop_files=DROP_FILES,
+                                main=os.path.join(script_dir, "main.py"), script_dir=script_dir, datas=datas,
+                                excludes=EXCLUDES)
+    text += (SPEC_ONEDIR if mode == "onedir" else SPEC_ONEFILE).format(name=APP_NAME, icon=icon)
+    spec_path = os.path.join(work_dir, f"{APP_NAME}-{mode}.spec")
+    with open(spec_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return spec_path
+
+
+def artifact_path(work_dir, mode):
+    exe_name = APP_NAME + (".exe" if sys.platform.startswith("win") else "")
+    dist_dir = os.path.join(work_dir, "dist")
+    return os.path.join(dist_dir, APP_NAME) if mode == "onedir" else os.path.join(dist_dir, exe_name)
+
+
+def artifact_size(path):
+    return sum(os.path.getsize(p) for p in _iter_files(path)) if os.path.exists(path) else 0
+
+
+def load_stamp(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_stamp(path, stamp):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(stamp, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def run_pyinstaller(work_dir, mode, clean=False):
+    # 工作目录与 spec 保留在 work_dir 中，PyInstaller 据此复用上次的依赖分析结果
+    spec_path = write_spec(work_dir, mode)
+    cmd = [sys.executable, "-m", "PyInstaller", "--noconfirm",
+           "--workpath", os.path.join(work_dir, "build", mode), "--distpath", os.path.join(work_dir, "dist")]
+    if clean:
+        cmd.append("--clean")
+    cmd.append(spec_path)
+    print("执行打包命令:", " ".join(cmd))
+    return subprocess.run(cmd, cwd=script_dir).returncode
+
+
+def install(artifact, install_dir, mode):
+    # 单文件：复制 exe；单目录：复制 exe 与依赖目录（_internal），程序以 exe 所在目录为项目根目录
+    os.makedirs(install_dir, exist_ok=True)
+    if mode == "onefile":
+        dst = os.path.join(install_dir, os.path.basename(artifact))
+        shutil.copy2(artifact, dst)
+        return dst
+    for name in os.listdir(artifact):
+        src, dst = os.path.join(artifact, name), os.path.join(install_dir, name)
+        if os.path.isdir(src):
+            if os.path.isdir(dst):
+                shutil.rmtree(dst)
+            shutil.copytree(src, dst)
+        else:
+            shutil.copy2(src, dst)
+    return install_dir
+
+
+def format_size(size):
+    return f"{size / 1048576:.1f}MB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="把算法管理程序打包为可执行文件")
+    parser.add_argument("--install-dir", default=os.path.abspath(os.path.join(script_dir, "..", "dist")),
+                        help="安装目录，默认 AlgorithmManager/dist")
+    parser.add_argument("--onedir", action="store_true", help="输出为目录（启动时不必解压，比单文件快）")
+    parser.add_argument("--work-dir", default=cache_dir("installer"), help="PyInstaller 工作目录（保留以复用分析结果）")
+    parser.add_argument("--force", action="store_true", help="输入未变化也重新打包")
+    parser.add_argument("--clean", action="store_true", help="清空 PyInstaller 缓存后完整打包")
+    args = parser.parse_args(argv)
+
+    mode = "onedir" if args.onedir else "onefile"
+    work_dir = os.path.abspath(args.work_dir)
+    os.makedirs(work_dir, exist_ok=True)
+    stamp_path = os.path.join(work_dir, f"stamp-{mode}.json")
+    artifact = artifact_path(work_dir, mode)
+    digest = input_hash(mode)
+    stamp = load_stamp(stamp_path)
+
+    if not (args.force or args.clean) and stamp.get("hash") == digest and os.path.exists(artifact):
+        print(f"源文件与依赖未变化，跳过打包（上次打包用时 {stamp['elapsed']:.1f}s）")
+    else:
+        if find_spec("PyInstaller") is None:
+            print("未安装 PyInstaller，请先执行：pip install pyinstaller", file=sys.stderr)
+            return 1
+        start = time.perf_counter()
+        if run_pyinstaller(work_dir, mode, args.clean) != 0 or not os.path.exists(artifact):
+            print("打包失败", file=sys.stderr)
+            return 1
+        elapsed = time.perf_counter() - start
+        stamp = {"hash": digest, "mode": mode, "artifact": artifact, "elapsed": elapsed,
+                 "size": artifact_size(artifact), "built": time.strftime("%Y-%m-%d %H:%M:%S")}
+        save_stamp(stamp_path, stamp)
+        print(f"打包用时 {elapsed:.1f}s")
+
+    dst = install(artifact, os.path.abspath(args.install_dir), mode)
+    print(f"产物大小 {format_size(stamp['size'])}（{mode}），已安装到 {dst}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
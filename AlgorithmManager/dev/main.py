@@ -1,16 +1,112 @@
 import os
+import sys
+import time
+
+
+# 启动耗时统计（--startup-profile）：按阶段记录，窗口显示并加载完算法列表后输出。
+# 定义在导入 Qt 之前，导入本身的耗时也计入
+class StartupProfile:
+    def __init__(self, start=None):
+        self.start = self.last = start or time.perf_counter()
+        self.stages = []
+
+    def mark(self, name, now=None):
+        now = now or time.perf_counter()
+        self.stages.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        lines = ["启动耗时："]
+        for name, dur in self.stages:
+            lines.append(f"  {dur * 1000:>8.1f}ms  {name}")
+        lines.append(f"  {(self.last - self.start) * 1000:>8.1f}ms  合计")
+        return "\n".join(lines)
+
+
+startup_profile = StartupProfile()
 os.environ['QT_API'] = 'pyside6'  # 确保 qtpy 使用 pyside6
 import warnings
-import sys
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget,
     QVBoxLayout, QHBoxLayout, QLabel,
-    QComboBox, QLineEdit, QPushButton, QTextEdit, QDialog, QFormLayout, QDialogButtonBox, QSpinBox, QListWidget, QListWidgetItem, QPlainTextEdit
+    QComboBox, QLineEdit, QPushButton, QDialog, QFormLayout, QDialogButtonBox, QSpinBox, QListWidget, QListWidgetItem, QPlainTextEdit,
+    QCheckBox, QTableWidget, QTableWidgetItem, QAbstractItemView, QScrollArea, QFileDialog
 )
-from PySide6.QtCore import QProcess, Qt
-from PySide6.QtGui import QIcon
-import qdarkstyle
-import shutil, subprocess
+from PySide6.QtCore import QProcess, Qt, QObject, Signal, QTimer, QUrl, QRectF, QFileSystemWatcher, QFile, QIODevice, qVersion
+from PySide6.QtGui import QIcon, QFontDatabase, QDesktopServices, QPainter, QColor, QPalette
+startup_profile.mark("导入 PySide6")
+import re
+import math
+import threading
+from algorithmmanager.engine import BuildJob, project_root, default_params, algorithm_params, format_summary, run_executable, GENERATOR_CHOICES, WINDOWS
+from algorithmmanager.artifacts import get_cache, format_stats
+from algorithmmanager.toolchain import get_registry
+from algorithmmanager.logpipe import StreamDecoder, LogBuffer, new_log_path
+from algorithmmanager.testrunner import discover_cases, run_tests, format_report, TESTS_DIR, DEFAULT_MEMORY_LIMIT_MB
+from algorithmmanager.timeline import load_records, export_chrome_trace, assign_lanes, PHASE_LABELS
+from algorithmmanager.watch import watched_dirs, watched_files, snapshot, diff, DEBOUNCE, WATCH_ACTIONS
+from algorithmmanager.procstats import kill_tree, format_rss
+from algorithmmanager.projectindex import get_index, exec_candidates, capi_sources
+from algorithmmanager.paths import cache_dir
+from algorithmmanager.runcapture import load_history, format_size, status_text, OutputPager, STREAMS
+# 优化对比（bench、statistics）、守护进程客户端与 qdarkstyle 在用到时才导入，缩短启动时间
+startup_profile.mark("导入 algorithmmanager")
+
+# 日志界面最多保留的行数（更早的行只保存在磁盘日志文件中）
+LOG_MAX_LINES = 200000
+# 日志刷新到界面的间隔（毫秒）
+LOG_FLUSH_INTERVAL = 50
+
+# 样式表中引用的 Qt 资源（qdarkstyle 的图标）
+STYLE_RESOURCE_RE = re.compile(r'url\("?(:/[^")]+)"?\)')
+
+
+def load_stylesheet(app):
+    # qdarkstyle 每次生成样式表都要导入体积很大的图标资源模块。首次生成后把样式表连同引用的图标写入缓存目录
+    # （按 qdarkstyle 版本、Qt 版本与平台区分），之后启动直接读取文件。返回 (样式表, 是否命中缓存)
+    import qdarkstyle
+    from qdarkstyle.dark.palette import DarkPalette
+    style_dir = cache_dir("style", f"qdarkstyle-{qdarkstyle.__version__}-qt{qVersion()}-{sys.platform}")
+    qss_path = os.path.join(style_dir, "darkstyle.qss")
+    try:
+        with open(qss_path, "r", encoding="utf-8") as f:
+            stylesheet = f.read()
+    except OSError:
+        stylesheet = None
+    if stylesheet is not None:
+        # load_stylesheet 还会把超链接颜色设为主题色，命中缓存时自行设置
+        palette = app.palette()
+        palette.setColor(QPalette.Normal, QPalette.Link, QColor(DarkPalette.COLOR_ACCENT_3))
+        app.setPalette(palette)
+        return stylesheet, True
+    stylesheet = qdarkstyle.load_stylesheet()
+    try:
+        save_stylesheet(stylesheet, style_dir, qss_path)
+    except OSError:
+        pass
+    return stylesheet, False
+
+
+def save_stylesheet(stylesheet, style_dir, qss_path):
+    # 资源路径 :/qss_icons/... 改为缓存目录中的文件路径；图标先写入，样式表最后原子替换
+    def extract(match):
+        resource = match.group(1)
+        path = os.path.join(style_dir, *resource[2:].split("/"))
+        if not os.path.exists(path):
+            f = QFile(resource)
+            if not f.open(QIODevice.ReadOnly):
+                raise OSError(f"无法读取资源：{resource}")
+            data = f.readAll().data()
+            f.close()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as out:
+                out.write(data)
+        return f'url("{path.replace(os.sep, "/")}")'
+    cached = STYLE_RESOURCE_RE.sub(extract, stylesheet)
+    tmp = f"{qss_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(cached)
+    os.replace(tmp, qss_path)
 
 # 预览对话框
 class PreviewDialog(QDialog):
@@ -33,19 +129,18 @@ class PreviewDialog(QDialog):
 
 # 参数设置对话框（CMake 参数）
 class ParamsDialog(QDialog):
-    def __init__(self, parent=None, alg_name="", alg_dir=""):
+    # sources：项目索引中记录的源文件（相对路径）；params：上次保存的参数，用于恢复界面
+    def __init__(self, parent=None, alg_name="", alg_dir="", sources=(), params=None):
         super().__init__(parent)
         self.alg_name = alg_name
         self.alg_dir = alg_dir
-        # 前置获取：系统 CMake 可执行文件与版本
-        self.default_cmake_path = shutil.which("cmake") or ""
-        try:
-            out = subprocess.check_output([self.default_cmake_path, "--version"], universal_newlines=True)
-            self.system_cmake_version = out.splitlines()[0]
-        except Exception:
-            self.system_cmake_version = ""
+        # 前置获取：系统 CMake 可执行文件与版本（读取工具链缓存，不在界面线程中探测）
+        toolchains = get_registry()
+        cmake = toolchains.lookup("cmake")
+        self.default_cmake_path = toolchains.path_of("cmake")
+        self.system_cmake_version = cmake["version"] if cmake else ""
         # 检测 GCC 编译器
-        self.default_gpp = shutil.which("g++") or ""
+        self.default_gpp = toolchains.path_of("gcc")
 
         self.setWindowTitle("CMake 参数设置")
         self.resize(500, 500)
@@ -65,30 +160,26 @@ class ParamsDialog(QDialog):
         self.spin_cxx_standard.setValue(17)
         layout.addRow("C++ 标准：", self.spin_cxx_standard)
 
-        # 添加可执行程序（仅包含根目录 main.cpp 及 src 目录下的 .cpp 文件）
+        # 添加可执行程序（仅包含根目录 main.cpp 及 src 目录下的 .cpp 文件，capi.cpp 属于动态库）
         self.list_execs = QListWidget()
-        # 根目录
-        root_main = os.path.join(alg_dir, "main.cpp")
-        if os.path.exists(root_main):
-            item = QListWidgetItem("main.cpp")
+        for rel in exec_candidates(sources):
+            item = QListWidgetItem(rel)
             item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
             item.setCheckState(Qt.Checked)
             self.list_execs.addItem(item)
-        # src 目录
-        src_dir = os.path.join(alg_dir, "src")
-        if os.path.isdir(src_dir):
-            for f in os.listdir(src_dir):
-                if f.endswith(".cpp"):
-                    rel = os.path.join("src", f).replace("\\", "/")
-                    item = QListWidgetItem(rel)
-                    item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
-                    item.setCheckState(Qt.Checked)
-                    self.list_execs.addItem(item)
         layout.addRow("添加可执行程序：", self.list_execs)
+        # 同时生成导出 C 接口的动态库（源文件为 capi.cpp），供 Python 通过 ctypes 在进程内调用
+        self.chk_shared_lib = QCheckBox("生成动态库（C 接口）")
+        self.capi_sources = capi_sources(sources)
+        self.chk_shared_lib.setEnabled(bool(self.capi_sources))
+        if not self.capi_sources:
+            self.chk_shared_lib.setToolTip("未找到 capi.cpp")
+        layout.addRow("动态库：", self.chk_shared_lib)
 
         # 编译环境（从系统环境变量中获取）
         self.combo_env = QComboBox()
-        envs = ["MSVC"]
+        # MSVC 仅在 Windows 上可用
+        envs = ["MSVC"] if WINDOWS else []
         if self.default_gpp:
             envs.append("GCC")
         envs.append("手动")
@@ -103,11 +194,29 @@ class ParamsDialog(QDialog):
         self.combo_arch.addItems(["x86", "x64"])
         self.combo_arch.setCurrentText("x64")
         layout.addRow("目标架构：", self.combo_arch)
+        # 构建类型
+        self.combo_build_type = QComboBox()
+        self.combo_build_type.addItems(["Debug", "Release", "RelWithDebInfo", "MinSizeRel"])
+        self.combo_build_type.setCurrentText("Release")
+        layout.addRow("构建类型：", self.combo_build_type)
+        # 生成器选择（自动时优先 Ninja）
+        self.combo_generator = QComboBox()
+        self.combo_generator.addItems(GENERATOR_CHOICES)
+        layout.addRow("生成器：", self.combo_generator)
+        # 并行编译数，传给 cmake --build --parallel
+        self.spin_jobs = QSpinBox()
+        self.spin_jobs.setRange(0, 256)
+        self.spin_jobs.setSpecialValueText("自动")
+        self.spin_jobs.setValue(0)
+        layout.addRow("并行编译数：", self.spin_jobs)
+        # 逐编译单元计时：clang 加 -ftime-trace，MSVC 加 /Bt+（Ninja 日志总是会读取）
+        self.chk_tu_profile = QCheckBox("逐编译单元计时")
+        layout.addRow("耗时分析：", self.chk_tu_profile)
         def on_env_changed(idx):
             env = self.combo_env.currentText()
             if env == "MSVC":
                 # 从系统 PATH 查找 cl
-                self.edit_custom_compiler.setText(shutil.which("cl") or "")
+                self.edit_custom_compiler.setText(toolchains.path_of("cl"))
                 self.edit_custom_compiler.setEnabled(False)
             elif env == "GCC":
                 self.edit_custom_compiler.setText(self.default_gpp)
@@ -134,6 +243,33 @@ class ParamsDialog(QDialog):
         btns.rejected.connect(self.reject)
         self.btn_preview_cmake.clicked.connect(self.on_preview_cmake)
         self.btn_preview_cmd.clicked.connect(self.on_preview_cmd)
+        if params:
+            self.apply_params(params)
+
+    def apply_params(self, params):
+        # 恢复上次保存的参数，缺少的项保持默认值
+        if params.get("cmake_version_req"):
+            self.edit_cmake_version.setText(params["cmake_version_req"])
+        if params.get("project_name"):
+            self.edit_project_name.setText(params["project_name"])
+        if params.get("cxx_standard"):
+            self.spin_cxx_standard.setValue(params["cxx_standard"])
+        if params.get("execs") is not None:
+            for i in range(self.list_execs.count()):
+                item = self.list_execs.item(i)
+                item.setCheckState(Qt.Checked if item.text() in params["execs"] else Qt.Unchecked)
+        if self.combo_env.findText(params.get("env", "")) >= 0:
+            self.combo_env.setCurrentText(params["env"])
+            if params["env"] == "手动":
+                self.edit_custom_compiler.setText(params.get("compiler_path", ""))
+        for combo, key in ((self.combo_arch, "arch"), (self.combo_build_type, "build_type"), (self.combo_generator, "generator")):
+            if combo.findText(params.get(key, "")) >= 0:
+                combo.setCurrentText(params[key])
+        self.spin_jobs.setValue(params.get("jobs") or 0)
+        self.chk_tu_profile.setChecked(bool(params.get("tu_profile")))
+        self.chk_shared_lib.setChecked(bool(params.get("shared_lib")) and self.chk_shared_lib.isEnabled())
+        self.preview_cmakelists = params.get("preview_cmakelists")
+        self.preview_cmd = params.get("preview_cmd")
 
     def on_preview_cmake(self):
         content = self.generate_cmakelists()
@@ -159,6 +295,13 @@ class ParamsDialog(QDialog):
                 src = item.text()
                 name = os.path.splitext(os.path.basename(src))[0]
                 lines.append(f"add_executable({name} {src})")
+        if self.chk_shared_lib.isChecked():
+            lib = self.edit_project_name.text().lower()
+            lines.append('option(BUILD_SHARED_API "同时构建导出 C 接口的动态库" ON)')
+            lines.append("if(BUILD_SHARED_API)")
+            lines.append(f"    add_library({lib}_capi SHARED {' '.join(self.capi_sources)})")
+            lines.append(f"    set_target_properties({lib}_capi PROPERTIES OUTPUT_NAME {lib} CXX_VISIBILITY_PRESET hidden VISIBILITY_INLINES_HIDDEN ON)")
+            lines.append("endif()")
         return "\n".join(lines)
 
     def generate_compile_cmd(self):
@@ -168,8 +311,9 @@ class ParamsDialog(QDialog):
             parts.append(f"call {self.edit_custom_compiler.text()}")
             parts.append("popd")
         parts.append(f"cd {self.alg_dir}/build")
-        parts.append(f"cmake -S {self.alg_dir} -B {self.alg_dir}/build -DCMAKE_BUILD_TYPE={self.spin_cxx_standard.value()}")
-        parts.append(f"cmake --build {self.alg_dir}/build --config {self.spin_cxx_standard.value()}")
+        build_type = self.combo_build_type.currentText()
+        parts.append(f"cmake -S {self.alg_dir} -B {self.alg_dir}/build -DCMAKE_BUILD_TYPE={build_type} -DBUILD_MODE={build_type}")
+        parts.append(f"cmake --build {self.alg_dir}/build --config {build_type}")
         return "\n".join(parts)
 
     def get_params(self):
@@ -183,29 +327,575 @@ class ParamsDialog(QDialog):
             "preview_cmakelists": getattr(self, "preview_cmakelists", None),
             "preview_cmd": getattr(self, "preview_cmd", None),
             "cmake_path": self.default_cmake_path,
-            "arch": self.combo_arch.currentText()
+            "arch": self.combo_arch.currentText(),
+            "build_type": self.combo_build_type.currentText(),
+            "generator": self.combo_generator.currentText(),
+            "jobs": self.spin_jobs.value(),
+            "tu_profile": self.chk_tu_profile.isChecked(),
+            "shared_lib": self.chk_shared_lib.isChecked()
         }
 
+# 批量构建调度器：同时最多运行 max_jobs 个配置/构建任务
+class BatchScheduler(QObject):
+    job_status = Signal(str, str, float)  # 算法名、状态、耗时（秒）
+    job_output = Signal(str, list)        # 算法名、完整的输出行
+    all_finished = Signal(list)           # 全部结束后的结果列表
+
+    def __init__(self, parent, root, algs, max_jobs, clean=False):
+        super().__init__(parent)
+        self.root = root
+        self.max_jobs = max(1, max_jobs)
+        self.clean = clean
+        self.pending = list(algs)
+        self.running = {}
+        self.results = []
+        self.cancelled = False
+        self.done = False
+        # 每个构建任务分到的并行编译数，避免总线程数远超核心数
+        self.build_jobs = max(1, (os.cpu_count() or 1) // self.max_jobs)
+
+    def start(self):
+        self._fill()
+
+    def cancel(self):
+        self.cancelled = True
+        for alg in self.pending:
+            self.results.append({"alg": alg, "status": "已取消", "elapsed": 0.0})
+            self.job_status.emit(alg, "已取消", 0.0)
+        self.pending = []
+        for job in list(self.running.values()):
+            proc = job.get("proc")
+            if proc is not None and proc.state() != QProcess.NotRunning:
+                # 连同 cmake 启动的 ninja/make 与编译器一起结束
+                kill_tree(proc.processId())
+
+    def _fill(self):
+        while self.pending and len(self.running) < self.max_jobs:
+            self._start_job(self.pending.pop(0))
+        if not self.pending and not self.running and not self.done:
+            self.done = True
+            self.all_finished.emit(self.results)
+
+    def _start_job(self, alg):
+        job = {"alg": alg, "start": time.perf_counter(), "proc": None, "build": None}
+        self.running[alg] = job
+        # 每个子项目使用自己保存的参数，与单独构建时的增量指纹一致
+        build = BuildJob(self.root, alg, algorithm_params(self.root, alg), clean=self.clean, jobs=self.build_jobs)
+        if not build.has_cmakelists():
+            self._finish(job, "缺少CMakeLists")
+            return
+        job["build"] = build
+        with build.timeline.phase("cache"):
+            hit = build.restore_artifacts(lambda line: self.job_output.emit(alg, [line]))
+        if hit:
+            self._finish(job, "命中缓存")
+            return
+        if build.prepare() is None:
+            self._build(job, build)
+            return
+        self.job_status.emit(alg, "配置中", 0.0)
+        build.timeline.begin("configure")
+
+        def on_configured(code):
+            build.timeline.end("configure")
+            if code != 0:
+                self._finish(job, "配置失败")
+                return
+            build.configured()
+            self._build(job, build)
+        self._run(job, build.config_args(), on_configured)
+
+    def _build(self, job, build):
+        self.job_status.emit(job["alg"], "构建中", time.perf_counter() - job["start"])
+        build.begin_build()
+        self._run(job, build.build_args(), lambda code: self._on_built(job, build, code), build.timeline.observe_lines)
+
+    def _on_built(self, job, build, code):
+        build.end_build()
+        if code == 0:
+            build.store_artifacts(lambda line: self.job_output.emit(job["alg"], [line]))
+        self._finish(job, "成功" if code == 0 else "构建失败")
+
+    def _run(self, job, args, on_done, observe=None):
+        proc = QProcess(self)
+        job["proc"] = proc
+        proc.setWorkingDirectory(self.root)
+        # 每个输出流使用独立的增量解码器
+        decoders = {False: StreamDecoder(), True: StreamDecoder()}
+
+        def read(is_err, final=False):
+            raw = (proc.readAllStandardError() if is_err else proc.readAllStandardOutput()).data()
+            lines = decoders[is_err].feed(raw)
+            if final:
+                lines += decoders[is_err].finish()
+            if lines:
+                if observe:
+                    observe(lines)
+                self.job_output.emit(job["alg"], lines)
+
+        def on_finished(code, status):
+            read(False, True)
+            read(True, True)
+            if self.cancelled:
+                self._finish(job, "已取消")
+            else:
+                on_done(code)
+
+        def on_error(error):
+            # 程序无法启动（如 cmake 路径错误）时不会发出 finished，按失败结束该任务
+            if error == QProcess.FailedToStart:
+                self.job_output.emit(job["alg"], [f"无法启动 {args[0]}：{proc.errorString()}"])
+                on_finished(-1, QProcess.CrashExit)
+        proc.readyReadStandardOutput.connect(lambda: read(False))
+        proc.readyReadStandardError.connect(lambda: read(True))
+        proc.finished.connect(on_finished)
+        proc.errorOccurred.connect(on_error)
+        proc.start(args[0], args[1:])
+
+    def _finish(self, job, status):
+        elapsed = time.perf_counter() - job["start"]
+        if job.get("build") is not None:
+            job["build"].finish_timeline(status)
+        self.results.append({"alg": job["alg"], "status": status, "elapsed": elapsed})
+        self.job_status.emit(job["alg"], status, elapsed)
+        self.running.pop(job["alg"], None)
+        # 缺少 CMakeLists、命中缓存的任务在 _fill 的循环中同步结束，推迟到事件循环中再补充任务，避免递归
+        QTimer.singleShot(0, self._fill)
+
+# 批量编译对话框：勾选子项目、设置并发数并查看每个任务的状态
+class BatchBuildDialog(QDialog):
+    def __init__(self, parent, root, algs, clean=False, log=None):
+        super().__init__(parent)
+        self.root = root
+        self.clean = clean
+        self.log = log or (lambda text: None)
+        self.scheduler = None
+        self.setWindowTitle("批量编译")
+        self.resize(600, 500)
+        layout = QVBoxLayout(self)
+
+        self.list_algs = QListWidget()
+        for alg in algs:
+            item = QListWidgetItem(alg)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            self.list_algs.addItem(item)
+        layout.addWidget(self.list_algs)
+
+        form = QFormLayout()
+        self.spin_jobs = QSpinBox()
+        self.spin_jobs.setRange(1, 256)
+        self.spin_jobs.setValue(os.cpu_count() or 1)
+        form.addRow("并发任务数：", self.spin_jobs)
+        layout.addLayout(form)
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["算法", "状态", "耗时(秒)"])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        self.btn_start = QPushButton("开始")
+        self.btn_cancel = QPushButton("取消")
+        self.btn_cancel.setEnabled(False)
+        btn_close = QPushButton("关闭")
+        hbox = QHBoxLayout()
+        hbox.addStretch()
+        hbox.addWidget(self.btn_start)
+        hbox.addWidget(self.btn_cancel)
+        hbox.addWidget(btn_close)
+        layout.addLayout(hbox)
+        self.btn_start.clicked.connect(self.on_start)
+        self.btn_cancel.clicked.connect(lambda: self.scheduler and self.scheduler.cancel())
+        btn_close.clicked.connect(self.close)
+        self.rows = {}
+
+    def on_start(self):
+        algs = [self.list_algs.item(i).text() for i in range(self.list_algs.count())
+                if self.list_algs.item(i).checkState() == Qt.Checked]
+        if not algs:
+            return
+        self.table.setRowCount(len(algs))
+        self.rows = {}
+        for row, alg in enumerate(algs):
+            self.rows[alg] = row
+            self.table.setItem(row, 0, QTableWidgetItem(alg))
+            self.table.setItem(row, 1, QTableWidgetItem("等待"))
+            self.table.setItem(row, 2, QTableWidgetItem(""))
+        self.btn_start.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+        self.log(f"开始批量编译 {len(algs)} 个子项目，并发数={self.spin_jobs.value()}")
+        self.scheduler = BatchScheduler(self, self.root, algs, self.spin_jobs.value(), self.clean)
+        self.scheduler.job_status.connect(self.on_job_status)
+        self.scheduler.job_output.connect(lambda alg, lines: self.log("\n".join(f"[{alg}] {line}" for line in lines)))
+        self.scheduler.all_finished.connect(self.on_all_finished)
+        self.scheduler.start()
+
+    def on_job_status(self, alg, status, elapsed):
+        row = self.rows[alg]
+        self.table.item(row, 1).setText(status)
+        self.table.item(row, 2).setText(f"{elapsed:.2f}")
+
+    def on_all_finished(self, results):
+        self.btn_start.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+        self.log("批量编译结束：\n" + format_summary(results))
+        self.log(format_stats(get_cache().stats()))
+
+# 时间线视图：第一行为构建各阶段，下面按并行度分行显示编译单元
+class TimelineView(QWidget):
+    ROW_HEIGHT = 22
+    LABEL_WIDTH = 90
+    COLORS = {
+        "toolchain": "#8e7cc3",
+        "cache": "#76a5af",
+        "configure": "#e69138",
+        "build": "#6aa84f",
+        "run": "#3d85c6",
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.record = None
+        self.lanes = []
+
+    def set_record(self, record):
+        self.record = record
+        self.lanes = assign_lanes(record.get("units", [])) if record else []
+        rows = 1 + (max(lane for lane, _ in self.lanes) + 1 if self.lanes else 0)
+        self.setMinimumHeight((rows + 1) * self.ROW_HEIGHT + 8)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().base())
+        if not self.record or not self.record["phases"]:
+            painter.drawText(self.rect(), Qt.AlignCenter, "没有耗时记录")
+            return
+        total = max(p["end"] for p in self.record["phases"]) or 1e-9
+        width = max(1, self.width() - self.LABEL_WIDTH - 10)
+        scale = width / total
+        h = self.ROW_HEIGHT
+        text_color = self.palette().text().color()
+
+        # 时间刻度
+        painter.setPen(text_color)
+        step = 10 ** math.floor(math.log10(total))
+        while total / step < 4:
+            step /= 2
+        for i in range(int(total / step) + 1):
+            x = self.LABEL_WIDTH + i * step * scale
+            painter.drawLine(int(x), h - 4, int(x), h)
+            painter.drawText(int(x) + 2, h - 6, f"{i * step:g}s")
+
+        def bar(row, start, dur, color, label):
+            rect = QRectF(self.LABEL_WIDTH + start * scale, (row + 1) * h + 2, max(1.0, dur * scale - 1), h - 4)
+            painter.fillRect(rect, QColor(color))
+            painter.setPen(QColor("#ffffff"))
+            painter.drawText(rect.adjusted(3, 0, 0, 0), Qt.AlignVCenter | Qt.AlignLeft, label)
+
+        painter.setPen(text_color)
+        painter.drawText(4, h + h - 6, "阶段")
+        for p in self.record["phases"]:
+            dur = p["end"] - p["start"]
+            bar(0, p["start"], dur, self.COLORS.get(p["name"], "#999999"), f"{PHASE_LABELS.get(p['name'], p['name'])} {dur:.2f}s")
+        for lane, u in self.lanes:
+            painter.setPen(text_color)
+            painter.drawText(4, (lane + 2) * h + h - 6, f"编译 {lane + 1}")
+            bar(lane + 1, u["start"], u["dur"], "#38761d", f"{os.path.basename(u['name'])} {u['dur']:.2f}s")
+
+# 耗时分析对话框：查看某个算法最近的构建时间线，并导出为 Chrome trace
+class TimelineDialog(QDialog):
+    def __init__(self, parent, alg):
+        super().__init__(parent)
+        self.alg = alg
+        self.setWindowTitle(f"耗时分析 - {alg}")
+        self.resize(800, 400)
+        layout = QVBoxLayout(self)
+
+        self.records = list(reversed(load_records(alg)))
+        self.combo_record = QComboBox()
+        for r in self.records:
+            when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r["started"]))
+            total = max((p["end"] for p in r["phases"]), default=0.0)
+            self.combo_record.addItem(f"{when}  {r['config']}  {r['status']}  {total:.2f}s")
+        layout.addWidget(self.combo_record)
+
+        self.view = TimelineView()
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(self.view)
+        layout.addWidget(scroll)
+
+        btn_export = QPushButton("导出 Chrome Trace")
+        btn_close = QPushButton("关闭")
+        btn_export.setEnabled(bool(self.records))
+        hbox = QHBoxLayout()
+        hbox.addStretch()
+        hbox.addWidget(btn_export)
+        hbox.addWidget(btn_close)
+        layout.addLayout(hbox)
+        self.combo_record.currentIndexChanged.connect(self.on_record_changed)
+        btn_export.clicked.connect(self.on_export)
+        btn_close.clicked.connect(self.close)
+        self.on_record_changed(0)
+
+    def on_record_changed(self, index):
+        self.view.set_record(self.records[index] if 0 <= index < len(self.records) else None)
+
+    def on_export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出 Chrome Trace", f"{self.alg}-trace.json", "JSON (*.json)")
+        if path:
+            # 导出当前选中的记录，可在 chrome://tracing 或 Perfetto 中打开
+            export_chrome_trace([self.records[self.combo_record.currentIndex()]], path)
+
+# 运行记录对话框：列出某个算法最近的受管运行，分页查看其 stdout/stderr 输出文件
+class RunHistoryDialog(QDialog):
+    def __init__(self, parent, alg):
+        super().__init__(parent)
+        self.setWindowTitle(f"运行记录 - {alg}")
+        self.resize(900, 600)
+        layout = QVBoxLayout(self)
+
+        self.records = list(reversed(load_history(alg)))
+        self.table = QTableWidget(len(self.records), 7)
+        self.table.setHorizontalHeaderLabels(["时间", "状态", "墙钟(秒)", "CPU(秒)", "峰值内存", "stdout", "stderr"])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        for row, r in enumerate(self.records):
+            out = r["outputs"]
+            cells = [time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r["started"])), status_text(r),
+                     f"{r['wall']:.3f}", f"{r['cpu']:.3f}", format_rss(r["peak_rss"])]
+            # 超过上限被丢弃的输出标在大小之后
+            for name in STREAMS:
+                text = format_size(out[name]["bytes"])
+                cells.append(text + (f"（丢弃 {format_size(out[name]['truncated'])}）" if out[name]["truncated"] else ""))
+            for col, text in enumerate(cells):
+                self.table.setItem(row, col, QTableWidgetItem(text))
+        layout.addWidget(self.table)
+
+        self.combo_stream = QComboBox()
+        self.combo_stream.addItems(STREAMS)
+        self.spin_page = QSpinBox()
+        self.spin_page.setRange(1, 1)
+        self.label_pages = QLabel()
+        btn_prev = QPushButton("上一页")
+        btn_next = QPushButton("下一页")
+        btn_close = QPushButton("关闭")
+        hbox = QHBoxLayout()
+        hbox.addWidget(self.combo_stream)
+        hbox.addWidget(btn_prev)
+        hbox.addWidget(self.spin_page)
+        hbox.addWidget(self.label_pages)
+        hbox.addWidget(btn_next)
+        hbox.addStretch()
+        hbox.addWidget(btn_close)
+        layout.addLayout(hbox)
+
+        # 只加载当前页，几百 MB 的输出也不会一次读入内存
+        self.output = QPlainTextEdit()
+        self.output.setReadOnly(True)
+        self.output.setUndoRedoEnabled(False)
+        self.output.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.output.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        layout.addWidget(self.output, 1)
+
+        self.pager = None
+        self.table.currentCellChanged.connect(lambda row, *_: self.on_output_changed())
+        self.combo_stream.currentIndexChanged.connect(lambda _: self.on_output_changed())
+        self.spin_page.valueChanged.connect(self.on_page_changed)
+        btn_prev.clicked.connect(lambda: self.spin_page.setValue(self.spin_page.value() - 1))
+        btn_next.clicked.connect(lambda: self.spin_page.setValue(self.spin_page.value() + 1))
+        btn_close.clicked.connect(self.close)
+        if self.records:
+            self.table.selectRow(0)
+
+    def on_output_changed(self):
+        row = self.table.currentRow()
+        if not 0 <= row < len(self.records):
+            return
+        info = self.records[row]["outputs"][self.combo_stream.currentText()]
+        self.pager = OutputPager(info["path"]) if os.path.exists(info["path"]) else None
+        pages = self.pager.page_count() if self.pager else 1
+        self.spin_page.blockSignals(True)
+        self.spin_page.setRange(1, pages)
+        self.spin_page.setValue(1)
+        self.spin_page.blockSignals(False)
+        self.label_pages.setText(f"/ {pages} 页")
+        self.on_page_changed(1)
+
+    def on_page_changed(self, page):
+        if self.pager is None:
+            self.output.setPlainText("输出文件已被清理（只保留最近的运行）")
+            return
+        self.output.setPlainText(self.pager.read_page(page - 1))
+
+# 后台任务：在线程中执行耗时的引擎调用（日志缓冲是线程安全的），结束后通过信号把结果交回界面线程
+class TaskWorker(QObject):
+    finished = Signal(object)
+
+    def __init__(self, name, fn):
+        super().__init__()
+        self.name = name
+        self.fn = fn
+
+    def start(self):
+        threading.Thread(target=lambda: self.finished.emit(self.fn()), name=self.name, daemon=True).start()
+
+# 优化变体对比：在后台线程中并发构建各变体，再依次做性能测试
+def compare_variants(root, alg, names, params, clean, sizes, case, baseline, log):
+    from algorithmmanager import variants
+    builds = variants.run_variants(root, alg, names, params, clean=clean, case=case, log=log)
+    results = variants.bench_variants(builds, alg, sizes, case=case, repeat=5, warmup=1, log=log)
+    table = variants.speedup_table(results, baseline) if results else {"baseline": baseline, "rows": []}
+    if results:
+        log(variants.format_speedups(table, sizes))
+        path = variants.default_result_path(alg)
+        variants.save_result(builds, results, table, path)
+        get_index(root).record_bench(alg, "variants", path, variants.summary_text(table))
+        log(f"结果已保存：{path}")
+    return builds, table
+
+class VariantDialog(QDialog):
+    def __init__(self, parent, root, alg, params, clean=False, log=None):
+        super().__init__(parent)
+        from algorithmmanager import variants
+        self.variants = variants
+        self.root = root
+        self.alg = alg
+        self.params = params
+        self.clean = clean
+        self.log = log or (lambda text: None)
+        self.worker = None
+        self.setWindowTitle(f"优化对比 - {alg}")
+        self.resize(700, 500)
+        layout = QVBoxLayout(self)
+
+        self.list_variants = QListWidget()
+        for name in variants.DEFAULT_VARIANTS:
+            item = QListWidgetItem(name)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            self.list_variants.addItem(item)
+        layout.addWidget(self.list_variants)
+
+        form = QFormLayout()
+        # 其他变体：优化级别加可选的 lto / native / pgo，如 O3-lto-native
+        self.edit_extra = QLineEdit()
+        self.edit_extra.setPlaceholderText("如 O3-lto-native Os，空格分隔")
+        form.addRow("其他变体：", self.edit_extra)
+        self.edit_sizes = QLineEdit("10000,100000,1000000")
+        form.addRow("输入规模：", self.edit_sizes)
+        self.edit_case = QLineEdit()
+        self.edit_case.setPlaceholderText("默认")
+        form.addRow("输入用例：", self.edit_case)
+        self.combo_baseline = QComboBox()
+        self.combo_baseline.addItems(variants.DEFAULT_VARIANTS)
+        self.combo_baseline.setCurrentText(variants.DEFAULT_BASELINE)
+        form.addRow("基线变体：", self.combo_baseline)
+        layout.addLayout(form)
+
+        self.table = QTableWidget(0, 2)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        self.btn_start = QPushButton("开始")
+        btn_close = QPushButton("关闭")
+        hbox = QHBoxLayout()
+        hbox.addStretch()
+        hbox.addWidget(self.btn_start)
+        hbox.addWidget(btn_close)
+        layout.addLayout(hbox)
+        self.btn_start.clicked.connect(self.on_start)
+        btn_close.clicked.connect(self.close)
+
+    def on_start(self):
+        names = [self.list_variants.item(i).text() for i in range(self.list_variants.count())
+                 if self.list_variants.item(i).checkState() == Qt.Checked]
+        names += [n for n in self.edit_extra.text().split() if n not in names]
+        try:
+            for name in names:
+                self.variants.parse_variant(name)
+            self.sizes = [int(x) for x in self.edit_sizes.text().split(",") if x.strip()]
+        except ValueError as e:
+            self.log(f"优化对比参数错误：{e}")
+            return
+        if not names or not self.sizes:
+            return
+        self.btn_start.setEnabled(False)
+        self.table.clear()
+        self.table.setRowCount(0)
+        self.log(f"开始优化对比：{self.alg}，变体 {', '.join(names)}")
+        args = (self.root, self.alg, names, self.params, self.clean, self.sizes,
+                self.edit_case.text().strip() or None, self.combo_baseline.currentText(), self.log)
+        self.worker = TaskWorker("variants", lambda: compare_variants(*args))
+        self.worker.finished.connect(lambda result: self.on_finished(*result))
+        self.worker.start()
+
+    def on_finished(self, builds, table):
+        self.btn_start.setEnabled(True)
+        rows = {r["variant"]: r for r in table["rows"]}
+        self.table.setColumnCount(2 + len(self.sizes))
+        self.table.setHorizontalHeaderLabels(["变体", "状态"] + [f"n={n}" for n in self.sizes])
+        self.table.setRowCount(len(builds))
+        for i, b in enumerate(builds):
+            self.table.setItem(i, 0, QTableWidgetItem(b["variant"]))
+            self.table.setItem(i, 1, QTableWidgetItem(b["status"]))
+            cells = rows.get(b["variant"], {}).get("cells", {})
+            for j, n in enumerate(self.sizes):
+                c = cells.get(n)
+                text = f"{c['median'] * 1000:.3f}ms  x{c['speedup']:.2f}" if c and c["speedup"] else "-"
+                self.table.setItem(i, 2 + j, QTableWidgetItem(text))
+        self.log(f"优化对比结束（基线 {table['baseline']}）")
+
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # profile：传入 StartupProfile 时，加载完算法列表后在日志中输出启动耗时
+    def __init__(self, profile=None):
         super().__init__()
         # 设置窗口标题和图标
         self.setWindowTitle("算法管理程序")
         icon_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "img", "icon.png"))
         self.setWindowIcon(QIcon(icon_path))
         self.resize(800, 600)
+        # 日志：有界缓冲 + 定时批量刷新到界面，完整日志写入磁盘
+        self.log_buffer = LogBuffer(LOG_MAX_LINES, new_log_path())
+        self._decoders = {}
         self.setup_ui()
-        self.populate_algorithms()
-
-        # 默认参数
-        self.params = {
-            "env": "MSVC",
-            "compiler_path": r"",
-            "cmake_path": shutil.which("cmake") or "cmake",
-            "build_type": "Release",
-            "vsvars_path": r"",
-            "arch": "x64"
-        }
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(LOG_FLUSH_INTERVAL)
+        self.log_timer.timeout.connect(self.flush_log)
+        self.log_timer.start()
+        # 当前的配置/构建/运行进程；新的构建开始前先结束旧的，避免遗留孤儿进程
+        self.current_job = None
+        self.config_proc = self.build_proc = None
+        # 受管运行程序的后台任务；run_input 为程序的 stdin 文件，未选择时输入为空
+        self.run_worker = None
+        self.run_input = None
+        self.after_build = "run"
+        self.test_worker = None
+        # 交给构建守护进程的请求：取消时断开连接
+        self.daemon_client = self.daemon_worker = None
+        # 监视模式：文件系统通知先经过防抖定时器，改动平息后再构建
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_source_event)
+        self.watcher.directoryChanged.connect(self.on_source_event)
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setSingleShot(True)
+        self.watch_timer.setInterval(int(DEBOUNCE * 1000))
+        self.watch_timer.timeout.connect(self.on_sources_settled)
+        self.watch_snapshot = {}
+        self.watch_pending = False
+        # 参数按算法保存在项目索引中，切换算法或重启后恢复
+        self.index = get_index(project_root())
+        self.params = default_params()
+        # 算法列表（读取索引、检查目录修改时间）推迟到窗口显示之后加载
+        self.profile = profile
+        self.populated = False
+        # 后台探测工具链并写入磁盘缓存
+        get_registry().refresh_async()
 
     def setup_ui(self):
         # 顶部布局：算法选择、参数设置按钮、编译运行按钮
@@ -213,6 +903,24 @@ class MainWindow(QMainWindow):
         self.combo_alg = QComboBox()
         self.btn_set_params = QPushButton("设置参数")
         self.btn_clear_log = QPushButton("清空日志")
+        self.btn_log_file = QPushButton("日志文件")
+        self.btn_batch = QPushButton("批量编译")
+        self.btn_timeline = QPushButton("耗时分析")
+        self.btn_variants = QPushButton("优化对比")
+        self.btn_test = QPushButton("运行测试")
+        self.btn_input = QPushButton("输入文件")
+        self.btn_input.setToolTip("运行程序时作为 stdin 的文件，未选择时输入为空")
+        self.btn_runs = QPushButton("运行记录")
+        # 默认增量构建，勾选后才删除 build 目录完整重建
+        self.chk_clean = QCheckBox("清理重建")
+        # 监视模式：源文件改动后自动增量构建，之后运行程序或测试
+        self.chk_watch = QCheckBox("监视改动")
+        self.combo_watch_action = QComboBox()
+        for action, label in WATCH_ACTIONS.items():
+            self.combo_watch_action.addItem(f"后{label}", action)
+        # 构建交给后台守护进程：复用已捕获的编译环境，与命令行共用任务队列
+        self.chk_daemon = QCheckBox("守护进程")
+        self.chk_daemon.setToolTip("构建交给后台守护进程执行（未运行时自动启动）")
         self.btn_build = QPushButton("编译并运行")
 
         top_layout = QHBoxLayout()
@@ -221,11 +929,27 @@ class MainWindow(QMainWindow):
         top_layout.addStretch()
         top_layout.addWidget(self.btn_set_params)
         top_layout.addWidget(self.btn_clear_log)
+        top_layout.addWidget(self.btn_log_file)
+        top_layout.addWidget(self.btn_batch)
+        top_layout.addWidget(self.btn_timeline)
+        top_layout.addWidget(self.btn_variants)
+        top_layout.addWidget(self.btn_test)
+        top_layout.addWidget(self.btn_input)
+        top_layout.addWidget(self.btn_runs)
+        top_layout.addWidget(self.chk_clean)
+        top_layout.addWidget(self.chk_watch)
+        top_layout.addWidget(self.combo_watch_action)
+        top_layout.addWidget(self.chk_daemon)
         top_layout.addWidget(self.btn_build)
 
         # 底部日志输出
-        self.log_output = QTextEdit()
+        # QPlainTextEdit 只布局可见的行，适合显示大量日志
+        self.log_output = QPlainTextEdit()
         self.log_output.setReadOnly(True)
+        self.log_output.setUndoRedoEnabled(False)
+        self.log_output.setMaximumBlockCount(LOG_MAX_LINES)
+        self.log_output.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.log_output.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
 
         # 主布局
         main_layout = QVBoxLayout()
@@ -238,169 +962,374 @@ class MainWindow(QMainWindow):
 
         # 信号连接
         self.btn_set_params.clicked.connect(self.open_params_dialog)
-        self.btn_clear_log.clicked.connect(self.log_output.clear)
-        self.btn_build.clicked.connect(self.on_build)
+        self.btn_clear_log.clicked.connect(self.clear_log)
+        self.btn_log_file.clicked.connect(self.open_log_dir)
+        self.btn_batch.clicked.connect(self.open_batch_dialog)
+        self.btn_timeline.clicked.connect(self.open_timeline_dialog)
+        self.btn_variants.clicked.connect(self.open_variant_dialog)
+        self.btn_test.clicked.connect(self.on_test)
+        self.btn_input.clicked.connect(self.choose_input)
+        self.btn_runs.clicked.connect(self.open_run_history)
+        self.btn_build.clicked.connect(lambda: self.on_build())
+        self.chk_watch.toggled.connect(self.on_watch_toggled)
+        self.combo_alg.currentTextChanged.connect(self.on_alg_changed)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.populated:
+            self.populated = True
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        if self.profile is not None:
+            self.profile.mark("显示主窗口")
+        self.populate_algorithms()
+        if self.profile is not None:
+            self.profile.mark("加载算法列表")
+            report = self.profile.report()
+            self.log(report)
+            # 打包为无控制台程序时没有 stdout
+            if sys.stdout is not None:
+                print(report, flush=True)
 
     def populate_algorithms(self):
-        # 项目根目录：打包后优先使用 sys._MEIPASS，否则使用相对路径
-        if getattr(sys, 'frozen', False):
-            # 已打包，可执行文件所在目录即项目根目录
-            root = os.path.dirname(sys.executable)
-        else:
-            root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-        for name in os.listdir(root):
-            path = os.path.join(root, name)
-            # 目录名以序号_算法名格式
-            if os.path.isdir(path) and name and name[0].isdigit() and "_" in name:
-                self.combo_alg.addItem(name)
+        # 项目索引记录了算法列表，根目录没有增删子目录时不再扫描
+        for name in self.index.algorithms():
+            self.combo_alg.addItem(name)
+
+    def on_alg_changed(self, alg):
+        # 恢复该算法上次使用的参数，没有记录时使用默认参数
+        saved = self.index.params(alg) if alg else None
+        self.params = dict(default_params(), **saved) if saved else default_params()
+        self.on_watch_toggled(self.chk_watch.isChecked())
 
     def open_params_dialog(self):
         alg = self.combo_alg.currentText()
         # 计算项目根目录
-        if getattr(sys, 'frozen', False):
-            root = os.path.dirname(sys.executable)
-        else:
-            root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+        root = project_root()
         alg_dir = os.path.join(root, alg)
-        dialog = ParamsDialog(self, alg, alg_dir)
+        dialog = ParamsDialog(self, alg, alg_dir, self.index.sources(alg), self.params)
         if dialog.exec() == QDialog.Accepted:
             newp = dialog.get_params()
             self.params.update(newp)
-            self.log_output.append(f"CMake 参数已设置：版本要求={newp['cmake_version_req']}，项目名={newp['project_name']}，C++标准={newp['cxx_standard']}，可执行文件={','.join(newp['execs'])}，环境={newp['env']}")
+            self.index.set_params(alg, self.params)
+            self.log(f"CMake 参数已设置：版本要求={newp['cmake_version_req']}，项目名={newp['project_name']}，C++标准={newp['cxx_standard']}，可执行文件={','.join(newp['execs'])}，环境={newp['env']}")
+
+    def open_batch_dialog(self):
+        root = project_root()
+        algs = [self.combo_alg.itemText(i) for i in range(self.combo_alg.count())]
+        dialog = BatchBuildDialog(self, root, algs, self.chk_clean.isChecked(), self.log)
+        dialog.show()
 
-    def on_build(self):
+    def open_timeline_dialog(self):
+        dialog = TimelineDialog(self, self.combo_alg.currentText())
+        dialog.show()
+
+    def open_variant_dialog(self):
+        dialog = VariantDialog(self, project_root(), self.combo_alg.currentText(), dict(self.params), self.chk_clean.isChecked(), self.log)
+        dialog.show()
+
+    def open_run_history(self):
+        dialog = RunHistoryDialog(self, self.combo_alg.currentText())
+        dialog.show()
+
+    def choose_input(self):
+        # 取消选择即清除输入文件
+        path, _ = QFileDialog.getOpenFileName(self, "选择输入文件", self.run_input or project_root())
+        self.run_input = path or None
+        self.btn_input.setToolTip(f"stdin：{path}" if path else "运行程序时作为 stdin 的文件，未选择时输入为空")
+        self.log(f"运行输入：{path}" if path else "运行输入：无")
+
+    def on_test(self):
+        # 用 tests/ 下的用例检查当前算法已构建的可执行文件，在后台线程中并发运行
+        job = BuildJob(project_root(), self.combo_alg.currentText(), self.params)
+        self._start_tests(job)
+
+    def _start_tests(self, job):
+        exe_path = job.find_executable()
+        if not exe_path:
+            self.log("未找到可执行文件，请先编译。")
+            return
+        cases = discover_cases(job.alg_dir)
+        if not cases:
+            self.log(f"{job.alg}/{TESTS_DIR} 下没有测试用例（需要成对的 .in 与 .out 文件）")
+            return
+        self.log(f"运行 {len(cases)} 个测试用例：{exe_path}")
+        self.btn_test.setEnabled(False)
+        limit = DEFAULT_MEMORY_LIMIT_MB * 1024 * 1024
+        self.test_worker = TaskWorker("tests", lambda: run_tests(exe_path, cases, memory_limit=limit, log=self.log))
+        self.test_worker.finished.connect(lambda results: self._on_tests_finished(results, len(cases)))
+        self.test_worker.start()
+
+    def _on_tests_finished(self, results, total):
+        self.test_worker = None
+        self.btn_test.setEnabled(True)
+        self.log(format_report(results, total))
+        # 测试期间到来的改动推迟到测试结束后再构建，避免覆盖正在运行的程序
+        if self.watch_pending:
+            self.watch_pending = False
+            self.on_build(self.combo_watch_action.currentData())
+
+    def on_watch_toggled(self, checked):
+        # 开关监视或切换算法时重新设置监视的路径
+        self.watch_timer.stop()
+        paths = self.watcher.files() + self.watcher.directories()
+        if paths:
+            self.watcher.removePaths(paths)
+        if not checked:
+            return
+        alg_dir = os.path.join(project_root(), self.combo_alg.currentText())
+        self._watch_paths(alg_dir)
+        self.watch_snapshot = snapshot(alg_dir)
+        self.log(f"开始监视 {alg_dir}（{len(self.watch_snapshot)} 个文件）")
+
+    def _watch_paths(self, alg_dir):
+        # 编辑器“写临时文件再改名”保存时旧路径会失去监视，每次改动后重新加入
+        paths = [p for p in watched_dirs(alg_dir) + watched_files(alg_dir)
+                 if p not in self.watcher.files() and p not in self.watcher.directories()]
+        if paths:
+            self.watcher.addPaths(paths)
+
+    def on_source_event(self, path):
+        # 连续保存会产生一串通知，重新计时，只在平息后处理一次
+        self.watch_timer.start()
+
+    def on_sources_settled(self):
+        alg_dir = os.path.join(project_root(), self.combo_alg.currentText())
+        self._watch_paths(alg_dir)
+        current = snapshot(alg_dir)
+        changes = diff(self.watch_snapshot, current, alg_dir)
+        self.watch_snapshot = current
+        # 只有目录内容变化（如 build 目录的创建）而源文件未变时忽略
+        if not changes:
+            return
+        self.log(f"检测到改动：{', '.join(changes)}")
+        if self.test_worker is not None:
+            self.watch_pending = True
+            return
+        self.on_build(self.combo_watch_action.currentData())
+
+    def cancel_build(self):
+        # 结束正在进行的配置/构建/运行（连同子进程），旧任务的完成回调看到 job.cancelled 后直接返回
+        if self.daemon_client is not None:
+            self.daemon_client.cancel()
+            self.daemon_client = None
+            self.log("已取消交给守护进程的构建")
+        job = self.current_job
+        if job is None or job.cancelled:
+            return
+        running = [p for p in (self.config_proc, self.build_proc)
+                   if p is not None and p.state() != QProcess.NotRunning]
+        # 受管运行的进程由 job.cancel() 结束
+        running_exe = self.run_worker is not None
+        self.run_worker = None
+        job.cancel()
+        for proc in running:
+            kill_tree(proc.processId())
+        if running or running_exe:
+            self.log("已取消正在进行的构建")
+
+    def on_build(self, after="run"):
+        # after：构建成功后运行程序（run）还是运行测试（test）
+        self.cancel_build()
+        self.after_build = after
         # 使用对话框中设置的参数
-        cmake_exec = self.params.get("cmake_path", "cmake")
-        build_type = self.params.get("build_type", "Release")
-        env = self.params.get("env")
-        # 根据环境选择编译器路径
-        compiler = self.params.get("compiler_path", "")
-        if env == "MSVC":
-            compiler = shutil.which("cl") or compiler
-        elif env == "GCC":
-            compiler = compiler or shutil.which("g++")
-        # 日志输出使用的环境和编译器
-        self.log_output.append(f"使用 {env} 编译环境，编译器：{compiler}")
         alg = self.combo_alg.currentText()
         # 计算项目根目录
-        if getattr(sys, 'frozen', False):
-            root = os.path.dirname(sys.executable)
-        else:
-            root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-        alg_dir = os.path.join(root, alg)
+        root = project_root()
+        if self.chk_daemon.isChecked():
+            self._daemon_build(root, alg, after)
+            return
+        job = BuildJob(root, alg, self.params, clean=self.chk_clean.isChecked())
+        self.current_job = job
+        # 日志输出使用的环境和编译器
+        self.log(f"使用 {job.env} 编译环境，编译器：{job.compiler}")
         # 检测 CMakeLists.txt
-        cmk = os.path.join(alg_dir, "CMakeLists.txt")
-        if not os.path.exists(cmk):
-            with open(cmk, "w", encoding="utf-8") as f:
-                pass
-            self.log_output.append("未检测到 CMakeLists.txt，已创建空文件")
+        if job.ensure_cmakelists():
+            self.log("未检测到 CMakeLists.txt，已创建空文件")
         else:
-            self.log_output.append("检测到 CMakeLists.txt")
-        build_dir = os.path.join(alg_dir, "build")
-        if os.path.exists(build_dir):
-            shutil.rmtree(build_dir)
-        # 创建 build 目录
-        os.makedirs(build_dir)
-        # 构建参数
-        arch = self.params.get('arch', 'x64')
-        # 选择生成器
-        if env == "GCC":
-            generator = "MinGW Makefiles"
-        else:
-            # 从系统环境检测安装的 Visual Studio 版本
-            vswhere = shutil.which("vswhere")
-            if not vswhere:
-                pf86 = os.environ.get("ProgramFiles(x86)") or os.environ.get("ProgramFiles")
-                vswhere = os.path.join(pf86, "Microsoft Visual Studio", "Installer", "vswhere.exe") if pf86 else None
-            year_map = {17: "2022", 16: "2019", 15: "2017", 14: "2015", 12: "2013", 9: "2008"}
-            generator = "Visual Studio 16 2019"
-            try:
-                out = subprocess.check_output([vswhere, "-latest", "-products", "*", "-requires", "Microsoft.Component.MSBuild", "-property", "installationVersion"], universal_newlines=True)
-                ver = out.strip()
-                major = int(ver.split(".")[0])
-                year = year_map.get(major, str(2000 + major))
-                generator = f"Visual Studio {major} {year}"
-            except Exception:
-                pass
-        # 组装 config 参数列表
-        cfg_args = [cmake_exec, "-G", generator, "-S", alg_dir, "-B", build_dir, f"-DCMAKE_BUILD_TYPE={build_type}"]
-        if env != "GCC": cfg_args += ["-A", arch]
-        else: cfg_args += ["-DCMAKE_CXX_FLAGS=-m32"] if arch=="x86" else ["-DCMAKE_CXX_FLAGS=-m64"]
-        if compiler:
-            comp_path = compiler.replace('\\','/')
-            cfg_args.append(f"-DCMAKE_CXX_COMPILER={comp_path}")
+            self.log("检测到 CMakeLists.txt")
+        # 产物缓存命中时直接运行，跳过配置与构建
+        with job.timeline.phase("cache"):
+            hit = job.restore_artifacts(self.log)
+        if hit:
+            self.log("命中构建产物缓存，跳过配置与构建")
+            self._after_build(job, "命中缓存")
+            return
+        # 增量构建：配置输入未变化时跳过 cmake -S/-B，直接构建
+        reason = job.prepare()
+        if reason is None:
+            self.log("配置输入未变化，跳过配置，直接构建...")
+            self._start_build(job)
+            return
         # 异步执行配置
-        self.log_output.append(f"开始配置：生成器={generator}, 构建类型={build_type}, 架构={arch} ...")
+        cfg_args = job.config_args()
+        self.log(f"开始配置（{reason}）：生成器={job.generator}, 构建类型={job.build_type}, 架构={job.arch} ...")
         self.config_proc = QProcess(self)
         self.config_proc.setWorkingDirectory(root)
-        self.config_proc.readyReadStandardOutput.connect(lambda: self.handle_output(self.config_proc, False))
-        self.config_proc.readyReadStandardError.connect(lambda: self.handle_output(self.config_proc, True))
-        self.config_proc.finished.connect(lambda code, status: self._on_config_finished(code, status, cmake_exec, build_dir, build_type, env, compiler, root))
-        self.config_proc.start(cmake_exec, cfg_args[1:])
+        self._attach_output(self.config_proc)
+        self.config_proc.finished.connect(lambda code, status: self._on_config_finished(code, status, job))
+        self._on_start_failed(self.config_proc, lambda: self._on_config_finished(-1, QProcess.CrashExit, job))
+        job.timeline.begin("configure")
+        self.config_proc.start(cfg_args[0], cfg_args[1:])
+
+    def _daemon_build(self, root, alg, after):
+        # 在后台线程中提交请求，日志由守护进程逐行返回；程序由守护进程受管运行，运行记录与本机共用
+        from algorithmmanager.daemon import DaemonClient, start_daemon
+        client = DaemonClient()
+        self.current_job = None
+        self.daemon_client = client
+        self.log(f"提交到构建守护进程：{alg}")
+
+        def submit():
+            try:
+                client.state = start_daemon()
+                return client.request("build", log=self.log, root=root, alg=alg, params=self.params,
+                                      clean=self.chk_clean.isChecked(), after=after,
+                                      options={"input": self.run_input})
+            except (OSError, RuntimeError) as e:
+                self.log(f"守护进程请求失败：{e}")
+                return None
+        self.daemon_worker = TaskWorker("daemon", submit)
+        self.daemon_worker.finished.connect(lambda result: self._on_daemon_finished(client))
+        self.daemon_worker.start()
 
-    def _on_config_finished(self, code, status, cmake_exec, build_dir, build_type, env, compiler, root):
+    def _on_daemon_finished(self, client):
+        if client is self.daemon_client:
+            self.daemon_client = self.daemon_worker = None
+
+    def _on_config_finished(self, code, status, job):
+        job.timeline.end("configure")
+        if job.cancelled:
+            return
         if code != 0:
-            self.log_output.append(f"配置失败，返回码：{code}")
+            self.log(f"配置失败，返回码：{code}")
+            self.log(job.finish_timeline("配置失败"))
             return
+        job.configured()
+        self.log("配置完成，开始构建...")
+        self._start_build(job)
+
+    def _start_build(self, job):
         # 异步执行构建
-        self.log_output.append("配置完成，开始构建...")
-        build_args = [cmake_exec, "--build", build_dir]
-        if env != "GCC": build_args += ["--config", build_type]
+        build_args = job.build_args()
         self.build_proc = QProcess(self)
-        self.build_proc.setWorkingDirectory(root)
-        self.build_proc.readyReadStandardOutput.connect(lambda: self.handle_output(self.build_proc, False))
-        self.build_proc.readyReadStandardError.connect(lambda: self.handle_output(self.build_proc, True))
-        self.build_proc.finished.connect(lambda code, status: self._on_build_finished(code, status, build_dir))
+        self.build_proc.setWorkingDirectory(job.root)
+        # 构建输出同时交给时间线，用于解析 MSVC /Bt+ 的逐文件耗时
+        self._attach_output(self.build_proc, job.timeline.observe_lines)
+        self.build_proc.finished.connect(lambda code, status: self._on_build_finished(code, status, job))
+        self._on_start_failed(self.build_proc, lambda: self._on_build_finished(-1, QProcess.CrashExit, job))
+        job.begin_build()
         self.build_proc.start(build_args[0], build_args[1:])
 
-    def _on_build_finished(self, code, status, build_dir):
-        # 获取构建类型
-        build_type = self.params.get('build_type', 'Release')
+    def _on_build_finished(self, code, status, job):
+        job.end_build()
+        if job.cancelled:
+            return
         if code != 0:
-            self.log_output.append(f"构建失败，返回码：{code}")
+            self.log(f"构建失败，返回码：{code}")
+            self.log(job.finish_timeline("构建失败"))
             return
-        self.log_output.append("构建完成，开始运行...")
-        # 查找并运行 exe
-        alg = self.combo_alg.currentText()
-        exe_base = alg.split("_",1)[1] if "_" in alg else alg
-        exe_name = exe_base + (".exe" if sys.platform.startswith("win") else "")
-        # 查找路径
-        candidate = [os.path.join(build_dir, exe_name)]
-        if not os.path.exists(candidate[0]):
-            candidate.insert(0, os.path.join(build_dir, build_type, exe_name))
-        exe_path = next((p for p in candidate if os.path.exists(p)), None)
-        if exe_path:
-            # 在独立的 cmd 窗口中使用 start 启动可执行文件
-            QProcess.startDetached("cmd.exe", ["/C", "start", "", exe_path])
-            # 打开可执行文件所在目录
-            exe_dir = os.path.dirname(exe_path)
-            QProcess.startDetached("explorer", [exe_dir])
+        job.store_artifacts(self.log)
+        self.log("构建完成")
+        self._after_build(job, "成功")
+
+    def _after_build(self, job, build_status):
+        if self.after_build == "test":
+            self.log(job.finish_timeline(build_status))
+            self._start_tests(job)
         else:
-            self.log_output.append("未找到可执行文件，运行失败。")
+            self.log("开始运行...")
+            self._run_executable(job, build_status)
+
+    def _run_executable(self, job, build_status):
+        # 受管运行：在后台线程中运行程序，输出写入运行记录目录（前若干行同时写入日志），
+        # 记录墙钟/CPU 时间、峰值内存与返回码；结束后记录本次耗时
+        self.run_worker = TaskWorker("run", lambda: run_executable(job, self.log, self.run_input))
+        self.run_worker.finished.connect(lambda code: self._on_run_finished(job, build_status))
+        self.run_worker.start()
+
+    def _on_run_finished(self, job, build_status):
+        if job.cancelled:
+            return
+        self.run_worker = None
+        self.log(job.finish_timeline(build_status))
 
     def run_process(self, cmd, cwd):
         process = QProcess(self)
         process.setWorkingDirectory(cwd)
-        process.readyReadStandardOutput.connect(lambda: self.handle_output(process, False))
-        process.readyReadStandardError.connect(lambda: self.handle_output(process, True))
-        process.finished.connect(lambda code, status: self.log_output.append(f"进程结束，返回码：{code}"))
+        self._attach_output(process)
+        process.finished.connect(lambda code, status: self.log(f"进程结束，返回码：{code}"))
         process.start(cmd[0], cmd[1:])
 
-    def handle_output(self, process, is_err):
+    def _on_start_failed(self, process, callback):
+        # 程序无法启动时不会发出 finished，记录原因后按失败处理
+        def on_error(error):
+            if error == QProcess.FailedToStart:
+                self.log(f"无法启动 {process.program()}：{process.errorString()}")
+                callback()
+        process.errorOccurred.connect(on_error)
+
+    def _attach_output(self, process, observe=None):
+        # 每个输出流使用独立的增量解码器；进程结束时先取出剩余输出
+        self._decoders[(id(process), False)] = StreamDecoder()
+        self._decoders[(id(process), True)] = StreamDecoder()
+        process.readyReadStandardOutput.connect(lambda: self.handle_output(process, False, observe))
+        process.readyReadStandardError.connect(lambda: self.handle_output(process, True, observe))
+        process.finished.connect(lambda code, status: self.finish_output(process, observe))
+
+    def handle_output(self, process, is_err, observe=None):
         # 读取原始字节数据
         raw = process.readAllStandardError().data() if is_err else process.readAllStandardOutput().data()
-        # 优先尝试 UTF-8 解码，失败后降级到 GBK
-        try:
-            text = raw.decode('utf-8')
-        except UnicodeDecodeError:
-            text = raw.decode('gbk', errors='replace')
-        # 将解码后的文本追加到日志
-        self.log_output.append(text)
+        decoder = self._decoders.setdefault((id(process), is_err), StreamDecoder())
+        self._emit_lines(decoder.feed(raw), observe)
+
+    def finish_output(self, process, observe=None):
+        for is_err in (False, True):
+            self.handle_output(process, is_err, observe)
+            decoder = self._decoders.pop((id(process), is_err), None)
+            if decoder is not None:
+                self._emit_lines(decoder.finish(), observe)
+
+    def _emit_lines(self, lines, observe):
+        if observe and lines:
+            observe(lines)
+        self.log_buffer.append_lines(lines)
+
+    def log(self, text):
+        # 写入日志缓冲，由定时器批量刷新到界面
+        self.log_buffer.append(text)
+
+    def flush_log(self):
+        lines, dropped = self.log_buffer.take_pending()
+        if dropped:
+            lines.insert(0, f"…… 输出过快，界面省略了 {dropped} 行，完整日志见 {self.log_buffer.spill_path}")
+        if lines:
+            self.log_output.appendPlainText("\n".join(lines))
+
+    def clear_log(self):
+        self.log_buffer.clear()
+        self.log_output.clear()
+
+    def open_log_dir(self):
+        QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.dirname(self.log_buffer.spill_path)))
+
+    def closeEvent(self, event):
+        self.cancel_build()
+        self.flush_log()
+        self.log_buffer.close()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    # 应用科技风暗色主题
-    app.setStyleSheet(qdarkstyle.load_stylesheet())
-    win = MainWindow()
+    # --startup-profile：输出导入、创建窗口与加载算法列表各阶段的耗时
+    profiling = "--startup-profile" in sys.argv
+    app = QApplication([arg for arg in sys.argv if arg != "--startup-profile"])
+    startup_profile.mark("创建 QApplication")
+    # 应用科技风暗色主题（命中缓存时不再导入 qdarkstyle 的资源模块）
+    stylesheet, cached = load_stylesheet(app)
+    app.setStyleSheet(stylesheet)
+    startup_profile.mark("样式表（缓存）" if cached else "样式表（生成）")
+    win = MainWindow(startup_profile if profiling else None)
+    startup_profile.mark("创建主窗口")
     win.show()
     sys.exit(app.exec()) 
\ No newline at end of file
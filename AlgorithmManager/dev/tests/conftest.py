@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# 索引、产物缓存、耗时记录等都写在用户缓存目录，测试使用独立的临时目录
+_cache = tempfile.mkdtemp(prefix="am-test-cache-")
+os.environ["XDG_CACHE_HOME"] = _cache
+os.environ["LOCALAPPDATA"] = _cache
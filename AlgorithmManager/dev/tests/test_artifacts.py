@@ -0,0 +1,64 @@
+import os
+import multiprocessing
+
+from algorithmmanager.artifacts import ArtifactCache, source_files, artifact_key
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_store_restore_and_evict(tmp_path):
+    build = tmp_path / "build"
+    _write(str(build / "Release" / "KMP"), b"x" * 1000)
+    cache = ArtifactCache(root=str(tmp_path / "cache"), max_bytes=1500)
+    assert cache.restore("k1", str(tmp_path / "out")) is None
+    cache.store("k1", str(build), [str(build / "Release" / "KMP")])
+    restored = cache.restore("k1", str(tmp_path / "out"))
+    assert restored == [str(tmp_path / "out" / "Release" / "KMP")]
+    assert open(restored[0], "rb").read() == b"x" * 1000
+    # 超过容量上限时淘汰最久未使用的一项
+    cache.store("k2", str(build), [str(build / "Release" / "KMP")])
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1, 1)
+    assert cache.restore("k1", str(tmp_path / "out")) is None
+
+
+def test_key_depends_on_sources(tmp_path):
+    alg = tmp_path / "01_KMP"
+    _write(str(alg / "main.cpp"), b"int main(){}")
+    _write(str(alg / "build" / "x.cpp"), b"")
+    _write(str(alg / "tests" / "1.in"), b"")
+    assert source_files(str(alg)) == ["main.cpp"]
+    key = artifact_key(str(alg), {"compiler": "g++"}, {"build_type": "Release"})
+    assert key == artifact_key(str(alg), {"compiler": "g++"}, {"build_type": "Release"})
+    assert key != artifact_key(str(alg), {"compiler": "g++"}, {"build_type": "Debug"})
+    _write(str(alg / "main.cpp"), b"int main(){return 0;}")
+    assert key != artifact_key(str(alg), {"compiler": "g++"}, {"build_type": "Release"})
+
+
+def _worker(root, src, n):
+    cache = ArtifactCache(root=root, max_bytes=1 << 30)
+    for i in range(5):
+        key = f"k{n}-{i}"
+        for _ in range(10):
+            cache.store(key, src, [os.path.join(src, "a.exe")])
+            assert cache.restore(key, os.path.join(src, f"out{n}")) is not None
+
+
+def test_concurrent_processes(tmp_path):
+    # 守护进程、命令行与图形界面是不同的进程，共用同一个缓存目录
+    src = str(tmp_path / "src")
+    _write(os.path.join(src, "a.exe"), os.urandom(100000))
+    root = str(tmp_path / "cache")
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_worker, args=(root, src, n)) for n in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+    assert [p.exitcode for p in procs] == [0, 0, 0]
+    stats = ArtifactCache(root=root).stats()
+    assert (stats["entries"], stats["stores"], stats["hits"]) == (15, 150, 150)
@@ -0,0 +1,70 @@
+import math
+
+import pytest
+
+from algorithmmanager.bench import (percentile, bootstrap_ci, summarize, scaling_exponent, compare, matched_rows,
+                                    format_comparison)
+
+
+def _result(*entries):
+    return {"results": [{"size": size, "case": case, "stats": {"wall": summarize(values)} if values else {}}
+                        for size, case, values in entries]}
+
+
+def test_percentile():
+    assert percentile([3, 1, 2, 4], 0) == 1
+    assert percentile([3, 1, 2, 4], 100) == 4
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert math.isnan(percentile([], 50))
+
+
+def test_bootstrap_ci():
+    assert bootstrap_ci([5.0]) == (5.0, 5.0)
+    values = [1.0, 1.1, 0.9, 1.05, 0.95, 1.02, 0.98]
+    lo, hi = bootstrap_ci(values)
+    assert lo <= 1.0 <= hi
+    # 固定种子，结果可重复
+    assert bootstrap_ci(values) == (lo, hi)
+
+
+def test_summarize():
+    s = summarize([1.0, 2.0, 3.0])
+    assert (s["n"], s["median"], s["min"], s["max"]) == (3, 2.0, 1.0, 3.0)
+    assert s["ci_low"] <= s["median"] <= s["ci_high"]
+
+
+def test_scaling_exponent():
+    sizes = [1000, 10000, 100000]
+    assert scaling_exponent(sizes, [n * 1e-6 for n in sizes]) == pytest.approx(1.0)
+    assert scaling_exponent(sizes, [n * n * 1e-9 for n in sizes]) == pytest.approx(2.0)
+    assert scaling_exponent([1000], [0.1]) is None
+
+
+def test_compare_verdicts():
+    fast = [1.0, 1.01, 0.99, 1.0, 1.02]
+    slow = [2.0, 2.02, 1.98, 2.0, 2.01]
+    noisy = [1.0, 1.5, 0.6, 1.2, 0.8]
+    baseline = _result((100, "random", fast), (200, "random", slow), (300, "random", fast))
+    current = _result((100, "random", slow), (200, "random", fast), (300, "random", noisy))
+    verdicts = {r["size"]: r["verdict"] for r in compare(baseline, current)}
+    assert verdicts == {100: "回归", 200: "提升", 300: "持平"}
+
+
+def test_compare_lists_unmatched_rows():
+    values = [1.0, 1.1, 0.9]
+    baseline = _result((100, "random", values), (200, "random", values))
+    current = _result((100, "random", values), (300, "random", values), (200, "random", []))
+    rows = {r["size"]: r for r in compare(baseline, current)}
+    assert rows[300]["verdict"] == "无基线" and rows[300]["ratio"] is None
+    assert rows[200]["verdict"] == "未测量" and rows[200]["current"] is None
+    assert [r["size"] for r in matched_rows(rows.values())] == [100]
+    text = format_comparison(list(rows.values()))
+    assert "无基线" in text and "未测量" in text
+
+
+def test_compare_peak_rss_with_unknown_values():
+    baseline = {"results": [{"size": 100, "case": "random", "stats": {}}]}
+    current = {"results": [{"size": 100, "case": "random", "stats": {"peak_rss": summarize([3 << 20])}}]}
+    rows = compare(baseline, current, metric="peak_rss")
+    assert rows[0]["verdict"] == "无基线"
+    assert "3.0MB" in format_comparison(rows, metric="peak_rss")
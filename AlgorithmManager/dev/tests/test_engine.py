@@ -0,0 +1,38 @@
+from algorithmmanager import engine
+from algorithmmanager.engine import make_config_args, algorithm_params, MSVC_DEFAULT_CXX_FLAGS
+from algorithmmanager.projectindex import get_index
+
+
+def _flags(args):
+    return [a for a in args if a.startswith("-DCMAKE_CXX_FLAGS")]
+
+
+def test_msvc_flags_always_passed_in_full():
+    # CMAKE_CXX_FLAGS_INIT 只在新缓存中生效，开关 /Bt+ 必须每次都写入完整的 CMAKE_CXX_FLAGS
+    defaults = " ".join(MSVC_DEFAULT_CXX_FLAGS)
+    on = make_config_args("cmake", "Ninja", "a", "b", "Release", "MSVC", "x64", None, ["/Bt+"])
+    off = make_config_args("cmake", "Ninja", "a", "b", "Release", "MSVC", "x64", None, [])
+    assert _flags(on) == [f"-DCMAKE_CXX_FLAGS={defaults} /Bt+"]
+    assert _flags(off) == [f"-DCMAKE_CXX_FLAGS={defaults}"]
+    vs = make_config_args("cmake", "Visual Studio 17 2022", "a", "b", "Release", "MSVC", "Win32", None)
+    assert vs[vs.index("-A") + 1] == "Win32" and "-DBUILD_MODE=Release" not in vs
+
+
+def test_gcc_flags():
+    args = make_config_args("cmake", "Ninja", "a", "b", "Debug", "GCC", "x86", "C:\\mingw\\g++.exe", ["-ftime-trace"])
+    assert _flags(args) == ["-DCMAKE_CXX_FLAGS=-m32 -ftime-trace"]
+    assert "-DCMAKE_CXX_COMPILER=C:/mingw/g++.exe" in args
+    assert "-DBUILD_MODE=Debug" in args
+
+
+def test_algorithm_params_merge_order(tmp_path):
+    root = str(tmp_path)
+    (tmp_path / "01_KMP").mkdir()
+    (tmp_path / "02_AC").mkdir()
+    get_index(root).set_params("01_KMP", {"env": "GCC", "compiler_path": "/opt/g++", "build_type": "Debug"})
+    params = algorithm_params(root, "01_KMP", {"build_type": "Release"})
+    assert params["compiler_path"] == "/opt/g++"
+    assert params["build_type"] == "Release"
+    assert params["arch"] == engine.default_params()["arch"]
+    # 没有保存过参数的子项目使用默认值，不受其他子项目影响
+    assert algorithm_params(root, "02_AC")["compiler_path"] == engine.default_params()["compiler_path"]
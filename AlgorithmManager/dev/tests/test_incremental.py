@@ -0,0 +1,87 @@
+import os
+
+from algorithmmanager.incremental import (compute_fingerprint, prepare_build_dir, save_fingerprint, load_fingerprint,
+                                          FINGERPRINT_FILE)
+
+PARAMS = {"env": "GCC", "project_name": "KMP", "execs": ["KMP"], "tu_profile": False}
+
+
+def _setup(tmp_path):
+    alg_dir = tmp_path / "01_KMP"
+    alg_dir.mkdir()
+    (alg_dir / "CMakeLists.txt").write_text("project(KMP)\n", encoding="utf-8")
+    return str(alg_dir), str(alg_dir / "build")
+
+
+def _fingerprint(alg_dir, compiler="/usr/bin/g++", build_type="Release", params=PARAMS):
+    return compute_fingerprint(alg_dir, "Ninja", "x64", compiler, build_type, params)
+
+
+def _configured(build_dir, fingerprint):
+    # 模拟一次成功的配置
+    with open(os.path.join(build_dir, "CMakeCache.txt"), "w", encoding="utf-8") as f:
+        f.write("CMAKE_CXX_COMPILER:FILEPATH=/usr/bin/g++\n")
+    save_fingerprint(build_dir, fingerprint)
+
+
+def test_first_configure_then_skip(tmp_path):
+    alg_dir, build_dir = _setup(tmp_path)
+    fp = _fingerprint(alg_dir)
+    assert prepare_build_dir(build_dir, fp) == "首次配置"
+    _configured(build_dir, fp)
+    assert prepare_build_dir(build_dir, _fingerprint(alg_dir)) is None
+
+
+def test_missing_cache_means_first_configure(tmp_path):
+    alg_dir, build_dir = _setup(tmp_path)
+    fp = _fingerprint(alg_dir)
+    prepare_build_dir(build_dir, fp)
+    save_fingerprint(build_dir, fp)
+    assert prepare_build_dir(build_dir, fp) == "首次配置"
+
+
+def test_input_change_keeps_cmake_cache(tmp_path):
+    alg_dir, build_dir = _setup(tmp_path)
+    fp = _fingerprint(alg_dir)
+    prepare_build_dir(build_dir, fp)
+    _configured(build_dir, fp)
+    changed = _fingerprint(alg_dir, params=dict(PARAMS, tu_profile=True))
+    assert prepare_build_dir(build_dir, changed) == "配置输入变更"
+    assert os.path.exists(os.path.join(build_dir, "CMakeCache.txt"))
+    # 配置完成前指纹已删除，配置失败后不会被误判为最新
+    assert load_fingerprint(build_dir) is None
+
+
+def test_cmakelists_and_build_type_are_inputs(tmp_path):
+    alg_dir, build_dir = _setup(tmp_path)
+    fp = _fingerprint(alg_dir)
+    prepare_build_dir(build_dir, fp)
+    _configured(build_dir, fp)
+    assert prepare_build_dir(build_dir, _fingerprint(alg_dir, build_type="Debug")) == "配置输入变更"
+    _configured(build_dir, fp)
+    with open(os.path.join(alg_dir, "CMakeLists.txt"), "a", encoding="utf-8") as f:
+        f.write("add_executable(KMP main.cpp)\n")
+    assert prepare_build_dir(build_dir, _fingerprint(alg_dir)) == "配置输入变更"
+
+
+def test_toolchain_change_resets_cmake_cache(tmp_path):
+    alg_dir, build_dir = _setup(tmp_path)
+    fp = _fingerprint(alg_dir)
+    prepare_build_dir(build_dir, fp)
+    _configured(build_dir, fp)
+    with open(os.path.join(build_dir, "main.o"), "w") as f:
+        f.write("obj")
+    assert prepare_build_dir(build_dir, _fingerprint(alg_dir, compiler="/usr/bin/clang++")) == "工具链变更"
+    assert not os.path.exists(os.path.join(build_dir, "CMakeCache.txt"))
+    # 只删除缓存，保留已编译的目标文件
+    assert os.path.exists(os.path.join(build_dir, "main.o"))
+
+
+def test_clean_removes_build_dir(tmp_path):
+    alg_dir, build_dir = _setup(tmp_path)
+    fp = _fingerprint(alg_dir)
+    prepare_build_dir(build_dir, fp)
+    _configured(build_dir, fp)
+    assert prepare_build_dir(build_dir, fp, clean=True) == "清理重建"
+    assert os.listdir(build_dir) == []
+    assert not os.path.exists(os.path.join(build_dir, FINGERPRINT_FILE))
@@ -0,0 +1,45 @@
+from algorithmmanager.logpipe import StreamDecoder
+
+GBK_HELLO = "你好".encode("gbk")
+
+
+def test_utf8_lines():
+    d = StreamDecoder()
+    assert d.feed("第一行\r\n第二".encode("utf-8")) == ["第一行"]
+    assert d.feed("行\n".encode("utf-8")) == ["第二行"]
+    assert d.finish() == []
+
+
+def test_multibyte_char_split_across_chunks():
+    data = "你好\n".encode("utf-8")
+    d = StreamDecoder()
+    assert d.feed(data[:2]) == []
+    assert d.feed(data[2:]) == ["你好"]
+
+
+def test_gbk_fallback_only_affects_its_own_line():
+    # GBK 的一行之后的 UTF-8 输出仍按 UTF-8 解码
+    d = StreamDecoder()
+    lines = d.feed(GBK_HELLO + b"\n" + "世界\n".encode("utf-8"))
+    assert lines == ["你好", "世界"]
+    assert d.feed("再见\n".encode("utf-8")) == ["再见"]
+
+
+def test_invalid_bytes_are_replaced():
+    d = StreamDecoder(fallback="ascii")
+    assert d.feed(b"ok\xff\n") == ["ok�"]
+
+
+def test_take_partial():
+    d = StreamDecoder()
+    d.feed(b"abc")
+    assert d.take_partial(10) is None
+    d.feed(b"x" * 20)
+    assert d.take_partial(10) == "abc" + "x" * 20
+    assert d.finish() == []
+
+
+def test_finish_returns_unterminated_line():
+    d = StreamDecoder()
+    assert d.feed(GBK_HELLO) == []
+    assert d.finish() == ["你好"]
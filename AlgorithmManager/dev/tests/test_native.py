@@ -0,0 +1,40 @@
+from array import array
+
+import pytest
+
+from algorithmmanager import native
+from algorithmmanager.native import check_offsets, pack
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        if native.np is None:
+            pytest.skip("未安装 NumPy")
+    else:
+        monkeypatch.setattr(native, "np", None)
+
+
+def test_pack():
+    data, offsets = pack(["ab", "", "中"])
+    assert data == "ab中".encode("utf-8")
+    assert list(offsets) == [0, 2, 2, 5]
+
+
+@pytest.mark.parametrize("offsets", [[0], [0, 3, 6], [0, 0, 6], range(0, 7, 2), array("q", [0, 6])])
+def test_check_offsets_accepts(backend, offsets):
+    check_offsets(offsets, 6, "text_offsets")
+
+
+@pytest.mark.parametrize("offsets", [[], [1, 3, 6], [0, 3, 600000000], [0, 4, 3, 6], [0, -1, 6]])
+def test_check_offsets_rejects(backend, offsets):
+    # 这些偏移直接交给 C 会越界访问，导致解释器崩溃
+    with pytest.raises(ValueError):
+        check_offsets(array("q", offsets), 6, "text_offsets")
+
+
+def test_check_offsets_numpy_array():
+    np = pytest.importorskip("numpy")
+    check_offsets(np.array([0, 2, 6], dtype=np.int64), 6, "text_offsets")
+    with pytest.raises(ValueError):
+        check_offsets(np.array([0, 7], dtype=np.int64), 6, "text_offsets")
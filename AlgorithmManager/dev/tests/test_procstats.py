@@ -0,0 +1,85 @@
+import sys
+
+import pytest
+
+from algorithmmanager import procstats
+from algorithmmanager.procstats import run_measured, format_rss, _HwmSampler
+
+linux_only = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="VmHWM 采样只在 Linux 上使用")
+
+MB = 1 << 20
+
+
+def _allocating(mb, sleep=0.3):
+    # 分配并写入 mb MB 内存后等待一会，保证采样能看到峰值
+    return [sys.executable, "-c",
+            f"import time; a = bytearray({mb} << 20); a[::4096] = b'x' * len(a[::4096]); time.sleep({sleep})"]
+
+
+def test_format_rss():
+    assert format_rss(None) == "未知"
+    assert format_rss(3 * MB) == "3.0MB"
+
+
+def _sampler(values):
+    it = iter(values)
+    return _HwmSampler(lambda: next(it))
+
+
+def test_sampler_settled():
+    sampler = _sampler([None, 1, 2, 3])
+    for _ in range(3):
+        sampler.sample()
+    # 峰值仍在增长（如还在加载动态库）时不可信
+    assert sampler.peak == 3 and not sampler.settled()
+    sampler = _sampler([None, 4, 4, 4])
+    for _ in range(3):
+        sampler.sample()
+    assert sampler.peak == 4 and sampler.settled()
+
+
+def test_sampler_limit():
+    killed = []
+    sampler = _HwmSampler(lambda: 200, limit=100, on_exceed=lambda: killed.append(True))
+    assert sampler.exceeded and killed == [True]
+
+
+def test_exit_code_and_times():
+    r = run_measured([sys.executable, "-c", "raise SystemExit(3)"])
+    assert r["exit_code"] == 3
+    assert r["wall"] > 0 and r["cpu"] >= 0
+    assert not r["timed_out"] and not r["rss_exceeded"]
+
+
+def test_timeout():
+    r = run_measured([sys.executable, "-c", "import time; time.sleep(10)"], timeout=0.3)
+    assert r["timed_out"] and r["wall"] < 5
+
+
+@linux_only
+def test_parent_memory_not_reported_as_child_peak():
+    # ru_maxrss 含 fork 出来的 Python 进程的内存；父进程占用很大时，小程序的峰值不能等于父进程的内存，也不能判为 MLE
+    ballast = bytearray(300 * MB)
+    ballast[::4096] = b"x" * len(ballast[::4096])
+    r = run_measured(["/bin/true"], rss_limit=100 * MB)
+    assert not r["rss_exceeded"]
+    assert r["peak_rss"] is None or r["peak_rss"] < 100 * MB
+    del ballast
+
+
+@linux_only
+def test_python_child_peak_and_limit():
+    # 子进程也是 Python 程序时同样要采样（9c42f97 之前被当成 exec 之前的进程忽略）
+    r = run_measured(_allocating(400))
+    assert r["peak_rss"] is not None and r["peak_rss"] >= 400 * MB
+    r = run_measured(_allocating(300, sleep=5), rss_limit=100 * MB)
+    assert r["rss_exceeded"] and r["wall"] < 5
+
+
+@linux_only
+def test_unsettled_sample_is_unknown(monkeypatch):
+    # 采样期间峰值一直在增长时不报告采样值（否则短时间运行会报告加载动态库时的内存）
+    values = iter(range(1, 1 << 30))
+    monkeypatch.setattr(procstats, "_rss_reader", lambda proc: lambda: next(values))
+    r = run_measured([sys.executable, "-c", "import time; time.sleep(0.1)"])
+    assert r["peak_rss"] is None
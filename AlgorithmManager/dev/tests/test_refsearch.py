@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from algorithmmanager import refsearch
+from algorithmmanager.refsearch import prefix_function, kmp_search, KmpAutomaton, AhoCorasick, search_file
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    # 有 NumPy 时分段向量化扫描，没有时逐字节查表，两条路径都要测
+    if request.param == "numpy":
+        if refsearch.np is None:
+            pytest.skip("未安装 NumPy")
+    else:
+        monkeypatch.setattr(refsearch, "np", None)
+    return request.param
+
+
+def naive(text, pattern):
+    return [i for i in range(len(text) - len(pattern) + 1) if text[i:i + len(pattern)] == pattern]
+
+
+def _text(rng, n, alphabet=b"ab"):
+    return bytes(rng.choice(alphabet) for _ in range(n))
+
+
+def test_prefix_function():
+    assert prefix_function("abcabcd") == [0, 0, 0, 1, 2, 3, 0]
+    assert prefix_function("aaaa") == [0, 1, 2, 3]
+    assert prefix_function("") == []
+
+
+def test_kmp_search_matches_naive():
+    rng = random.Random(1)
+    for _ in range(200):
+        text, pattern = _text(rng, rng.randint(0, 60)), _text(rng, rng.randint(1, 5))
+        assert kmp_search(text, pattern) == naive(text, pattern)
+    assert kmp_search("abc", "") == []
+    # str 按 UTF-8 字节匹配
+    assert kmp_search("中文中文", "文") == [3, 9]
+
+
+def test_kmp_automaton(backend):
+    rng = random.Random(2)
+    for n in (0, 1, 50, 20000):
+        text = _text(rng, n)
+        for pattern in (b"a", b"abab", b"aabaa", _text(rng, 9)):
+            assert KmpAutomaton(pattern).search(text) == naive(text, pattern)
+    assert KmpAutomaton(b"").search(b"abc") == []
+
+
+def test_kmp_automaton_batch(backend):
+    rng = random.Random(3)
+    texts = [_text(rng, rng.randint(0, 80)) for _ in range(20)]
+    automaton = KmpAutomaton(b"aba")
+    assert automaton.search_batch(texts) == [naive(t, b"aba") for t in texts]
+
+
+def test_aho_corasick(backend):
+    rng = random.Random(4)
+    patterns = [b"a", b"ab", b"bab", b"aab", b"abba", b"", b"ab"]
+    for n in (0, 30, 20000):
+        text = _text(rng, n)
+        expected = sorted((i, k) for k, p in enumerate(patterns) if p for i in naive(text, p))
+        assert AhoCorasick(patterns).search(text) == expected
+
+
+def test_aho_corasick_batch(backend):
+    patterns = [b"he", b"she", b"his", b"hers"]
+    texts = [b"ushers", b"", b"history"]
+    assert AhoCorasick(patterns).search_batch(texts) == [[(1, 1), (2, 0), (2, 3)], [], [(0, 2)]]
+
+
+def test_search_file_across_blocks(backend, tmp_path):
+    rng = random.Random(5)
+    text = _text(rng, 5000)
+    path = tmp_path / "big.txt"
+    path.write_bytes(text)
+    # 块很小，匹配经常跨越块边界
+    assert list(search_file(str(path), KmpAutomaton(b"abaab"), block_size=97)) == naive(text, b"abaab")
+    patterns = [b"ab", b"bba"]
+    expected = sorted((i, k) for k, p in enumerate(patterns) for i in naive(text, p))
+    assert sorted(search_file(str(path), AhoCorasick(patterns), block_size=64)) == expected
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    assert list(search_file(str(empty), KmpAutomaton(b"a"))) == []
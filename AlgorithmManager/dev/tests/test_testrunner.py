@@ -0,0 +1,95 @@
+import io
+import os
+import sys
+import stat
+
+import pytest
+
+from algorithmmanager.testrunner import tokens, compare_stream, run_case, run_tests, discover_cases, all_passed
+
+posix_only = pytest.mark.skipif(sys.platform.startswith("win"), reason="用例程序为 shell 脚本")
+
+
+def _pieces(data, size):
+    # 每次最多返回 size 字节，模拟词法单元跨块的情况
+    stream = io.BytesIO(data)
+    return lambda n: stream.read(min(n, size))
+
+
+def test_tokens_across_chunks():
+    data = b"  12 345\r\n6789\t\tab  \n"
+    for size in (1, 2, 3, 64):
+        assert list(tokens(_pieces(data, size))) == [b"12", b"345", b"6789", b"ab"]
+    assert list(tokens(_pieces(b"", 4))) == []
+    assert list(tokens(_pieces(b"tail", 3))) == [b"tail"]
+
+
+def test_compare_stream(tmp_path):
+    answer = tmp_path / "1.out"
+    answer.write_bytes(b"1 2\n3\n")
+    assert compare_stream(io.BytesIO(b"1\n2 3").read, str(answer)) is None
+    assert compare_stream(io.BytesIO(b"1 2 4\n").read, str(answer)) == (3, b"3", b"4")
+    # 输出提前结束或多出内容时缺少的一侧为 None
+    assert compare_stream(io.BytesIO(b"1 2").read, str(answer)) == (3, b"3", None)
+    assert compare_stream(io.BytesIO(b"1 2 3 4").read, str(answer)) == (4, None, b"4")
+
+
+def test_discover_cases(tmp_path):
+    tests = tmp_path / "tests"
+    tests.mkdir()
+    for name in ("10", "2", "1", "only_in"):
+        (tests / f"{name}.in").write_text("")
+    for name in ("10", "2", "1"):
+        (tests / f"{name}.out").write_text("")
+    assert [c[0] for c in discover_cases(str(tmp_path))] == ["1", "2", "10"]
+    assert [c[0] for c in discover_cases(str(tmp_path), "1*")] == ["1", "10"]
+    assert discover_cases(str(tmp_path / "missing")) == []
+
+
+def _program(tmp_path, body):
+    path = tmp_path / "prog"
+    path.write_text("#!/bin/sh\n" + body + "\n")
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+def _case(tmp_path, name, stdin, answer):
+    (tmp_path / f"{name}.in").write_bytes(stdin)
+    (tmp_path / f"{name}.out").write_bytes(answer)
+    return name, str(tmp_path / f"{name}.in"), str(tmp_path / f"{name}.out")
+
+
+@posix_only
+@pytest.mark.parametrize("body, verdict", [
+    ("cat", "AC"),
+    ("echo 1 2 4", "WA"),
+    ("echo 1 2", "WA"),
+    ("echo 1 2 3; echo boom >&2; exit 3", "RE"),
+    ("exec sleep 5", "TLE"),
+])
+def test_run_case_verdicts(tmp_path, body, verdict):
+    exe = _program(tmp_path, body)
+    r = run_case(exe, _case(tmp_path, "1", b"1 2\n3\n", b"1 2 3\n"), time_limit=0.5)
+    assert r["verdict"] == verdict, r["detail"]
+    if verdict == "RE":
+        assert "boom" in r["detail"]
+
+
+@posix_only
+def test_run_case_memory_limit(tmp_path):
+    script = "a = bytearray(300 << 20); a[::4096] = b'x' * len(a[::4096]); import time; time.sleep(2)"
+    exe = _program(tmp_path, f'exec "{sys.executable}" -c "{script}"')
+    r = run_case(exe, _case(tmp_path, "1", b"", b""), time_limit=10, memory_limit=100 << 20)
+    assert r["verdict"] == "MLE"
+
+
+@posix_only
+def test_run_tests_fail_fast_keeps_order(tmp_path):
+    exe = _program(tmp_path, "cat")
+    cases = [_case(tmp_path, str(i), b"%d\n" % i, b"%d\n" % (i if i != 2 else 0)) for i in range(1, 4)]
+    results = run_tests(exe, cases, jobs=1, log=lambda line: None)
+    assert [(r["name"], r["verdict"]) for r in results] == [("1", "AC"), ("2", "WA"), ("3", "AC")]
+    assert not all_passed(results, len(cases))
+    results = run_tests(exe, cases, jobs=1, fail_fast=True, log=lambda line: None)
+    assert [r["verdict"] for r in results][:2] == ["AC", "WA"]
+    assert len(results) <= len(cases)
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from algorithmmanager.timeline import Timeline, read_ninja_log
+
+HEADER = "# ninja log v5\n"
+
+
+def _entry(start, end, output):
+    return f"{start}\t{end}\t{end}\t{output}\th{output}{start}\n"
+
+
+def _write(build_dir, lines):
+    with open(os.path.join(build_dir, ".ninja_log"), "w", encoding="utf-8") as f:
+        f.write(HEADER + "".join(lines))
+
+
+def _units(build_dir, before, after):
+    _write(build_dir, before)
+    t = Timeline("01_KMP")
+    t.begin("build")
+    t.mark_build_start(build_dir)
+    _write(build_dir, after)
+    t.end("build")
+    t.collect_units(build_dir)
+    return sorted(u["name"] for u in t.units)
+
+
+def test_only_new_entries(tmp_path):
+    old = [_entry(0, 100, "a.o"), _entry(0, 120, "b.o")]
+    assert _units(str(tmp_path), old, old + [_entry(0, 300, "a.o")]) == ["a.o"]
+
+
+def test_new_entries_after_recompaction(tmp_path):
+    # ninja 重新压缩日志后文件比构建开始时短，新条目仍能找到
+    old = [_entry(i, i + 10, f"{name}.o") for i in range(5) for name in ("a", "b", "c")]
+    after = [_entry(4, 14, "a.o"), _entry(4, 14, "b.o"), _entry(0, 250, "c.o")]
+    assert len("".join(after)) < len("".join(old))
+    assert _units(str(tmp_path), old, after) == ["c.o"]
+
+
+def test_read_ninja_log(tmp_path):
+    _write(str(tmp_path), [_entry(100, 350, "main.cpp.o"), "bad line\n"])
+    assert read_ninja_log(str(tmp_path)) == [{"name": "main.cpp.o", "start": 0.1, "dur": pytest.approx(0.25)}]
+    assert read_ninja_log(str(tmp_path / "missing")) == []